@@ -0,0 +1,224 @@
+"""
+Benchmark the hot paths of thalassa using synthetic datasets.
+
+Usage:
+
+    python -m benchmarks.run --nodes 10000 100000 --output results.json
+    python -m benchmarks.run --compare baseline.json results.json
+
+Each benchmark is executed once "cold" (e.g. including JIT compilation) and then `--repeat` times.
+The timings of all the executions are recorded together with the peak memory that was allocated
+(as reported by `tracemalloc`). The results are written as JSON so that they can be compared
+between versions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import datetime
+import gc
+import importlib.metadata
+import json
+import logging
+import pathlib
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing as T
+
+import numpy as np
+import shapely
+
+import thalassa
+from thalassa import api
+from thalassa import utils
+
+from . import synthetic
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import xarray
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class Result:
+    benchmark: str
+    nodes: int
+    quads: float
+    timesteps: int
+    layers: int
+    cold_time: float
+    times: list[float]
+    peak_memory: int
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+
+def measure(func: T.Callable[[], T.Any], repeat: int) -> tuple[float, list[float], int]:
+    """
+    Return the elapsed time of the first ("cold") execution, the elapsed times of `repeat` subsequent
+    executions and the peak memory of an additional execution.
+
+    The peak memory is measured separately because `tracemalloc` slows down the execution.
+    """
+    gc.collect()
+    t1 = time.perf_counter()
+    func()
+    cold_time = time.perf_counter() - t1
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        t1 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t1)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return cold_time, times, peak_memory
+
+
+def get_benchmarks(ds: xarray.Dataset, path: pathlib.Path) -> dict[str, T.Callable[[], T.Any]]:
+    import holoviews as hv
+
+    snapshot = ds.isel(time=0)
+    trimesh = api.create_trimesh(snapshot, variable="zeta")
+    face_nodes = ds.face_nodes.values
+    raw_ds = synthetic.to_schism(ds)
+    bbox = shapely.box(-10, -10, 10, 10)
+    rng = np.random.default_rng(0)
+    lon, lat = rng.uniform(-180, 180), rng.uniform(-80, 80)
+    raw_ds.to_netcdf(path)
+    # The elements that wrap around the IDL overlap with the rest of the mesh
+    ds_without_idl = utils.drop_elements_crossing_idl(ds)
+    benchmarks: dict[str, T.Callable[[], T.Any]] = {
+        "open_dataset": lambda: api.open_dataset(path).triface_nodes.load(),
+        "normalize": lambda: thalassa.normalize(raw_ds),
+        "crop": lambda: utils.crop(ds, bbox=bbox),
+        "split_quads": lambda: utils.split_quads(face_nodes),
+        "create_trimesh": lambda: api.create_trimesh(snapshot, variable="zeta"),
+        # Create a new raster each time, otherwise the DynamicMap returns the cached image
+        "get_raster": lambda: hv.render(api.get_raster(trimesh), backend="bokeh"),
+        "get_index_of_nearest_node": lambda: utils.get_index_of_nearest_node(ds, lon=lon, lat=lat),
+        "drop_elements_crossing_idl": lambda: utils.drop_elements_crossing_idl(ds),
+        "generate_mesh_polygon": lambda: utils.generate_mesh_polygon(ds_without_idl),
+    }
+    return benchmarks
+
+
+def run(
+    nodes: list[int],
+    quads: float,
+    timesteps: int,
+    layers: int,
+    repeat: int,
+    selected: list[str] | None = None,
+) -> list[Result]:
+    import holoviews as hv
+
+    hv.extension("bokeh")
+    results = []
+    for no_nodes in nodes:
+        ds = synthetic.generate_synthetic_ds(
+            nodes=no_nodes, quads=quads, timesteps=timesteps, layers=layers
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            benchmarks = get_benchmarks(ds, path=pathlib.Path(tmpdir) / "synthetic.nc")
+            for name, func in benchmarks.items():
+                if selected and name not in selected:
+                    continue
+                cold_time, times, peak_memory = measure(func, repeat=repeat)
+                result = Result(
+                    benchmark=name,
+                    nodes=ds.sizes["node"],
+                    quads=quads,
+                    timesteps=timesteps,
+                    layers=layers,
+                    cold_time=cold_time,
+                    times=times,
+                    peak_memory=peak_memory,
+                )
+                print(
+                    f"{name:<30} nodes={result.nodes:<10} cold={cold_time:.6f}s median={result.median:.6f}s "
+                    f"peak_memory={peak_memory / 2**20:.1f}MiB",
+                    file=sys.stderr,
+                )
+                results.append(result)
+    return results
+
+
+def get_metadata() -> dict[str, str]:
+    versions = {}
+    for package in ("thalassa", "numpy", "xarray", "datashader", "holoviews", "geoviews", "numba"):
+        try:
+            versions[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            versions[package] = "unknown"
+    return dict(
+        timestamp=datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        **versions,
+    )
+
+
+def compare(baseline_path: pathlib.Path, current_path: pathlib.Path) -> None:
+    """Print the ratio of the median times and of the peak memory of two result files."""
+    baseline = json.loads(baseline_path.read_text())
+    current = json.loads(current_path.read_text())
+    key = ("benchmark", "nodes", "quads", "timesteps", "layers")
+    baseline_results = {tuple(r[k] for k in key): r for r in baseline["results"]}
+    print(f"{'benchmark':<30} {'nodes':>10} {'time':>8} {'memory':>8}")
+    for result in current["results"]:
+        previous = baseline_results.get(tuple(result[k] for k in key))
+        if previous is None:
+            continue
+        time_ratio = statistics.median(result["times"]) / statistics.median(previous["times"])
+        memory_ratio = result["peak_memory"] / max(previous["peak_memory"], 1)
+        print(f"{result['benchmark']:<30} {result['nodes']:>10} {time_ratio:>7.2f}x {memory_ratio:>7.2f}x")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--quads", type=float, default=0.5, help="The fraction of quad elements")
+    parser.add_argument("--timesteps", type=int, default=24)
+    parser.add_argument("--layers", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--benchmark", action="append", help="Only run the specified benchmark(s)")
+    parser.add_argument("--output", type=pathlib.Path, help="The JSON file where the results are written")
+    parser.add_argument("--compare", type=pathlib.Path, nargs=2, metavar=("BASELINE", "CURRENT"))
+    args = parser.parse_args(argv)
+    if args.compare:
+        compare(*args.compare)
+        return
+    results = run(
+        nodes=args.nodes,
+        quads=args.quads,
+        timesteps=args.timesteps,
+        layers=args.layers,
+        repeat=args.repeat,
+        selected=args.benchmark,
+    )
+    output = dict(metadata=get_metadata(), results=[dataclasses.asdict(r) for r in results])
+    if args.output:
+        args.output.write_text(json.dumps(output, indent=2))
+    else:
+        print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Generators of synthetic datasets which are used by the benchmarks."""
+
+from __future__ import annotations
+
+import typing as T
+
+import numpy as np
+import pandas as pd
+
+from thalassa import utils
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import xarray
+
+
+def generate_face_nodes(nx: int, ny: int, quads: float = 0.5, seed: int = 0) -> np.ndarray:
+    """
+    Return the connectivity table of a global structured grid with `nx * ny` nodes.
+
+    The grid wraps around the International Date Line, i.e. the last column of nodes is connected
+    to the first one. Each cell is either kept as a quad or it is split into two triangles.
+    Triangles are padded with `-1`.
+
+    Parameters:
+        nx: The number of nodes along the longitude.
+        ny: The number of nodes along the latitude.
+        quads: The fraction of cells which are kept as quads.
+        seed: The seed of the random number generator.
+    """
+    rng = np.random.default_rng(seed)
+    i, j = np.meshgrid(np.arange(ny - 1), np.arange(nx), indexing="ij")
+    i = i.ravel()
+    j = j.ravel()
+    a = i * nx + j
+    b = i * nx + (j + 1) % nx
+    c = (i + 1) * nx + (j + 1) % nx
+    d = (i + 1) * nx + j
+    is_quad = rng.random(len(a)) < quads
+    padding = np.full(len(a), -1)
+    quad_faces = np.c_[a, b, c, d][is_quad]
+    first_triangles = np.c_[a, b, c, padding][~is_quad]
+    second_triangles = np.c_[a, c, d, padding][~is_quad]
+    face_nodes = np.concatenate((quad_faces, first_triangles, second_triangles))
+    # Shuffle the faces like solver output usually is
+    face_nodes = face_nodes[rng.permutation(len(face_nodes))]
+    return face_nodes.astype(np.int32)
+
+
+def generate_synthetic_ds(
+    nodes: int = 10_000,
+    quads: float = 0.5,
+    timesteps: int = 24,
+    layers: int = 0,
+    seed: int = 0,
+) -> xarray.Dataset:
+    """
+    Return a dataset that adheres to the "Thalassa Schema" with a global mesh of roughly `nodes` nodes.
+
+    The dataset contains:
+
+    - ``depth`` on the nodes
+    - ``zeta`` on ``("time", "node")``
+    - ``zeta_max`` on the nodes
+    - ``zcor`` and ``temp`` on ``("time", "node", "layer")`` if `layers > 0`
+
+    Parameters:
+        nodes: The (approximate) number of nodes of the mesh.
+        quads: The fraction of cells which are quads.
+        timesteps: The number of timesteps.
+        layers: The number of vertical layers. If `0`, no 3D variables are created.
+        seed: The seed of the random number generator.
+    """
+    # A global grid has roughly twice as many nodes along the longitude
+    nx = max(int(np.sqrt(2 * nodes)), 3)
+    ny = max(nodes // nx, 2)
+    lon, lat = np.meshgrid(
+        np.linspace(-180, 180, nx, endpoint=False),
+        np.linspace(-80, 80, ny),
+    )
+    lon = lon.ravel()
+    lat = lat.ravel()
+    face_nodes = generate_face_nodes(nx=nx, ny=ny, quads=quads, seed=seed)
+    triface_nodes, triface_face = utils.triangulate(face_nodes)
+    depth = 1000 + 900 * np.sin(np.radians(lon)) * np.cos(np.radians(lat))
+    time_range = pd.date_range("2001-01-01", periods=timesteps, freq="h")
+    phase = np.arange(timesteps)[:, None] * 2 * np.pi / 12.42
+    zeta = np.sin(np.radians(lon) + phase) * np.cos(np.radians(lat))
+    data_vars: dict[str, T.Any] = dict(
+        face_nodes=(("face", "max_no_vertices"), face_nodes, {"_FillValue": -1}),
+        triface_face=(("triface",), triface_face),
+        depth=(("node",), depth),
+        zeta=(("time", "node"), zeta),
+        zeta_max=(("node",), zeta.max(axis=0)),
+    )
+    if layers:
+        sigma = np.linspace(-1, 0, layers)
+        zcor = zeta[:, :, None] + (zeta[:, :, None] + depth[None, :, None]) * sigma[None, None, :]
+        data_vars["zcor"] = (("time", "node", "layer"), zcor)
+        data_vars["temp"] = (("time", "node", "layer"), 10 + zcor / 100)
+    ds = utils.generate_thalassa_ds(
+        nodes=np.arange(len(lon)),
+        triface_nodes=triface_nodes,
+        lons=lon,
+        lats=lat,
+        time_range=time_range,
+        **data_vars,
+    )
+    return ds
+
+
+def to_schism(ds: xarray.Dataset) -> xarray.Dataset:
+    """Convert a synthetic dataset to a (raw) SCHISM dataset, i.e. the input of `thalassa.normalize()`."""
+    ds = ds.drop_vars(["triface_nodes", "triface_face", "node", "triface"])
+    ds["face_nodes"] = ds.face_nodes.where(ds.face_nodes >= 0) + 1
+    ds = ds.rename(
+        {
+            "node": "nSCHISM_hgrid_node",
+            "face": "nSCHISM_hgrid_face",
+            "max_no_vertices": "nMaxSCHISM_hgrid_face_nodes",
+            "face_nodes": "SCHISM_hgrid_face_nodes",
+            "lon": "SCHISM_hgrid_node_x",
+            "lat": "SCHISM_hgrid_node_y",
+        },
+    )
+    if "layer" in ds.dims:
+        ds = ds.rename({"layer": "nSCHISM_vgrid_layers"})
+    # Thalassa doesn't use the edges, but their dimension is needed in order to detect the format
+    ds["SCHISM_hgrid_edge_nodes"] = (("nSCHISM_hgrid_edge", "two"), np.zeros((1, 2), dtype=np.int32))
+    return ds
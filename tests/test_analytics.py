@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from thalassa import analytics
+from thalassa import utils
+
+
+def _get_ds() -> xr.Dataset:
+    # Two triangles forming a 1x1 degree square at the equator
+    lon = np.array([0.0, 1.0, 1.0, 0.0])
+    lat = np.array([0.0, 0.0, 1.0, 1.0])
+    time_range = pd.date_range("2001-01-01", periods=6, freq="h")
+    zeta = np.array(
+        [
+            [0.0, 0.0, 0.0, np.nan],
+            [2.0, 0.0, 0.0, np.nan],
+            [3.0, 0.0, 2.0, np.nan],
+            [0.0, 0.0, 2.0, np.nan],
+            [2.0, 0.0, 5.0, np.nan],
+            [0.0, 0.0, 0.0, np.nan],
+        ],
+    )
+    ds = utils.generate_thalassa_ds(
+        nodes=np.arange(4),
+        triface_nodes=np.array([[0, 1, 2], [0, 2, 3]]),
+        lons=lon,
+        lats=lat,
+        time_range=time_range,
+        zeta=(("time", "node"), zeta),
+    )
+    return ds
+
+
+def test_get_areas():
+    ds = _get_ds()
+    element_areas, node_areas = analytics.get_areas(ds)
+    # A 1x1 degree square at the equator is roughly 111km x 111km
+    expected = (analytics.EARTH_RADIUS * np.radians(1)) ** 2
+    assert element_areas.sum() == pytest.approx(expected, rel=0.01)
+    assert node_areas.sum() == pytest.approx(element_areas.sum())
+    # The areas are cached per mesh
+    assert analytics.get_areas(ds.copy())[0] is element_areas
+
+
+def test_get_areas_cache_is_bounded():
+    for _ in range(analytics.AREAS_CACHE_SIZE + 2):
+        analytics.get_areas(_get_ds())
+    assert len(analytics._areas) == analytics.AREAS_CACHE_SIZE
+
+
+def test_get_areas_idl():
+    lon = np.array([179.5, -179.5, -179.5])
+    lat = np.array([0.0, 0.0, 1.0])
+    areas = analytics._compute_element_areas(lon, lat, np.array([[0, 1, 2]]))
+    assert areas[0] == pytest.approx((analytics.EARTH_RADIUS * np.radians(1)) ** 2 / 2, rel=0.01)
+
+
+@pytest.mark.parametrize("time_chunk_size", [1, 4, 100])
+@pytest.mark.parametrize("node_block_size", [1, 3, 100])
+def test_compute_exceedance(time_chunk_size, node_block_size):
+    ds = _get_ds()
+    result = analytics.compute_exceedance(
+        ds,
+        variable="zeta",
+        threshold=1.0,
+        time_chunk_size=time_chunk_size,
+        node_block_size=node_block_size,
+    )
+    np.testing.assert_equal(result.first_exceedance.values, [1, np.nan, 2, np.nan])
+    np.testing.assert_equal(result.exceedance_duration.values, [3, 0, 3, 0])
+    np.testing.assert_equal(result.zeta_max.values, [3, 0, 5, np.nan])
+    _, node_areas = analytics.get_areas(ds)
+    expected_area = [
+        0,
+        node_areas[0],
+        node_areas[0] + node_areas[2],
+        node_areas[2],
+        node_areas[0] + node_areas[2],
+        0,
+    ]
+    np.testing.assert_allclose(result.flooded_area.values, expected_area)
+    assert "triface_nodes" in result
+
+
+def test_compute_exceedance_wrong_dims():
+    ds = _get_ds()
+    with pytest.raises(ValueError):
+        analytics.compute_exceedance(ds.isel(time=0))
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import time
+
 import geoviews as gv
 import holoviews as hv
+import numpy as np
+import pandas as pd
 import pytest
 
 from . import DATA_DIR
 from thalassa import api
 from thalassa import normalization
+from thalassa import prefetch
 
 ADCIRC_NC = DATA_DIR / "fort.63.nc"
 SELAFIN = DATA_DIR / "iceland.slf"
@@ -62,3 +67,277 @@ def test_get_tiles():
     tiles = api.get_tiles()
     hv.render(tiles, backend="bokeh")
     assert isinstance(tiles, gv.WMTS), type(tiles)
+
+
+def test_create_trimesh_keeps_compact_dtypes():
+    ds = normalization.compact_dataset(api.open_dataset(SELAFIN, compact=True), variables=["S"])
+    trimesh = api.create_trimesh(ds.isel(time=0), variable="S")
+    assert trimesh.nodes.data.lon.dtype == np.float32
+    assert trimesh.nodes.data.S.dtype == np.float32
+    assert trimesh.array().dtype == np.int32
+
+
+def test_tap_timeseries_asynchronous():
+    ds = api.open_dataset(SELAFIN)
+    raster = api.get_raster(api.create_trimesh(ds.isel(time=0), variable="S"))
+    hv.render(raster, backend="bokeh")
+    tap_ts = api.get_tap_timeseries(ds, "S", raster, asynchronous=True)
+    assert isinstance(tap_ts, hv.DynamicMap)
+    assert len(tap_ts[()]) == 0
+    x, y = api._get_transformer().transform(float(ds.lon[100]), float(ds.lat[100]))
+    (stream,) = [
+        stream for stream in hv.streams.Stream.registry[raster] if isinstance(stream, hv.streams.Tap)
+    ]
+    stream.event(x=x, y=y)
+    # The result is loaded on the I/O thread pool and pushed to the plot by a "done" callback
+    for _ in range(200):
+        curve = tap_ts[()]
+        if len(curve):
+            break
+        time.sleep(0.05)
+    assert len(curve) == len(ds.time)
+    assert "Node=100" in curve.opts.get().kwargs["title"]
+
+
+@pytest.fixture
+def restore_io_executor():
+    executor = api._io_executor
+    yield
+    with api._io_executor_lock:
+        current, api._io_executor = api._io_executor, executor
+    if current is not None and current is not executor:
+        current.shutdown(wait=False)
+
+
+def test_set_io_concurrency(restore_io_executor):
+    api.set_io_concurrency(2)
+    assert api._get_io_executor()._max_workers == 2
+    with pytest.raises(ValueError):
+        api.set_io_concurrency(0)
+
+
+def test_warmup():
+    timings = api.warmup()
+    assert set(timings) == {"imports", "trimesh", "raster", "wireframe", "idl", "total"}
+    assert timings["total"] == pytest.approx(sum(v for k, v in timings.items() if k != "total"))
+
+
+def _get_stations():
+    import pandas as pd
+    import xarray as xr
+
+    times = pd.date_range("2001-01-01", periods=4, freq="h")
+    stations = xr.Dataset(
+        coords=dict(stime=times, time=times),
+        data_vars=dict(
+            lon=("node", [0.0, 1.0, 1.0]),
+            lat=("node", [0.0, 1.0, 1.0]),
+            location=("node", ["a", "b", "b"]),
+            ioc_code=("node", ["a1", "b1", "b2"]),
+            elev_sim=(("node", "stime"), np.arange(12.0).reshape(3, 4)),
+            elev_obs=(("node", "time"), [[0, 1, np.nan, 3], [4, 5, 6, 7], [8, 9, 10, 11]]),
+            RMSE=("node", [0.1, 0.2, 0.3]),
+        ),
+    )
+    return stations
+
+
+def test_station_store():
+    store = api.StationStore(_get_stations())
+    assert store.labels.tolist() == ["a", "b", "b (2)"]
+    # NaNs are dropped from the series buffers
+    times, values = store.series[0]["elev_obs"]
+    assert values.tolist() == [0, 1, 3]
+    assert len(times) == 3
+    df = store.get_table([1, 2])
+    assert df.columns.tolist() == ["b", "b (2)"]
+    assert df.loc["RMSE"].tolist() == [0.2, 0.3]
+    assert df.loc["ioc_code"].tolist() == ["b1", "b2"]
+    assert store.get_positions([2, 5]).tolist() == [2]
+
+
+def test_station_store_query():
+    store = api.StationStore(_get_stations())
+    assert store.query(0.1, 0.2).tolist() == [0]
+    # Pins that share the same coordinates are all returned
+    assert store.query(0.9, 1.0).tolist() == [1, 2]
+    assert store.query([0.0, 1.0], [0.0, 1.0]).tolist() == [0, 1, 2]
+    assert store.query(0.6, 0.6, tolerance=1.0).tolist() == [0, 1, 2]
+    assert store.query([], []).tolist() == []
+
+
+def test_station_callbacks_multiple_pins():
+    stations = _get_stations()
+    store = api.StationStore(stations)
+    pins = api.get_station_pins(store)
+    timeseries = api.get_station_timeseries(store, pins)
+    table = api.get_station_table(stations, pins)
+    assert len(timeseries[()]) == 2
+    timeseries.event(index=[1, 2])
+    overlay = timeseries[()]
+    assert len(overlay) == 4
+    assert overlay.get(0).label == "b: Simulation"
+    table.event(index=[0, 2])
+    assert table[()].dimension_values("b (2)").tolist()[-1] == 0.3
+    # Selecting one of the pins that share the same coordinates selects all of them
+    table.event(index=[1])
+    assert [d.name for d in table[()].dimensions()] == ["attribute", "b", "b (2)"]
+    table.event(index=[0])
+    assert [d.name for d in table[()].dimensions()] == ["attribute", "value"]
+
+
+@pytest.mark.parametrize("from_store", [True, False])
+def test_station_callbacks_non_contiguous_nodes(from_store):
+    stations = _get_stations().assign_coords(node=[10, 20, 30])
+    store = api.StationStore(stations)
+    assert store.get_positions([20, 5]).tolist() == [1]
+    pins = api.get_station_pins(store if from_store else stations)
+    assert pins.data.index.tolist() == [10, 20, 30]
+    timeseries = api.get_station_timeseries(store, pins)
+    table = api.get_station_table(store, pins)
+    timeseries.event(index=[1])
+    assert timeseries[()].get(0).dimension_values("elev_sim").tolist() == [4, 5, 6, 7]
+    table.event(index=[0])
+    assert table[()].dimension_values("value").tolist()[-1] == 0.1
+
+
+def _get_grid_trimesh(n: int = 20):
+    import pandas as pd
+
+    from thalassa import utils
+
+    lon, lat = np.meshgrid(np.linspace(0, 10, n), np.linspace(0, 10, n))
+    ds = utils.generate_thalassa_ds(
+        nodes=np.arange(n * n),
+        triface_nodes=np.array([[0, 1, n]]),
+        lons=lon.ravel(),
+        lats=lat.ravel(),
+        time_range=pd.date_range("2001-01-01", periods=1),
+    )
+    return api.create_trimesh(ds)
+
+
+def test_node_index_select():
+    trimesh = _get_grid_trimesh()
+    index = api._NodeIndex(trimesh.nodes.data)
+    assert len(index.select(None, None)) == 400
+    x = trimesh.nodes.data.lon.values
+    y = trimesh.nodes.data.lat.values
+    x_range = (x.min(), np.median(x))
+    y_range = (y.min(), np.median(y))
+    positions = index.select(x_range, y_range)
+    expected = np.flatnonzero((x >= x_range[0]) & (x <= x_range[1]) & (y >= y_range[0]) & (y <= y_range[1]))
+    assert sorted(positions.tolist()) == expected.tolist()
+    assert index.nearest(x[5] + 1, y[5] - 1) == 5
+    assert index.nearest(x[5] + 1000, y[5], max_distance=1) is None
+
+
+def _trigger(dmap, **kwargs):
+    from holoviews.core.spaces import get_nested_streams
+
+    for stream in get_nested_streams(dmap):
+        params = {key: value for key, value in kwargs.items() if key in stream.contents}
+        if params:
+            stream.event(**params)
+
+
+def test_get_node_view():
+    hv.extension("bokeh")
+    trimesh = _get_grid_trimesh()
+    dmap = api.get_node_view(trimesh, max_glyphs=100)
+    hv.render(dmap, backend="bokeh")
+    raster, glyphs, highlight = dmap[()]
+    # All the 400 nodes are visible, so they get rasterized
+    assert isinstance(raster, hv.Image)
+    assert np.nansum(raster.data["count"].values) == 400
+    assert len(glyphs) == 0
+    # Hovering over a node returns it
+    x, y = trimesh.nodes.data.lon.values[42], trimesh.nodes.data.lat.values[42]
+    _trigger(dmap, x=x, y=y)
+    assert dmap[()].get(2).dimension_values("node").tolist() == [42]
+    # After zooming in, the nodes are drawn as glyphs
+    _trigger(dmap, x_range=(x - 1, x + 1e5), y_range=(y - 1, y + 1e5))
+    raster, glyphs, highlight = dmap[()]
+    assert np.isnan(raster.data["count"].values).all()
+    assert 0 < len(glyphs) <= 100
+    assert len(highlight) == 0
+
+
+def _get_time_ds():
+    import pandas as pd
+
+    from thalassa import utils
+
+    lon, lat = np.meshgrid(np.linspace(0, 10, 20), np.linspace(0, 10, 20))
+    lon = lon.ravel()
+    i, j = np.meshgrid(np.arange(19), np.arange(19), indexing="ij")
+    a = (i * 20 + j).ravel()
+    ds = utils.generate_thalassa_ds(
+        nodes=np.arange(400),
+        triface_nodes=np.concatenate((np.c_[a, a + 1, a + 21], np.c_[a, a + 21, a + 20])),
+        lons=lon,
+        lats=lat.ravel(),
+        time_range=pd.date_range("2001-01-01", periods=4, freq="h"),
+        zeta=(("time", "node"), np.sin(lon[None, :] + np.arange(4)[:, None])),
+    )
+    return ds
+
+
+def test_get_time_raster():
+    ds = _get_time_ds()
+    prefetcher = prefetch.TimestepPrefetcher(ds.zeta, window=1)
+    dmap = api.get_time_raster(ds, "zeta", prefetcher=prefetcher)
+    hv.render(dmap[ds.time.values[0]], backend="bokeh")
+    images = [dmap[t] for t in ds.time.values]
+    assert all(isinstance(image, hv.Image) for image in images)
+    assert np.isfinite(images[0].data.zeta.values).mean() > 0.9
+    # The images change over time
+    assert not np.allclose(images[0].data.zeta.values, images[1].data.zeta.values, equal_nan=True)
+    assert prefetcher.hits + prefetcher.misses == 4
+    prefetcher.close()
+    with pytest.raises(ValueError):
+        api.get_time_raster(ds.isel(time=0), "zeta")
+
+
+def test_get_time_raster_keeps_the_dtype():
+    ds = _get_time_ds()
+    ds["zeta"] = ds.zeta.astype(np.float32)
+    ds["zeta"][1, :5] = -99999
+    callback = api._TimeRaster(ds, "zeta", prefetch.TimestepPrefetcher(ds.zeta, window=0))
+    values = callback.get_values(ds.time.values[0])
+    assert values.dtype == np.float32
+    # Without fill values, the buffer of the prefetcher is used as is
+    assert values is callback.prefetcher.get(0)
+    values = callback.get_values(ds.time.values[1])
+    assert values.dtype == np.float32
+    assert np.isnan(values[:5]).all()
+    assert (callback.prefetcher.get(1)[:5] == -99999).all()
+    callback.prefetcher.close()
+
+
+def test_get_time_raster_closes_its_prefetcher(monkeypatch):
+    import gc
+
+    closed = []
+    monkeypatch.setattr(prefetch.TimestepPrefetcher, "close", lambda self: closed.append(self))
+    dmap = api.get_time_raster(_get_time_ds(), "zeta")
+    assert closed == []
+    del dmap
+    gc.collect()
+    assert len(closed) == 1
+
+
+def test_decimate_timeseries():
+    hv.extension("bokeh")
+    x = pd.date_range("2001-01-01", periods=100_000, freq="min").values
+    y = np.zeros(100_000)
+    y[54321] = 5
+    dmap = api._decimate_timeseries(hv.DynamicMap(lambda: hv.Curve((x, y))))
+    _trigger(dmap, width=200, scale=1.0)
+    curve = dmap[()]
+    assert len(curve) <= 4 * 200
+    assert curve.dimension_values(1).max() == 5
+    # Zooming in restores the detail
+    _trigger(dmap, x_range=(x[54000], x[54500]))
+    curve = dmap[()]
+    assert len(curve) == 503
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import concurrent.futures
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from thalassa import cli
+from thalassa import utils
+
+
+def _write_ds(path, offset=0.0):
+    lon, lat = np.meshgrid(np.arange(4.0), np.arange(4.0))
+    triangles = []
+    for j in range(3):
+        for i in range(3):
+            a = j * 4 + i
+            triangles.extend([[a, a + 1, a + 4], [a + 1, a + 5, a + 4]])
+    values = np.arange(3 * 16, dtype=float).reshape(3, 16) / 10 + offset
+    ds = utils.generate_thalassa_ds(
+        nodes=range(16),
+        triface_nodes=np.array(triangles),
+        lons=lon.ravel(),
+        lats=lat.ravel(),
+        time_range=pd.date_range("2001-01-01", periods=3, freq="h"),
+        zeta=(("time", "node"), values),
+    )
+    ds.to_netcdf(path)
+
+
+def _write_job(tmp_path, **kwargs):
+    (tmp_path / "inputs").mkdir(exist_ok=True)
+    _write_ds(tmp_path / "inputs" / "day1.nc")
+    _write_ds(tmp_path / "inputs" / "day2.nc", offset=10)
+    job = dict(
+        files=["inputs/*.nc"],
+        output_dir="outputs",
+        regions={"all": None, "west": [-0.5, -0.5, 1.5, 3.5]},
+        variables=["zeta"],
+        reductions=["max", "exceedance"],
+        threshold=4.0,
+    )
+    job.update(kwargs)
+    path = tmp_path / "job.json"
+    path.write_text(json.dumps(job))
+    return path
+
+
+def test_load_job(tmp_path):
+    job = cli.load_job(_write_job(tmp_path))
+    assert [path.name for path in job.files] == ["day1.nc", "day2.nc"]
+    assert job.output_dir == tmp_path / "outputs"
+    assert job.regions == {"all": None, "west": (-0.5, -0.5, 1.5, 3.5)}
+    assert job.reductions == ("max", "exceedance")
+    assert cli.get_output_path(job, job.files[0], "west") == tmp_path / "outputs" / "day1_west.zarr"
+
+
+@pytest.mark.parametrize(
+    "kwargs,match",
+    [
+        (dict(unknown=1), "Unknown job keys"),
+        (dict(reductions=["median"]), "Unknown reductions"),
+        (dict(format="grib"), "Unknown output format"),
+        (dict(files=["missing/*.nc"]), "No files match"),
+    ],
+)
+def test_load_job_invalid(tmp_path, kwargs, match):
+    with pytest.raises(ValueError, match=match):
+        cli.load_job(_write_job(tmp_path, **kwargs))
+
+
+def test_run(tmp_path):
+    job = cli.load_job(_write_job(tmp_path))
+    reports = cli.run(job, max_workers=1)
+    assert [report.error for report in reports] == [None, None]
+    assert [len(report.written) for report in reports] == [2, 2]
+    assert all(report.nbytes > 0 for report in reports)
+    west = xr.open_zarr(tmp_path / "outputs" / "day2_west.zarr")
+    assert west.sizes["node"] == 8
+    assert set(west.data_vars) == {
+        "lon",
+        "lat",
+        "triface_nodes",
+        "zeta_max",
+        "zeta_first_exceedance",
+        "zeta_exceedance_duration",
+        "zeta_flooded_area",
+    }
+    np.testing.assert_allclose(west.zeta_max.values, 13.2 + (west.lon.values + 4 * west.lat.values) / 10)
+    whole = xr.open_zarr(tmp_path / "outputs" / "day1_all.zarr")
+    assert whole.sizes["node"] == 16
+    # Only the nodes of the last timestep exceed the threshold
+    assert int(np.isfinite(whole.zeta_first_exceedance.values).sum()) == 7
+
+
+def test_run_skips_up_to_date_outputs(tmp_path):
+    job = cli.load_job(_write_job(tmp_path))
+    cli.run(job, max_workers=1)
+    reports = cli.run(job, max_workers=1)
+    assert [(len(report.written), len(report.skipped)) for report in reports] == [(0, 2), (0, 2)]
+    # A newer input gets processed again
+    future = job.files[1].stat().st_mtime + 10
+    os.utime(job.files[1], (future, future))
+    reports = cli.run(job, max_workers=1)
+    assert [(len(report.written), len(report.skipped)) for report in reports] == [(0, 2), (2, 0)]
+    reports = cli.run(job, max_workers=1, force=True)
+    assert [(len(report.written), len(report.skipped)) for report in reports] == [(2, 0), (2, 0)]
+
+
+@pytest.mark.parametrize("output_format", ["zarr", "netcdf"])
+def test_run_recomputes_outputs_with_different_parameters(tmp_path, output_format):
+    job = cli.load_job(_write_job(tmp_path, format=output_format))
+    cli.run(job, max_workers=1)
+    # The outputs are newer than the inputs, but they were computed with another threshold
+    job = job._replace(threshold=5.0)
+    reports = cli.run(job, max_workers=1)
+    assert [(len(report.written), len(report.skipped)) for report in reports] == [(2, 0), (2, 0)]
+    west = dict(job.regions, west=(-0.5, -0.5, 2.5, 3.5))
+    reports = cli.run(job._replace(regions=west), max_workers=1)
+    assert [(len(report.written), len(report.skipped)) for report in reports] == [(1, 1), (1, 1)]
+    reports = cli.run(job._replace(regions=west), max_workers=1)
+    assert [(len(report.written), len(report.skipped)) for report in reports] == [(0, 2), (0, 2)]
+
+
+def test_run_without_reductions_to_netcdf(tmp_path):
+    job = cli.load_job(_write_job(tmp_path, regions=None, reductions=[], format="netcdf"))
+    cli.run(job, max_workers=1)
+    ds = xr.open_dataset(tmp_path / "outputs" / "day1.nc")
+    assert ds.zeta.dims == ("time", "node")
+    assert ds.sizes["node"] == 16
+
+
+def test_main(tmp_path, capsys):
+    job = _write_job(tmp_path, regions=None)
+    # A file whose format can't be inferred
+    xr.Dataset({"foo": (("x",), [1.0])}).to_netcdf(tmp_path / "inputs" / "bad.nc")
+    assert cli.main(["process", str(job), "--workers", "2"]) == 1
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 4
+    assert sorted(line.split()[0] for line in lines[:3]) == ["FAILED", "OK", "OK"]
+    assert "Can't infer the format" in next(line for line in lines if line.startswith("FAILED"))
+    assert lines[-1].startswith("3 files, 1 failed")
+    assert (tmp_path / "outputs" / "day1.zarr").exists()
+
+
+class _BrokenPool(concurrent.futures.ThreadPoolExecutor):
+    """A pool whose worker processes die, e.g. because they get killed for running out of memory."""
+
+    def __init__(self, max_workers, mp_context):
+        super().__init__(max_workers)
+
+    def submit(self, fn, *args, **kwargs):
+        future = concurrent.futures.Future()
+        future.set_exception(concurrent.futures.process.BrokenProcessPool("A process terminated abruptly"))
+        return future
+
+
+def test_main_broken_process_pool(tmp_path, monkeypatch, capsys):
+    job = _write_job(tmp_path, regions=None)
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", _BrokenPool)
+    assert cli.main(["process", str(job), "--workers", "2"]) == 1
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split()[0] for line in lines[:2]] == ["FAILED", "FAILED"]
+    assert all("BrokenProcessPool" in line for line in lines[:2])
+    assert lines[-1].startswith("2 files, 2 failed")
+
+
+def test_main_invalid_job(tmp_path, capsys):
+    job = _write_job(tmp_path, format="grib")
+    assert cli.main(["process", str(job)]) == 2
+    assert "Invalid job" in capsys.readouterr().err
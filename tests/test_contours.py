@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+import xarray as xr
+
+from thalassa import contours
+from thalassa import utils
+
+
+def _get_ds(n: int = 11, timesteps: int = 3) -> xr.Dataset:
+    # A regular grid on [0, 1] x [0, 1] whose values are equal to the longitude (shifted by the timestep)
+    lon, lat = np.meshgrid(np.linspace(0, 1, n), np.linspace(0, 1, n))
+    lon = lon.ravel()
+    lat = lat.ravel()
+    i, j = np.meshgrid(np.arange(n - 1), np.arange(n - 1), indexing="ij")
+    a = (i * n + j).ravel()
+    triface_nodes = np.concatenate((np.c_[a, a + 1, a + n + 1], np.c_[a, a + n + 1, a + n]))
+    shift = 0.1 * np.arange(timesteps)[:, None]
+    ds = utils.generate_thalassa_ds(
+        nodes=np.arange(n * n),
+        triface_nodes=triface_nodes,
+        lons=lon,
+        lats=lat,
+        time_range=pd.date_range("2001-01-01", periods=timesteps, freq="h"),
+        value=(("node",), lon),
+        series=(("time", "node"), lon[None, :] + shift),
+    )
+    return ds
+
+
+def test_get_isoline_segments():
+    ds = _get_ds()
+    segments = contours.get_isoline_segments(contours.get_mesh(ds), ds.value.values, level=0.55)
+    # The isoline is the vertical line lon=0.55; each of the 10 rows has two crossing triangles
+    assert segments.shape == (20, 2, 2)
+    np.testing.assert_allclose(segments[..., 0], 0.55)
+
+
+def test_get_isolines():
+    ds = _get_ds()
+    gdf = contours.get_isolines(ds, "value", levels=[0.25, 0.55, 2])
+    assert gdf.level.tolist() == [0.25, 0.55, 2]
+    line = gdf.geometry.iloc[1]
+    # The segments are merged into a single line
+    assert line.geom_type == "LineString"
+    assert line.length == pytest.approx(1)
+    assert gdf.geometry.iloc[2].is_empty
+
+
+def test_get_filled_contours():
+    ds = _get_ds()
+    gdf = contours.get_filled_contours(ds, "value", levels=[0.55, 0.25, np.inf])
+    assert gdf.lower.tolist() == [0.25, 0.55]
+    assert gdf.upper.tolist() == [0.55, np.inf]
+    band, extent = gdf.geometry
+    assert band.area == pytest.approx(0.3)
+    assert extent.area == pytest.approx(0.45)
+    # The pieces of the triangles are merged without gaps
+    assert band.geom_type == "Polygon"
+    assert shapely.equals(band.envelope, shapely.box(0.25, 0, 0.55, 1))
+
+
+def test_get_filled_contours_skips_nans():
+    ds = _get_ds()
+    ds["value"] = ds.value.where(ds.lat < 0.45)
+    gdf = contours.get_filled_contours(ds, "value", levels=[-np.inf, np.inf])
+    assert gdf.geometry.iloc[0].area == pytest.approx(0.4)
+
+
+def test_extract_contours_wrong_dims():
+    ds = _get_ds()
+    with pytest.raises(ValueError):
+        contours.get_isolines(ds, "series", levels=[0.5])
+
+
+def test_extract_in_uninitialized_worker(monkeypatch):
+    monkeypatch.setattr(contours, "_worker_mesh", None)
+    with pytest.raises(RuntimeError, match="not been initialized"):
+        contours._extract_in_worker(np.zeros(4), levels=[0.5], filled=False)
+
+
+@pytest.mark.parametrize("filled", [False, True])
+def test_extract_contours(tmp_path, filled):
+    ds = _get_ds()
+    path = tmp_path / "contours.gpkg"
+    gdf = contours.extract_contours(
+        ds, "series", levels=[0.55, np.inf], filled=filled, max_workers=2, path=path
+    )
+    levels_per_timestep = 1 if filled else 2
+    assert len(gdf) == ds.sizes["time"] * levels_per_timestep
+    assert (gdf.time.values == np.repeat(ds.time.values, levels_per_timestep)).all()
+    assert path.exists()
+    if filled:
+        # The extent grows as the values increase with time
+        np.testing.assert_allclose(shapely.area(gdf.geometry.values), [0.45, 0.55, 0.65])
+    else:
+        assert [geometry.coords[0][0] for geometry in gdf.geometry[::2]] == pytest.approx(
+            [0.55, 0.45, 0.35]
+        )
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from thalassa import api
+from thalassa import utils
+from thalassa.ensemble import Ensemble
+
+
+def _get_member(offset, start="2001-01-01", lons=None):
+    time_range = pd.date_range(start, periods=4, freq="h")
+    zeta = np.arange(4 * 4, dtype=float).reshape(4, 4) + offset
+    return utils.generate_thalassa_ds(
+        nodes=range(4),
+        triface_nodes=np.array([[0, 1, 2], [1, 3, 2]]),
+        lons=np.array([0.0, 1.0, 0.0, 1.0]) if lons is None else lons,
+        lats=np.array([0.0, 0.0, 1.0, 1.0]),
+        time_range=time_range,
+        zeta=(("time", "node"), zeta),
+    )
+
+
+def test_ensemble_checks_the_mesh():
+    with pytest.raises(ValueError, match="differ"):
+        Ensemble([_get_member(0), _get_member(0, lons=np.array([0.0, 2.0, 0.0, 1.0]))])
+    with pytest.raises(ValueError, match="at least one"):
+        Ensemble([])
+
+
+def test_ensemble_statistics_are_lazy():
+    ensemble = Ensemble({"a": _get_member(0), "b": _get_member(1), "c": _get_member(5)})
+    assert len(ensemble) == 3
+    stacked = ensemble.get_stacked("zeta")
+    assert stacked.dims == ("member", "time", "node")
+    assert stacked.chunks is not None
+    mean = ensemble.get_mean("zeta")
+    assert mean.zeta.chunks is not None
+    np.testing.assert_allclose(mean.zeta.values, _get_member(2).zeta.values)
+    spread = ensemble.get_spread("zeta")
+    np.testing.assert_allclose(spread.zeta.values, np.std([0, 1, 5]))
+    percentiles = ensemble.get_percentiles("zeta", [0, 50, 100])
+    assert percentiles.zeta.dims == ("percentile", "time", "node")
+    np.testing.assert_allclose(percentiles.zeta.sel(percentile=50).values, _get_member(1).zeta.values)
+
+
+def test_ensemble_difference_shares_the_mesh():
+    ensemble = Ensemble({"a": _get_member(0), "b": _get_member(3, start="2001-01-01T02")})
+    diff = ensemble.get_difference("zeta", "b", "a")
+    # Only the common timesteps are used
+    assert len(diff.time) == 2
+    np.testing.assert_allclose(diff.zeta.values, 3 - 8)
+    assert diff.zeta.attrs["ensemble"] == "b - a"
+    assert np.shares_memory(diff.lon.values, ensemble.mesh.lon.values)
+    assert np.shares_memory(diff.triface_nodes.values, ensemble.mesh.triface_nodes.values)
+    raster = api.get_raster(diff.isel(time=0), variable="zeta")
+    assert raster is not None
+
+
+def test_ensemble_keeps_the_connectivity_once():
+    members = [
+        _get_member(offset).assign(
+            face_nodes=(("face", "max_no_vertices"), np.array([[0, 1, 2], [1, 3, 2]])),
+            triface_face=(("triface",), np.array([0, 1])),
+        )
+        for offset in range(2)
+    ]
+    ensemble = Ensemble(members)
+    assert {"face_nodes", "triface_face", "triface_nodes", "lon", "lat"} <= set(ensemble.mesh.variables)
+    for member in ensemble._members.values():
+        assert not {"face_nodes", "triface_face", "triface_nodes", "lon", "lat"} & set(member.variables)
+    assert "face_nodes" in ensemble.get_mean("zeta")
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import netCDF4
+import numpy as np
+import pandas as pd
+
+from thalassa import api
+from thalassa import utils
+from thalassa.follow import DatasetFollower
+
+
+def _write_growing_file(path):
+    ds = utils.generate_thalassa_ds(
+        nodes=range(4),
+        triface_nodes=np.array([[0, 1, 2], [1, 3, 2]]),
+        lons=np.array([0.0, 1.0, 0.0, 1.0]),
+        lats=np.array([0.0, 0.0, 1.0, 1.0]),
+        time_range=pd.date_range("2001-01-01", periods=2, freq="h"),
+        zeta=(("time", "node"), np.zeros((2, 4))),
+    )
+    encoding = {"time": {"units": "hours since 2001-01-01", "dtype": "i4"}}
+    # netCDF3, since HDF5 locks the files that are open for reading
+    ds.to_netcdf(path, format="NETCDF3_64BIT", unlimited_dims=["time"], encoding=encoding)
+
+
+def _append_timesteps(path, hours):
+    with netCDF4.Dataset(path, "a") as nc:
+        size = len(nc["time"])
+        nc["time"][size : size + len(hours)] = hours
+        nc["zeta"][size : size + len(hours), :] = np.ones((len(hours), 4))
+
+
+def test_follow(tmp_path):
+    path = tmp_path / "growing.nc"
+    _write_growing_file(path)
+    follower = api.open_dataset(path, follow=True)
+    assert isinstance(follower, DatasetFollower)
+    assert len(follower.ds.time) == 2
+    notifications = []
+    follower.subscribe(lambda ds, new_times: notifications.append(new_times))
+    stream = follower.stream
+    # Nothing has changed yet
+    assert len(follower.refresh()) == 0
+    _append_timesteps(path, [2, 3, 4])
+    new_times = follower.refresh()
+    assert len(new_times) == 3
+    assert new_times[0] == np.datetime64("2001-01-01T02:00")
+    assert len(follower.ds.time) == 5
+    assert float(follower.ds.zeta.isel(time=-1).sum()) == 4
+    # The geometry is kept
+    assert "triface_nodes" in follower.ds
+    assert len(notifications) == 1
+    assert stream.no_timesteps == 5
+    assert len(follower.refresh()) == 0
+
+
+def test_follow_in_the_background(tmp_path):
+    path = tmp_path / "growing.nc"
+    _write_growing_file(path)
+    follower = DatasetFollower(path)
+    follower.start(interval=0.01)
+    try:
+        _append_timesteps(path, [2])
+        for _ in range(200):
+            if len(follower.ds.time) == 3:
+                break
+            follower._stop.wait(0.01)
+    finally:
+        follower.stop()
+    assert len(follower.ds.time) == 3
+
+
+def test_follow_keeps_the_planned_dtypes(tmp_path):
+    path = tmp_path / "growing.nc"
+    _write_growing_file(path)
+    # The mesh does not fit in the budget, so the compact dtypes are used
+    follower = DatasetFollower(path, memory_budget=200)
+    assert follower.compact
+    dtype = follower.ds.zeta.dtype
+    _append_timesteps(path, [2, 3])
+    assert len(follower.refresh()) == 2
+    assert follower.ds.zeta.dtype == dtype
+    assert len(follower.ds.time) == 4
+    np.testing.assert_array_equal(follower.ds.zeta.values.sum(axis=1), [0, 0, 4, 4])
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+import threading
+
+import holoviews as hv
+import pytest
+
+from . import DATA_DIR
+from thalassa import api
+from thalassa import instrumentation
+
+SELAFIN = DATA_DIR / "iceland.slf"
+
+
+@pytest.fixture
+def sink():
+    sink = instrumentation.InMemorySink()
+    instrumentation.enable(sink)
+    yield sink
+    instrumentation.disable()
+
+
+def test_span_disabled_is_a_noop():
+    assert not instrumentation.is_enabled()
+    with instrumentation.span("noop") as span:
+        span.record_bytes(10)
+    assert instrumentation.current_span() is span
+
+
+def test_nested_spans(sink):
+    with instrumentation.span("outer"):
+        with instrumentation.span("inner", key="value") as inner:
+            inner.record_bytes(100)
+    inner_record, outer_record = sink.records
+    assert inner_record.name == "inner"
+    assert inner_record.parent == "outer"
+    assert inner_record.depth == 1
+    assert inner_record.attributes == {"key": "value"}
+    assert outer_record.parent is None
+    assert outer_record.bytes_read == 100
+    assert outer_record.duration >= inner_record.duration
+
+
+def test_track_memory():
+    sink = instrumentation.InMemorySink()
+    instrumentation.enable(sink, track_memory=True)
+    try:
+        with instrumentation.span("outer"):
+            with instrumentation.span("inner"):
+                data = bytearray(10_000_000)
+            del data
+    finally:
+        instrumentation.disable()
+    assert sink.stats["inner"].peak_memory >= 10_000_000
+    assert sink.stats["outer"].peak_memory >= 10_000_000
+
+
+def test_track_memory_ignores_concurrent_threads():
+    sink = instrumentation.InMemorySink()
+    instrumentation.enable(sink, track_memory=True)
+    started = threading.Event()
+    finish = threading.Event()
+
+    def background():
+        with instrumentation.span("background"):
+            started.set()
+            finish.wait()
+
+    try:
+        with instrumentation.span("main"):
+            data = bytearray(10_000_000)
+            del data
+            thread = threading.Thread(target=background)
+            thread.start()
+            started.wait()
+            finish.set()
+            thread.join()
+    finally:
+        instrumentation.disable()
+    # The background span must not reset the peak of the span of the main thread
+    assert sink.stats["main"].peak_memory >= 10_000_000
+    assert [r.peak_memory for r in sink.records if r.name == "background"] == [None]
+
+
+def test_hot_paths_are_instrumented(sink):
+    ds = api.open_dataset(SELAFIN)
+    raster = api.get_raster(ds.isel(time=0), variable="S")
+    hv.render(raster, backend="bokeh")
+    summary = sink.summary()
+    assert {"open_dataset", "normalize", "create_trimesh", "rasterize"} <= set(summary)
+    assert summary["normalize"]["bytes_read"] > 0
+    assert [r.parent for r in sink.records if r.name == "normalize"][0] == "open_dataset"
+
+
+def test_json_lines_sink(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    sink = instrumentation.JSONLinesSink(path)
+    instrumentation.enable(sink)
+    try:
+        with instrumentation.span("first"):
+            pass
+        with instrumentation.span("second"):
+            pass
+    finally:
+        instrumentation.disable()
+        sink.close()
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["first", "second"]
+
+
+def test_prometheus_sink():
+    sink = instrumentation.PrometheusSink()
+    instrumentation.enable(sink)
+    try:
+        for _ in range(3):
+            with instrumentation.span("load"):
+                pass
+    finally:
+        instrumentation.disable()
+    text = sink.render()
+    assert 'thalassa_span_duration_seconds_count{span="load"} 3' in text
+    assert "# TYPE thalassa_span_duration_seconds_sum counter" in text
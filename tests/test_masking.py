@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from thalassa import api
+from thalassa import masking
+from thalassa import utils
+
+
+def _get_ds() -> xr.Dataset:
+    zeta = np.array(
+        [
+            [0.0, 1.0, 2.0, 3.0],
+            [0.0, -99999.0, 2.0, 3.0],
+            [np.nan, 1.0, 2.0, 3.0],
+        ],
+    )
+    wetdry = np.zeros((3, 4), dtype=np.int8)
+    wetdry[0, 3] = 1
+    ds = utils.generate_thalassa_ds(
+        nodes=np.arange(4),
+        triface_nodes=np.array([[0, 1, 2], [1, 2, 3]]),
+        lons=np.array([0.0, 1.0, 0.0, 1.0]),
+        lats=np.array([0.0, 0.0, 1.0, 1.0]),
+        time_range=pd.date_range("2001-01-01", periods=3, freq="h"),
+        zeta=(("time", "node"), zeta),
+        wetdry_node=(("time", "node"), wetdry),
+    )
+    return ds
+
+
+def test_get_fill_values():
+    ds = _get_ds()
+    assert masking.get_fill_values(ds.zeta) == [-99999.0]
+    # The default fill values are only used when none are declared
+    ds.zeta.attrs["missing_value"] = -999
+    assert masking.get_fill_values(ds.zeta) == [-999.0]
+
+
+def test_get_active_nodes():
+    ds = _get_ds()
+    active = masking.get_active_nodes(ds, "zeta")
+    assert active.dims == ("time", "node")
+    expected = [[True, True, True, False], [True, False, True, True], [False, True, True, True]]
+    assert active.values.tolist() == expected
+    # Without the wet/dry flag
+    active = masking.get_active_nodes(ds.drop_vars("wetdry_node"), "zeta", fill_values=[])
+    assert active.values[1].tolist() == [True, True, True, True]
+
+
+@pytest.mark.parametrize("chunks", [None, {"time": 1}])
+def test_get_active_elements(chunks):
+    ds = _get_ds()
+    if chunks:
+        ds = ds.chunk(chunks)
+    active = masking.get_active_elements(ds, "zeta")
+    assert active.dims == ("time", "triface")
+    assert active.values.tolist() == [[True, False], [False, False], [False, True]]
+
+
+def test_mask_inactive():
+    ds = _get_ds()
+    masked = masking.mask_inactive(ds, "zeta")
+    assert np.isnan(masked.zeta.values[1, 1])
+    assert ds.zeta.values[1, 1] == -99999
+
+
+def test_create_trimesh_drops_inactive_elements():
+    ds = _get_ds().isel(time=1)
+    trimesh = api.create_trimesh(ds, variable="zeta", mask=True)
+    assert len(trimesh) == 0
+    assert np.isnan(trimesh.nodes.data.zeta.values[1])
+    # Masking is opt-in
+    trimesh = api.create_trimesh(ds, variable="zeta")
+    assert len(trimesh) == 2
+    assert trimesh.nodes.data.zeta.min() == -99999
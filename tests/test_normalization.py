@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import numpy as np
 import pytest
 import xarray as xr
 
 from . import DATA_DIR
 from thalassa import api
 from thalassa import normalization
+from thalassa import utils
 from thalassa.normalization import THALASSA_FORMATS
 
 
@@ -39,3 +41,35 @@ def test_infer_format(ds, expected_fmt):
 def test_can_be_inferred(path, expected):
     result = normalization.can_be_inferred(path)
     assert result == expected
+
+
+def test_normalize_one_based_integer_fill_value():
+    ds = xr.Dataset(
+        data_vars=dict(
+            lon=("node", [0.0, 1.0, 1.0, 0.0, 2.0]),
+            lat=("node", [0.0, 0.0, 1.0, 1.0, 0.5]),
+            element=(("nele", "nvertex"), [[1, 2, 3, 4], [2, 5, 3, -1]], {"_FillValue": -1}),
+        ),
+    ).rename(lon="x", lat="y")
+    normalized = normalization.normalize(ds)
+    assert normalized.face_nodes.values.tolist() == [[0, 1, 2, 3], [1, 4, 2, -1]]
+    assert normalized.triface_nodes.values.tolist() == [[0, 1, 2], [0, 2, 3], [1, 4, 2]]
+    assert normalized.triface_face.values.tolist() == [0, 0, 1]
+
+
+def test_compact_dataset():
+    ds = utils.generate_thalassa_ds(
+        nodes=range(3),
+        triface_nodes=np.array([[0, 1, 2]], dtype=np.int64),
+        lons=[10.0, 11.0, 12.0],
+        lats=[20.0, 21.0, 22.0],
+        depth=(("node"), np.array([1.0, 2.0, 3.0])),
+    )
+    compacted = normalization.compact_dataset(ds)
+    assert compacted.triface_nodes.dtype == np.int32
+    assert compacted.lon.dtype == np.float32
+    assert compacted.lat.dtype == np.float32
+    # Only the coordinates are downcast, unless more variables are explicitly requested
+    assert compacted.depth.dtype == np.float64
+    assert compacted.node.dtype == ds.node.dtype
+    assert normalization.compact_dataset(ds, variables=["depth"]).depth.dtype == np.float32
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import holoviews as hv
+import numpy as np
+import pytest
+
+from thalassa import api
+from thalassa import outofcore
+from thalassa import utils
+
+
+def _get_grid(n=20):
+    lon, lat = np.meshgrid(np.linspace(0, 1, n), np.linspace(0, 1, n))
+    triangles = []
+    for j in range(n - 1):
+        for i in range(n - 1):
+            a = j * n + i
+            triangles.extend([[a, a + 1, a + n], [a + 1, a + n + 1, a + n]])
+    ds = utils.generate_thalassa_ds(
+        nodes=range(n * n),
+        triface_nodes=np.array(triangles),
+        lons=lon.ravel(),
+        lats=lat.ravel(),
+    )
+    ds["depth"] = (("node",), lon.ravel() + lat.ravel())
+    return ds
+
+
+def _rasterize_in_core(ds, spec):
+    import datashader as dsh
+    import pandas as pd
+
+    x, y = api._get_transformer().transform(ds.lon.values, ds.lat.values)
+    vertices = pd.DataFrame({"x": x, "y": y, "depth": ds.depth.values})
+    triangles = pd.DataFrame(ds.triface_nodes.values, columns=["v0", "v1", "v2"])
+    canvas = dsh.Canvas(
+        plot_width=spec["width"],
+        plot_height=spec["height"],
+        x_range=spec["x_range"],
+        y_range=spec["y_range"],
+    )
+    return canvas.trimesh(vertices, triangles, agg=dsh.mean("depth"))
+
+
+@pytest.mark.parametrize("partition_size", [7, 100, 10_000])
+def test_rasterize_matches_the_in_core_result(partition_size):
+    ds = _get_grid()
+    x_range, y_range = outofcore._get_extent(ds)
+    spec = dict(x_range=x_range, y_range=y_range, width=50, height=40)
+    image = outofcore.rasterize(ds, "depth", partition_size=partition_size, **spec)
+    assert image.shape == (40, 50)
+    expected = _rasterize_in_core(ds, spec)
+    np.testing.assert_allclose(image.values, expected.values, rtol=1e-6)
+    np.testing.assert_allclose(image.lon.values, expected.x.values)
+
+
+def test_get_partitions_are_spatially_compact():
+    ds = _get_grid()
+    partitions = outofcore._get_partitions(ds, partition_size=100)
+    triangles = np.concatenate([partition.triangles for partition in partitions])
+    assert sorted(triangles.tolist()) == list(range(ds.sizes["triface"]))
+    # Contrary to runs of consecutive triangles, the partitions don't span the whole width of the mesh
+    x_range, _ = outofcore._get_extent(ds)
+    for partition in partitions:
+        assert partition.x_range[1] - partition.x_range[0] < 0.6 * (x_range[1] - x_range[0])
+
+
+def test_rasterize_skips_the_partitions_outside_of_the_view(monkeypatch):
+    ds = _get_grid()
+    rasterized = []
+    original = outofcore._rasterize_partition
+
+    def rasterize_partition(ds, variable, triangles, **kwargs):
+        rasterized.append(triangles)
+        return original(ds, variable, triangles, **kwargs)
+
+    monkeypatch.setattr(outofcore, "_rasterize_partition", rasterize_partition)
+    x_range, y_range = outofcore._get_extent(ds)
+    corner = (x_range[0], (x_range[0] + x_range[1]) / 4), (y_range[0], (y_range[0] + y_range[1]) / 4)
+    image = outofcore.rasterize(ds, "depth", x_range=corner[0], y_range=corner[1], partition_size=50)
+    assert np.isfinite(image.values).any()
+    assert 0 < len(rasterized) < len(outofcore._get_partitions(ds, partition_size=50)) / 2
+
+
+def test_rasterize_with_dask_and_fill_values():
+    ds = _get_grid()
+    ds["depth"][0] = -99999
+    ds = ds.chunk({"node": 50, "triface": 100})
+    image = outofcore.rasterize(ds, "depth", width=30, height=30, partition_size=100)
+    assert np.nanmin(image.values) > 0
+    # Outside of the mesh
+    far = outofcore.rasterize(ds, "depth", x_range=(1e7, 2e7), y_range=(1e7, 2e7), width=10, height=10)
+    assert np.isnan(far.values).all()
+
+
+def test_outofcore_get_raster():
+    hv.extension("bokeh")
+    ds = _get_grid()
+    dmap = outofcore.get_raster(ds, "depth", partition_size=100)
+    hv.render(dmap, backend="bokeh")
+    image = dmap[()]
+    assert isinstance(image, hv.Image)
+    assert np.isfinite(image.dimension_values(2)).any()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+
+from thalassa import analytics
+from thalassa import api
+from thalassa import outofcore
+from thalassa import planning
+from thalassa import utils
+
+
+@pytest.fixture(autouse=True)
+def reset_memory_budget(monkeypatch):
+    monkeypatch.delenv(planning.MEMORY_BUDGET_ENV_VARIABLE, raising=False)
+    yield
+    planning.set_memory_budget(None)
+
+
+def _get_ds(no_timesteps=2):
+    return utils.generate_thalassa_ds(
+        nodes=range(4),
+        triface_nodes=np.array([[0, 1, 2], [1, 3, 2]]),
+        lons=np.array([0.0, 1.0, 0.0, 1.0]),
+        lats=np.array([0.0, 0.0, 1.0, 1.0]),
+        time_range=pd.date_range("2001-01-01", periods=no_timesteps, freq="h"),
+        zeta=(("time", "node"), np.arange(no_timesteps * 4, dtype=float).reshape(no_timesteps, 4)),
+    )
+
+
+@pytest.mark.parametrize(
+    "size,expected",
+    [
+        (1000, 1000),
+        ("1000", 1000),
+        ("512MB", 512 * 1024**2),
+        ("4GiB", 4 * 1024**3),
+        ("1.5k", 1536),
+        (" 2 TB ", 2 * 1024**4),
+    ],
+)
+def test_parse_size(size, expected):
+    assert planning.parse_size(size) == expected
+
+
+@pytest.mark.parametrize("size", ["", "GB", "1 XB", "-1GB"])
+def test_parse_size_invalid(size):
+    with pytest.raises(ValueError, match="Invalid size"):
+        planning.parse_size(size)
+
+
+def test_get_memory_budget_resolution_order(monkeypatch):
+    assert planning.get_memory_budget() == planning._get_physical_memory() // 2
+    monkeypatch.setenv(planning.MEMORY_BUDGET_ENV_VARIABLE, "2GB")
+    assert planning.get_memory_budget() == 2 * 1024**3
+    planning.set_memory_budget("1GB")
+    assert planning.get_memory_budget() == 1024**3
+    assert planning.get_memory_budget("1MB") == 1024**2
+    planning.set_memory_budget(None)
+    assert planning.get_memory_budget() == 2 * 1024**3
+
+
+@pytest.mark.parametrize(
+    "nbytes,expected",
+    [
+        (0, "0 bytes"),
+        (1000, "1000 bytes"),
+        (1536, "1.5 KiB"),
+        (3 * 1024**2, "3.0 MiB"),
+        (5 * 1024**4, "5120.0 GiB"),
+    ],
+)
+def test_format_size(nbytes, expected):
+    assert planning.format_size(nbytes) == expected
+
+
+def test_check():
+    planning.check(100, "Something", budget=100)
+    with pytest.raises(planning.MemoryBudgetExceeded, match="Something needs ~101 bytes") as exc:
+        planning.check(101, "Something", budget=100)
+    assert isinstance(exc.value, MemoryError)
+    with pytest.raises(planning.MemoryBudgetExceeded, match="budget of 2.0 KiB"):
+        planning.check(4096, "Something", budget=2048)
+
+
+def test_limit_chunk_size():
+    assert planning.limit_chunk_size(24, item_nbytes=10, budget=1000) == (24, 1)
+    assert planning.limit_chunk_size(24, item_nbytes=100, budget=1000) == (10, 1)
+    assert planning.limit_chunk_size(24, item_nbytes=100, budget=1000, parallelism=4) == (2, 4)
+    # The parallelism gets reduced before giving up
+    assert planning.limit_chunk_size(24, item_nbytes=100, budget=1000, parallelism=20) == (1, 10)
+    with pytest.raises(planning.MemoryBudgetExceeded, match="single item"):
+        planning.limit_chunk_size(24, item_nbytes=1001, budget=1000, parallelism=20)
+
+
+def test_plan_dataset(caplog):
+    ds = _get_ds(no_timesteps=10)
+    assert planning.plan_dataset(ds, budget="1MB") == planning.Plan(compact=False, chunks=None)
+    mesh_nbytes = sum(var.nbytes for var in ds.variables.values() if "time" not in var.dims)
+    # The mesh fits, but only with the compact dtypes
+    with caplog.at_level(logging.WARNING, logger="thalassa.planning"):
+        plan = planning.plan_dataset(ds, budget=mesh_nbytes + 100)
+    assert plan.compact
+    assert "using compact dtypes" in caplog.text
+    assert plan.chunks == {"time": 1}
+    # The mesh is not loaded if the dataset is not normalized
+    plan = planning.plan_dataset(ds, budget=300, normalize=False)
+    assert not plan.compact
+    assert plan.chunks == {"time": 1}
+    with pytest.raises(planning.MemoryBudgetExceeded, match="Normalizing the mesh"):
+        planning.plan_dataset(ds, budget=mesh_nbytes // 2)
+
+
+def test_open_dataset_with_memory_budget(tmp_path):
+    path = tmp_path / "ds.nc"
+    _get_ds(no_timesteps=10).to_netcdf(path)
+    ds = api.open_dataset(path)
+    assert ds.zeta.chunks is None
+    assert ds.lon.dtype == np.float64
+    ds = api.open_dataset(path, memory_budget=300)
+    assert ds.zeta.chunks == ((1,) * 10, (4,))
+    assert ds.lon.dtype == np.float32
+    np.testing.assert_array_equal(ds.zeta.values, _get_ds(no_timesteps=10).zeta.values)
+    # An explicit chunking takes precedence
+    ds = api.open_dataset(path, memory_budget=300, chunks={"time": 5})
+    assert ds.zeta.chunks == ((5, 5), (4,))
+
+
+def test_crop_with_memory_budget():
+    ds = _get_ds()
+    bbox = shapely.box(-1, -1, 2, 2)
+    assert len(utils.crop(ds, bbox, memory_budget="1MB").node) == 4
+    planning.set_memory_budget(10)
+    with pytest.raises(planning.MemoryBudgetExceeded, match="Cropping"):
+        utils.crop(ds, bbox)
+
+
+def test_create_trimesh_with_memory_budget():
+    ds = _get_ds().isel(time=0)
+    with pytest.raises(planning.MemoryBudgetExceeded, match="Creating the trimesh"):
+        api.create_trimesh(ds, "zeta", memory_budget=100)
+
+
+def test_get_raster_falls_back_to_outofcore(monkeypatch):
+    ds = _get_ds().isel(time=0)
+    calls = []
+    monkeypatch.setattr(outofcore, "get_raster", lambda ds, variable, **kwargs: calls.append(variable))
+    api.get_raster(ds, "zeta", memory_budget="1MB")
+    assert calls == []
+    api.get_raster(ds, "zeta", memory_budget=100)
+    assert calls == ["zeta"]
+
+
+def test_compute_exceedance_with_memory_budget():
+    ds = _get_ds(no_timesteps=10)
+    expected = analytics.compute_exceedance(ds, threshold=10)
+    # A single timestep per chunk
+    result = analytics.compute_exceedance(ds, threshold=10, max_workers=1, memory_budget=4 * 8 * 3)
+    np.testing.assert_array_equal(result.exceedance_duration.values, expected.exceedance_duration.values)
+    np.testing.assert_allclose(result.flooded_area.values, expected.flooded_area.values)
+    # Two blocks don't fit at once, so they are processed one at a time
+    result = analytics.compute_exceedance(
+        ds, threshold=10, node_block_size=2, max_workers=2, memory_budget=2 * 8 * 3
+    )
+    np.testing.assert_array_equal(result.exceedance_duration.values, expected.exceedance_duration.values)
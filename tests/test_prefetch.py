@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from thalassa import prefetch
+
+
+def _get_data(timesteps: int = 10) -> xr.DataArray:
+    return xr.DataArray(np.arange(timesteps * 3).reshape(timesteps, 3), dims=("time", "node"))
+
+
+def _wait_for_pending(prefetcher: prefetch.TimestepPrefetcher) -> None:
+    for _ in range(100):
+        if not prefetcher._pending:
+            return
+        time.sleep(0.01)
+
+
+def test_prefetcher_get():
+    data = _get_data()
+    prefetcher = prefetch.TimestepPrefetcher(data, window=2)
+    for index in (0, 5, 9, 4):
+        np.testing.assert_array_equal(prefetcher.get(index), data.isel(time=index).values)
+    prefetcher.close()
+
+
+def test_prefetcher_prefetches_adjacent_timesteps():
+    prefetcher = prefetch.TimestepPrefetcher(_get_data(), window=2)
+    prefetcher.get(3)
+    _wait_for_pending(prefetcher)
+    assert sorted(prefetcher._buffer) == [1, 2, 3, 4, 5]
+    assert prefetcher.misses == 1
+    # Playback: the next timesteps have already been loaded
+    prefetcher.get(4)
+    prefetcher.get(5)
+    assert prefetcher.misses == 1
+    assert prefetcher.hits == 2
+    _wait_for_pending(prefetcher)
+    # The buffer is bounded; the timesteps far from the current one have been evicted
+    assert sorted(prefetcher._buffer) == [3, 4, 5, 6, 7]
+    prefetcher.close()
+
+
+def test_prefetcher_invalid():
+    with pytest.raises(ValueError):
+        prefetch.TimestepPrefetcher(_get_data().T)
+    prefetcher = prefetch.TimestepPrefetcher(_get_data())
+    with pytest.raises(IndexError):
+        prefetcher.get(10)
+    prefetcher.close()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from . import DATA_DIR
+from thalassa import api
+from thalassa import registry
+from thalassa import utils
+
+SELAFIN = DATA_DIR / "iceland.slf"
+
+
+def _generate_ds(lons=(10.0, 11.0, 12.0)):
+    return utils.generate_thalassa_ds(
+        nodes=range(3),
+        triface_nodes=np.array([[0, 1, 2]], dtype=np.int32),
+        lons=list(lons),
+        lats=[20.0, 21.0, 22.0],
+        depth=(("node"), np.array([1.0, 2.0, 3.0])),
+    )
+
+
+def test_get_mesh_fingerprint():
+    assert registry.get_mesh_fingerprint(_generate_ds()) == registry.get_mesh_fingerprint(_generate_ds())
+    assert registry.get_mesh_fingerprint(_generate_ds()) != registry.get_mesh_fingerprint(
+        _generate_ds(lons=(10.0, 11.0, 13.0)),
+    )
+
+
+def test_mesh_registry_share(tmp_path):
+    mesh_registry = registry.MeshRegistry(tmp_path)
+    ds1 = mesh_registry.share(_generate_ds())
+    ds2 = mesh_registry.share(_generate_ds())
+    for name in registry.MESH_VARIABLES:
+        assert registry.is_shared(ds1[name].values)
+        assert np.shares_memory(ds1[name].values, ds2[name].values)
+        assert not ds1[name].values.flags.writeable
+    assert ds1.depth.equals(_generate_ds().depth)
+
+
+def test_mesh_registry_attach_from_other_registry(tmp_path):
+    fingerprint = registry.MeshRegistry(tmp_path).publish(_generate_ds())
+    # A new instance is the equivalent of a different process
+    other_registry = registry.MeshRegistry(tmp_path)
+    assert fingerprint in other_registry
+    arrays = other_registry.attach(fingerprint)
+    assert np.array_equal(arrays["lon"], [10.0, 11.0, 12.0])
+
+
+def test_mesh_registry_attach_missing(tmp_path):
+    with pytest.raises(KeyError):
+        registry.MeshRegistry(tmp_path).attach("missing")
+
+
+def test_mesh_registry_remove_published(tmp_path):
+    mesh_registry = registry.MeshRegistry(tmp_path)
+    fingerprint = mesh_registry.publish(_generate_ds())
+    # Already published, so it is not owned by this instance
+    other_registry = registry.MeshRegistry(tmp_path)
+    other_registry.publish(_generate_ds())
+    other_registry.remove_published()
+    assert fingerprint in mesh_registry
+    mesh_registry.remove_published()
+    assert fingerprint not in mesh_registry
+    assert not list(tmp_path.iterdir())
+
+
+def test_mesh_registry_clear(tmp_path):
+    mesh_registry = registry.MeshRegistry(tmp_path)
+    fingerprints = [mesh_registry.publish(_generate_ds(lons=(10.0, 11.0, lon))) for lon in (12.0, 13.0)]
+    (tmp_path / fingerprints[0] / "lon.npy.1234.tmp").touch()
+    registry.MeshRegistry(tmp_path).clear()
+    assert not any(fingerprint in mesh_registry for fingerprint in fingerprints)
+    assert not list(tmp_path.iterdir())
+
+
+def test_open_dataset_share_mesh(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "get_registry", lambda: registry.MeshRegistry(tmp_path))
+    ds = api.open_dataset(SELAFIN, share_mesh=True)
+    assert registry.is_shared(ds.triface_nodes.values)
+    assert not registry.is_shared(ds.S.values)
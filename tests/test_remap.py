@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from thalassa import remap
+from thalassa import utils
+
+
+def _get_square(lons, lats, **kwargs):
+    # A triangulated grid with nodes on the given coordinates
+    nx, ny = len(lons), len(lats)
+    lon, lat = np.meshgrid(lons, lats)
+    triangles = []
+    for j in range(ny - 1):
+        for i in range(nx - 1):
+            a = j * nx + i
+            triangles.extend([[a, a + 1, a + nx], [a + 1, a + nx + 1, a + nx]])
+    return utils.generate_thalassa_ds(
+        nodes=range(nx * ny),
+        triface_nodes=np.array(triangles),
+        lons=lon.ravel(),
+        lats=lat.ravel(),
+        **kwargs,
+    )
+
+
+def test_remapper_is_exact_for_linear_fields():
+    source = _get_square(np.linspace(0, 4, 5), np.linspace(0, 4, 5))
+    source["linear"] = (("node",), source.lon.values + 2 * source.lat.values)
+    target = _get_square(np.linspace(0.5, 3.5, 7), np.linspace(0.5, 3.5, 4))
+    remapped = remap.Remapper(source, target).remap(source)
+    assert remapped.linear.dims == ("node",)
+    np.testing.assert_allclose(remapped.linear.values, target.lon.values + 2 * target.lat.values)
+
+
+def test_remapper_nearest_fallback_and_time():
+    time_range = pd.date_range("2001-01-01", periods=5, freq="h")
+    source = _get_square(np.linspace(0, 1, 2), np.linspace(0, 1, 2), time_range=time_range)
+    source["zeta"] = (("time", "node"), np.arange(20, dtype=float).reshape(5, 4))
+    target = _get_square(np.linspace(0, 3, 2), np.linspace(0, 1, 2))
+    remapper = remap.Remapper(source, target, time_chunk_size=2)
+    assert remapper.outside.tolist() == [False, True, False, True]
+    remapped = remapper.remap(source, ["zeta"])
+    assert remapped.zeta.dims == ("time", "node")
+    # The nodes outside of the source mesh use their nearest source node
+    np.testing.assert_allclose(remapped.zeta.values, source.zeta.values[:, [0, 1, 2, 3]])
+    assert (remapped.time == source.time).all()
+
+
+def test_remap_weights_are_cached():
+    source = _get_square(np.linspace(0, 1, 2), np.linspace(0, 1, 2))
+    target = _get_square(np.linspace(0, 1, 3), np.linspace(0, 1, 3))
+    weights, _ = remap.get_weights(source, target)
+    assert remap.get_weights(source.copy(deep=True), target)[0] is weights
+    np.testing.assert_allclose(weights.sum(axis=1), 1)
+    with pytest.raises(ValueError, match="source mesh"):
+        remap.Remapper(source, target).remap(target)
+
+
+def test_remap_weights_cache_is_bounded():
+    target = _get_square(np.linspace(0, 1, 3), np.linspace(0, 1, 3))
+    for size in range(2, remap.WEIGHTS_CACHE_SIZE + 4):
+        remap.get_weights(_get_square(np.linspace(0, 1, size), np.linspace(0, 1, 2)), target)
+    assert len(remap._weights) == remap.WEIGHTS_CACHE_SIZE
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from . import DATA_DIR
+from thalassa import api
+from thalassa import reordering
+
+SELAFIN = DATA_DIR / "iceland.slf"
+
+
+def test_hilbert_index_2x2():
+    # The first order Hilbert curve visits the quadrants in a "U" shape
+    x = [0, 0, 1, 1]
+    y = [0, 1, 1, 0]
+    assert reordering.hilbert_index(x, y, bits=1).tolist() == [0, 1, 2, 3]
+
+
+def test_morton_index_2x2():
+    x = [0, 1, 0, 1]
+    y = [0, 0, 1, 1]
+    assert reordering.morton_index(x, y, bits=1).tolist() == [0, 1, 2, 3]
+
+
+def test_hilbert_index_is_a_permutation():
+    x, y = np.meshgrid(np.arange(8), np.arange(8))
+    index = reordering.hilbert_index(x.ravel(), y.ravel(), bits=3)
+    assert sorted(index.tolist()) == list(range(64))
+
+
+def test_reorder_unknown_method():
+    ds = api.open_dataset(SELAFIN)
+    with pytest.raises(ValueError):
+        reordering.reorder(ds, method="peano")
+
+
+@pytest.mark.parametrize("method", ["hilbert", "morton"])
+def test_reorder(method):
+    ds = api.open_dataset(SELAFIN)
+    reordered = reordering.reorder(ds, method=method)
+    # The geometry of the triangles must remain the same
+    original_lons = np.sort(ds.lon.values[ds.triface_nodes.values], axis=1)
+    reordered_lons = np.sort(reordered.lon.values[reordered.triface_nodes.values], axis=1)
+    original_triface = reordered[reordering.ORIGINAL_TRIFACE].values
+    assert np.array_equal(original_lons[original_triface], reordered_lons)
+    assert np.array_equal(ds.S.values[:, reordered[reordering.ORIGINAL_NODE].values], reordered.S.values)
+    assert np.array_equal(
+        reordered.face_nodes.values[reordered.triface_face.values],
+        reordered.triface_nodes.values,
+    )
+
+
+def test_restore_original_order():
+    ds = api.open_dataset(SELAFIN)
+    restored = reordering.restore_original_order(reordering.reorder(ds))
+    xr.testing.assert_equal(ds, restored)
+
+
+def test_write_reordered(tmp_path):
+    ds = api.open_dataset(SELAFIN)
+    path = tmp_path / "reordered.zarr"
+    reordering.write_reordered(ds, path, node_chunk_size=1000, time_chunk_size=2)
+    stored = xr.open_zarr(path)
+    assert stored.S.chunks[1][0] == 1000
+    assert stored.S.chunks[0][0] == min(2, ds.sizes["time"])
+    assert np.array_equal(
+        stored[reordering.ORIGINAL_NODE].values[:10], reordering.reorder(ds).original_node[:10]
+    )
@@ -128,8 +128,10 @@ def test_drop_elements_crossing_idl_no_elements_crossing_no_elements_dropped():
         lons=[10, 11, 12, 13],
         lats=[11, 10, 12, 11],
     )
-    ds = utils.drop_elements_crossing_idl(orig_ds)
-    assert orig_ds.equals(ds)
+    for split in (False, True):
+        ds = utils.drop_elements_crossing_idl(orig_ds, split=split)
+        assert orig_ds.equals(ds)
+        assert ds is not orig_ds
 
 
 def test_generate_mesh_polygon():
@@ -141,3 +143,166 @@ def test_generate_mesh_polygon():
     )
     gdf = utils.generate_mesh_polygon(ds)
     assert gdf.geometry[0].area == 4
+
+
+@pytest.mark.parametrize(
+    "face_nodes,fill_value",
+    [
+        pytest.param(np.array([[0, 1, 2, np.nan], [1, 3, 4, 2]]), None, id="nan"),
+        pytest.param(np.array([[0, 1, 2, -1], [1, 3, 4, 2]]), None, id="negative integer"),
+        pytest.param(np.array([[0, 1, 2, -99999], [1, 3, 4, 2]]), -99999, id="integer fill value"),
+    ],
+)
+def test_triangulate_quads(face_nodes, fill_value):
+    triface_nodes, triface_face = utils.triangulate(face_nodes, fill_value=fill_value)
+    assert triface_nodes.dtype == np.int32
+    assert triface_face.dtype == np.int32
+    assert np.array_equal(triface_nodes, [[0, 1, 2], [1, 3, 4], [1, 4, 2]])
+    assert np.array_equal(triface_face, [0, 1, 1])
+
+
+def test_triangulate_polygons():
+    face_nodes = np.array([[0, 1, 2, 3, 4], [2, 5, 6, -1, -1], [6, 7, 8, 9, -1]])
+    triface_nodes, triface_face = utils.triangulate(face_nodes)
+    expected = [[0, 1, 2], [0, 2, 3], [0, 3, 4], [2, 5, 6], [6, 7, 8], [6, 8, 9]]
+    assert np.array_equal(triface_nodes, expected)
+    assert np.array_equal(triface_face, [0, 0, 0, 1, 2, 2])
+
+
+def test_triangulate_triangles():
+    face_nodes = np.array([[0, 1, 2], [1, 2, 3]], dtype=np.int64)
+    triface_nodes, triface_face = utils.triangulate(face_nodes)
+    assert triface_nodes.dtype == np.int32
+    assert np.array_equal(triface_nodes, face_nodes)
+    assert np.array_equal(triface_face, [0, 1])
+
+
+def test_split_quads():
+    face_nodes = np.array([[0, 1, 2, 3], [1, 3, 4, np.nan]])
+    assert np.array_equal(utils.split_quads(face_nodes), [[0, 1, 2], [0, 2, 3], [1, 3, 4]])
+
+
+def test_get_decimated_indices_keeps_the_peaks():
+    x = pd.date_range("2001-01-01", periods=10_000, freq="min").values
+    y = np.sin(np.arange(10_000) / 100)
+    y[1234] = 10
+    y[5678] = -10
+    y[20] = np.nan
+    indices = utils.get_decimated_indices(x, y, no_bins=50)
+    assert len(indices) <= 4 * 50
+    assert np.all(np.diff(indices) > 0)
+    assert {0, 1234, 5678, 9999} <= set(indices)
+
+
+def test_get_decimated_indices_x_range():
+    x = np.arange(10_000)
+    y = np.zeros(10_000)
+    indices = utils.get_decimated_indices(x, y, no_bins=50, x_range=(100, 199))
+    # Few enough points; they are all kept, plus a neighbour on each side
+    assert np.array_equal(indices, np.arange(99, 201))
+    indices = utils.get_decimated_indices(x, y, no_bins=50, x_range=(None, None))
+    assert len(indices) <= 4 * 50
+
+
+def test_locate_points():
+    ds = utils.generate_thalassa_ds(
+        nodes=range(4),
+        triface_nodes=np.array([[0, 1, 2], [1, 3, 2]]),
+        lons=np.array([0.0, 1.0, 0.0, 1.0]),
+        lats=np.array([0.0, 0.0, 1.0, 1.0]),
+    )
+    triangles, weights = utils.locate_points(ds, lon=[0.25, 0.75, 5.0], lat=[0.25, 0.75, 5.0])
+    assert np.array_equal(triangles, [0, 1, -1])
+    np.testing.assert_allclose(weights[0], [0.5, 0.25, 0.25])
+    np.testing.assert_allclose(weights[:2].sum(axis=1), 1)
+    assert np.isnan(weights[2]).all()
+    # Interpolating a linear field is exact
+    values = ds.lon.values + 2 * ds.lat.values
+    interpolated = (weights * values[ds.triface_nodes.values[triangles]]).sum(axis=1)
+    np.testing.assert_allclose(interpolated[:2], [0.75, 2.25])
+
+
+def test_locate_points_skewed_mesh():
+    # A strip of small triangles below y=0 and a long sliver above it,
+    # whose centroid is far from the points it contains
+    lons = np.r_[np.arange(9) * 0.5, np.arange(9) * 0.5, 100.0, 0.0]
+    lats = np.r_[np.zeros(9), np.full(9, -0.5), 0.0, 1.0]
+    strip = [[i, i + 9, i + 1] for i in range(8)] + [[i + 1, i + 9, i + 10] for i in range(8)]
+    ds = utils.generate_thalassa_ds(
+        nodes=range(20),
+        triface_nodes=np.array(strip + [[0, 18, 19]]),
+        lons=lons,
+        lats=lats,
+    )
+    triangles, weights = utils.locate_points(ds, lon=[0.5, 1.2, 50.0], lat=[0.1, -0.2, 5.0])
+    assert triangles.tolist() == [16, 2, -1]
+    values = ds.lon.values + 2 * ds.lat.values
+    interpolated = (weights * values[ds.triface_nodes.values[triangles]]).sum(axis=1)
+    np.testing.assert_allclose(interpolated[:2], [0.7, 0.8])
+    assert np.isnan(weights[2]).all()
+
+
+def test_get_elements_crossing_idl_matches_the_rules():
+    rng = np.random.default_rng(42)
+    lons = rng.uniform(-180, 180, 1000)
+    triface_nodes = rng.integers(0, 1000, (5000, 3))
+    ds = utils.generate_thalassa_ds(
+        nodes=range(1000),
+        triface_nodes=triface_nodes,
+        lons=lons,
+        lats=rng.uniform(-90, 90, 1000),
+    )
+    mask = utils.get_elements_crossing_idl(ds, max_lon=10)
+    a, b, c = lons[triface_nodes].T
+    expected = (
+        ((a * b < 0) & (np.abs(a - b) >= 10))
+        | ((a * c < 0) & (np.abs(a - c) >= 10))
+        | ((b * c < 0) & (np.abs(b - c) >= 10))
+    )
+    assert np.array_equal(mask, expected)
+
+
+def test_drop_elements_crossing_idl_split():
+    orig_ds = utils.generate_thalassa_ds(
+        nodes=range(4),
+        triface_nodes=[[0, 1, 2], [1, 2, 3]],
+        lons=[-178, -179, -179, 179],
+        lats=[11, 10, 12, 11],
+        depth=(("node",), np.array([1.0, 2.0, 3.0, 4.0])),
+    )
+    ds = utils.drop_elements_crossing_idl(orig_ds, split=True)
+    assert len(ds.triface) == 2
+    assert np.array_equal(ds.lon, [-178, -179, -179, 179, 181, 181])
+    assert np.array_equal(ds.depth, [1, 2, 3, 4, 2, 3])
+    assert np.array_equal(ds.triface_nodes, [[0, 1, 2], [4, 5, 3]])
+    assert np.array_equal(ds.node, range(6))
+
+
+def test_drop_elements_crossing_idl_split_ignores_false_positives():
+    # The longitudes have different signs and differ by more than `max_lon`, but the element is near Greenwich
+    orig_ds = utils.generate_thalassa_ds(
+        nodes=range(3),
+        triface_nodes=[[0, 1, 2]],
+        lons=[-5, 6, 0],
+        lats=[10, 12, 11],
+    )
+    assert utils.get_elements_crossing_idl(orig_ds, max_lon=10).tolist() == [True]
+    ds = utils.drop_elements_crossing_idl(orig_ds, max_lon=10, split=True)
+    assert orig_ds.equals(ds)
+    assert len(utils.drop_elements_crossing_idl(orig_ds, max_lon=10).triface) == 0
+
+
+def test_drop_elements_crossing_idl_split_is_lazy():
+    orig_ds = utils.generate_thalassa_ds(
+        nodes=range(4),
+        triface_nodes=[[0, 1, 2], [1, 2, 3]],
+        lons=[-178, -179, -179, 179],
+        lats=[11, 10, 12, 11],
+        time_range=pd.date_range("2001-01-01", periods=2, freq="h"),
+        zeta=(("time", "node"), np.arange(8.0).reshape(2, 4)),
+    ).chunk({"node": 2})
+    ds = utils.drop_elements_crossing_idl(orig_ds, split=True)
+    assert ds.zeta.chunks is not None
+    assert ds.zeta.chunks[1][:2] == (2, 2)
+    assert np.array_equal(ds.zeta.values, [[0, 1, 2, 3, 1, 2], [4, 5, 6, 7, 5, 6]])
+    assert np.array_equal(ds.lon, [-178, -179, -179, 179, 181, 181])
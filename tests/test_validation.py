@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from thalassa import api
+from thalassa import utils
+from thalassa import validation
+
+
+def _get_model_ds(timesteps: int = 48) -> xr.Dataset:
+    lon, lat = np.meshgrid(np.arange(10.0), np.arange(10.0))
+    lon = lon.ravel()
+    lat = lat.ravel()
+    time_range = pd.date_range("2001-01-01", periods=timesteps, freq="h")
+    phase = np.arange(timesteps)[:, None] * 2 * np.pi / 12.42
+    zeta = np.sin(np.radians(10 * lon) + phase) * (1 + lat / 10)
+    ds = utils.generate_thalassa_ds(
+        nodes=np.arange(len(lon)),
+        triface_nodes=np.array([[0, 1, 10]]),
+        lons=lon,
+        lats=lat,
+        time_range=time_range,
+        zeta=(("time", "node"), zeta),
+    )
+    return ds
+
+
+def _get_observations(ds: xr.Dataset, nodes: list[int], noise: float = 0.0) -> xr.Dataset:
+    rng = np.random.default_rng(0)
+    elev_obs = ds.zeta.isel(node=nodes).values.T
+    elev_obs = elev_obs + noise * rng.standard_normal(elev_obs.shape)
+    observations = xr.Dataset(
+        coords=dict(time=ds.time.values),
+        data_vars=dict(
+            # Move the stations slightly, so that they don't coincide with the nodes
+            lon=("station", ds.lon.values[nodes] + 0.1),
+            lat=("station", ds.lat.values[nodes] - 0.1),
+            location=("station", [f"station {node}" for node in nodes]),
+            elev_obs=(("station", "time"), elev_obs),
+        ),
+    )
+    return observations
+
+
+def test_compute_metrics_perfect_match():
+    obs = np.sin(np.linspace(0, 10, 100)).reshape(2, 50)
+    metrics = validation.compute_metrics(obs, obs)
+    assert list(metrics) == validation.SKILL_METRICS
+    np.testing.assert_allclose(metrics["RMSE"], 0)
+    np.testing.assert_allclose(metrics["BIAS or mean error"], 0)
+    np.testing.assert_allclose(metrics["Correlation Coefficient"], 1)
+    np.testing.assert_allclose(metrics["Nash-Sutcliffe Coefficient"], 1)
+    np.testing.assert_allclose(metrics["lambda index"], 1)
+
+
+def test_compute_metrics_matches_per_station_computation():
+    rng = np.random.default_rng(1)
+    obs = rng.standard_normal((5, 40))
+    sim = obs + 0.3 + 0.5 * rng.standard_normal((5, 40))
+    obs[0, :10] = np.nan
+    sim[1, -5:] = np.nan
+    metrics = validation.compute_metrics(sim, obs)
+    for i in range(5):
+        valid = ~np.isnan(obs[i]) & ~np.isnan(sim[i])
+        s, o = sim[i][valid], obs[i][valid]
+        assert metrics["RMSE"][i] == pytest.approx(np.sqrt(np.mean((s - o) ** 2)))
+        assert metrics["Mean Absolute Error"][i] == pytest.approx(np.mean(np.abs(s - o)))
+        assert metrics["BIAS or mean error"][i] == pytest.approx(np.mean(s - o))
+        assert metrics["Standard deviation of residuals"][i] == pytest.approx(np.std(s - o))
+        assert metrics["Correlation Coefficient"][i] == pytest.approx(np.corrcoef(s, o)[0, 1])
+        nse = 1 - np.sum((s - o) ** 2) / np.sum((o - o.mean()) ** 2)
+        assert metrics["Nash-Sutcliffe Coefficient"][i] == pytest.approx(nse)
+
+
+def test_compute_metrics_no_valid_values():
+    metrics = validation.compute_metrics(np.full((1, 3), np.nan), np.ones((1, 3)))
+    assert all(np.isnan(values[0]) for values in metrics.values())
+
+
+def test_get_nearest_nodes():
+    ds = _get_model_ds()
+    nodes, distances = validation.get_nearest_nodes(ds, lon=[0.1, 5.2], lat=[0.1, 3.9])
+    assert nodes.tolist() == [0, 45]
+    assert distances == pytest.approx([np.hypot(0.1, 0.1), np.hypot(0.2, 0.1)])
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 100])
+def test_compute_skill(batch_size):
+    ds = _get_model_ds()
+    nodes = [5, 42, 42, 99]
+    observations = _get_observations(ds, nodes)
+    stations = validation.compute_skill(ds, observations, batch_size=batch_size, max_workers=2)
+    assert stations.sizes["node"] == len(nodes)
+    assert stations.model_node.values.tolist() == nodes
+    assert stations.location.values.tolist() == [f"station {node}" for node in nodes]
+    np.testing.assert_allclose(stations.elev_sim.values, ds.zeta.isel(node=nodes).values.T)
+    np.testing.assert_allclose(stations["RMSE"], 0, atol=1e-12)
+    np.testing.assert_allclose(stations["Correlation Coefficient"], 1)
+
+
+def test_compute_skill_interpolates_in_time():
+    ds = _get_model_ds()
+    observations = _get_observations(ds, [5, 42], noise=0.1)
+    # Observations every 30 minutes; the last ones are outside of the simulated period
+    obs_times = pd.date_range(ds.time.values[0], periods=2 * ds.sizes["time"] + 4, freq="30min")
+    observations = observations.interp(time=obs_times)
+    stations = validation.compute_skill(ds, observations.fillna(1.0))
+    expected = validation.compute_metrics(
+        ds.zeta.isel(node=[5, 42]).interp(time=obs_times).values.T,
+        observations.elev_obs.values,
+    )
+    for name, values in expected.items():
+        np.testing.assert_allclose(stations[name], values)
+
+
+def test_interp_in_time_single_timestep():
+    times = pd.date_range("2001-01-01", periods=3, freq="h").values
+    values = np.array([[1.0], [2.0]])
+    result = validation._interp_in_time(values, times[1:2], times)
+    np.testing.assert_array_equal(result, [[np.nan, 1.0, np.nan], [np.nan, 2.0, np.nan]])
+    result = validation._interp_in_time(values[:, :0], times[:0], times)
+    assert result.shape == (2, 3)
+    assert np.isnan(result).all()
+
+
+def test_compute_skill_single_timestep():
+    ds = _get_model_ds(timesteps=1)
+    observations = _get_observations(ds, [5, 42])
+    stations = validation.compute_skill(ds, observations)
+    np.testing.assert_allclose(stations.elev_sim.values, ds.zeta.isel(node=[5, 42]).values.T)
+
+
+def test_compute_skill_output_is_compatible_with_station_api():
+    ds = _get_model_ds()
+    stations = validation.compute_skill(ds, _get_observations(ds, [5, 42]).drop_vars("location"))
+    assert stations.location.values.tolist() == ["0", "1"]
+    pins = api.get_station_pins(stations)
+    assert len(pins) == 2
+    df = stations.isel(node=[0])[api._STATION_VARIABLES].to_dataframe().T
+    assert df.shape == (len(api._STATION_VARIABLES), 1)
+
+
+def test_compute_skill_wrong_dims():
+    ds = _get_model_ds()
+    ds["zeta"] = ds.zeta.T
+    with pytest.raises(ValueError):
+        validation.compute_skill(ds, _get_observations(ds, [5]))
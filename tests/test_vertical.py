@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from thalassa import utils
+from thalassa import vertical
+
+
+def _get_3d_ds():
+    # Node 0 has 3 valid layers, node 1 only the top 2 and node 2 is dry
+    zcor = np.array(
+        [
+            [-10.0, -5.0, 0.0],
+            [-99999.0, -4.0, 0.0],
+            [-99999.0, -99999.0, -99999.0],
+        ],
+    )
+    temp = np.array(
+        [
+            [10.0, 15.0, 20.0],
+            [-99999.0, 14.0, 18.0],
+            [-99999.0, -99999.0, -99999.0],
+        ],
+    )
+    ds = utils.generate_thalassa_ds(
+        nodes=range(3),
+        triface_nodes=np.array([[0, 1, 2]]),
+        lons=np.array([0.0, 1.0, 0.0]),
+        lats=np.array([0.0, 0.0, 1.0]),
+        time_range=pd.date_range("2001-01-01", periods=2, freq="h"),
+        zcor=(("time", "node", "layer"), np.stack([zcor, zcor])),
+        temp=(("time", "node", "layer"), np.stack([temp, np.where(temp == -99999, temp, temp + 1)])),
+        elev=(("time", "node"), np.zeros((2, 3))),
+    )
+    return ds
+
+
+def test_select_surface_and_bottom():
+    ds = _get_3d_ds()
+    surface = vertical.select_surface(ds, "temp")
+    bottom = vertical.select_bottom(ds, "temp")
+    assert surface.temp.dims == ("time", "node")
+    assert "zcor" not in surface
+    assert "elev" in surface
+    np.testing.assert_array_equal(surface.temp.values, [[20, 18, np.nan], [21, 19, np.nan]])
+    np.testing.assert_array_equal(bottom.temp.values, [[10, 14, np.nan], [11, 15, np.nan]])
+
+
+def test_select_surface_is_lazy():
+    ds = _get_3d_ds()
+    surface = vertical.select_surface(ds, "temp", chunks={"time": 1})
+    assert surface.temp.chunks == ((1, 1), (3,))
+    eager = vertical.select_surface(ds, "temp", chunks=None)
+    assert eager.temp.chunks is None
+    np.testing.assert_array_equal(surface.temp.values, eager.temp.values)
+
+
+def test_interpolate_to_depth():
+    ds = _get_3d_ds()
+    result = vertical.interpolate_to_depth(ds, "temp", depth=2.5, chunks=None)
+    np.testing.assert_allclose(result.temp.values[0], [17.5, 15.5, np.nan])
+    # Node 1 is only 4 meters deep
+    result = vertical.interpolate_to_depth(ds, "temp", depth=7.5, chunks=None)
+    np.testing.assert_allclose(result.temp.values[0], [12.5, np.nan, np.nan])
+    assert result.temp.attrs["depth"] == 7.5
+
+
+def test_interpolate_to_depth_from_surface():
+    ds = _get_3d_ds()
+    ds["zcor"] = ds.zcor.where(ds.zcor == -99999, ds.zcor + 1)
+    result = vertical.interpolate_to_depth(ds, "temp", depth=2.5, from_surface=True, chunks=None)
+    np.testing.assert_allclose(result.temp.values[0], [17.5, 15.5, np.nan])
+
+
+def test_depth_average():
+    ds = _get_3d_ds()
+    result = vertical.depth_average(ds, "temp")
+    np.testing.assert_allclose(result.temp.values[0], [15, 16, np.nan])
+    np.testing.assert_allclose(result.temp.values[1], [16, 17, np.nan])
+
+
+def test_vertical_requires_layer():
+    ds = _get_3d_ds()
+    with pytest.raises(ValueError, match="layer"):
+        vertical.select_surface(ds, "elev")
+
+
+def test_get_transect():
+    ds = _get_3d_ds()
+    # Make node 2 wet
+    ds.zcor[:, 2] = [-10.0, -5.0, 0.0]
+    ds.temp[:, 2] = [12.0, 16.0, 22.0]
+    section = vertical.get_transect(
+        ds, "temp", lons=[0.1, 0.8], lats=[0.1, 0.1], no_points=5, depths=[0, 2.5]
+    )
+    assert section.dims == ("time", "depth", "distance")
+    assert section.shape == (2, 2, 5)
+    assert section.distance[0] == 0
+    np.testing.assert_allclose(section.lon, np.linspace(0.1, 0.8, 5))
+    assert np.isfinite(section.values).all()
+    # Halfway between nodes 0 and 1
+    single = vertical.get_transect(ds.isel(time=0), "temp", lons=[0.5, 0.5], lats=[0.0, 0.5], no_points=2)
+    assert single.dims == ("depth", "distance")
+    assert single.depth[0] == 0
+    assert single.depth[-1] == 4.5
+    np.testing.assert_allclose(single.sel(depth=2.5, method="nearest")[0], 16.5, rtol=0.05)
+
+
+def test_get_transect_outside_of_the_mesh():
+    ds = _get_3d_ds()
+    with pytest.raises(ValueError, match="does not intersect"):
+        vertical.get_transect(ds, "temp", lons=[5, 6], lats=[5, 6])
@@ -7,11 +7,13 @@ Thalassa is a library for visualizing unstructured mesh data with a focus on lar
 import importlib.metadata
 
 from .api import open_dataset
+from .api import warmup
 from .normalization import normalize
 from .plotting import plot
 from .plotting import plot_mesh
 from .plotting import plot_nodes
 from .plotting import plot_ts
+from .registry import share_mesh
 from .utils import crop
 
 
@@ -26,4 +28,6 @@ __all__: list[str] = [
     "plot_nodes",
     "plot_mesh",
     "plot_ts",
+    "share_mesh",
+    "warmup",
 ]
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import collections
+import concurrent.futures
+import logging
+import os
+import threading
+import typing as T
+
+from . import instrumentation
+from . import planning
+from . import registry
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import numpy
+    import numpy.typing as npt
+    import xarray
+
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS = 6_371_000.0
+
+AREAS_CACHE_SIZE = 4
+
+
+class _Areas(T.NamedTuple):
+    # The mesh arrays are kept alive, so that their ids can not be reused while the entry is cached
+    mesh: tuple[npt.NDArray[T.Any], ...]
+    element_areas: npt.NDArray[numpy.float64]
+    node_areas: npt.NDArray[numpy.float64]
+
+
+_areas: collections.OrderedDict[tuple[int, ...], _Areas] = collections.OrderedDict()
+_areas_lock = threading.Lock()
+
+
+def _compute_element_areas(
+    lon: npt.NDArray[numpy.floating],
+    lat: npt.NDArray[numpy.floating],
+    triface_nodes: npt.NDArray[numpy.integer],
+) -> npt.NDArray[numpy.float64]:
+    import numpy as np
+
+    lon = np.radians(lon[triface_nodes].astype(np.float64))
+    lat = np.radians(lat[triface_nodes].astype(np.float64))
+    # Use a local equirectangular projection around each element.
+    # The elements that cross the IDL are unwrapped, so that they don't span the whole globe.
+    dlon = (lon[:, 1:] - lon[:, :1] + np.pi) % (2 * np.pi) - np.pi
+    dlat = lat[:, 1:] - lat[:, :1]
+    dx = EARTH_RADIUS * dlon * np.cos(lat.mean(axis=1))[:, None]
+    dy = EARTH_RADIUS * dlat
+    return T.cast("npt.NDArray[numpy.float64]", np.abs(dx[:, 0] * dy[:, 1] - dx[:, 1] * dy[:, 0]) / 2)
+
+
+def get_areas(ds: xarray.Dataset) -> tuple[npt.NDArray[numpy.float64], npt.NDArray[numpy.float64]]:
+    """
+    Return the areas of the triangles and of the nodes of the mesh in square meters.
+
+    The area of a node is one third of the area of the triangles it belongs to, so the sum
+    of the node areas equals the area of the mesh. The areas of the last `AREAS_CACHE_SIZE` meshes
+    are cached per identity of the mesh arrays, so they are only computed once for all the datasets
+    that share the same arrays, e.g. shallow copies or datasets returned by `share_mesh()`.
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema".
+    """
+    import numpy as np
+
+    mesh = tuple(ds[name].values for name in registry.MESH_VARIABLES)
+    key = tuple(id(array) for array in mesh)
+    with _areas_lock:
+        if key in _areas:
+            _areas.move_to_end(key)
+            return _areas[key].element_areas, _areas[key].node_areas
+    lon, lat, triface_nodes = mesh
+    element_areas = _compute_element_areas(lon, lat, triface_nodes)
+    # With weights, bincount() returns floats
+    node_areas = T.cast(
+        "npt.NDArray[numpy.float64]",
+        np.bincount(
+            triface_nodes.ravel(),
+            weights=np.repeat(element_areas / 3, 3),
+            minlength=ds.sizes["node"],
+        ),
+    )
+    with _areas_lock:
+        _areas[key] = _Areas(mesh, element_areas, node_areas)
+        while len(_areas) > AREAS_CACHE_SIZE:
+            _areas.popitem(last=False)
+    return element_areas, node_areas
+
+
+def _get_timestep_durations(times: npt.NDArray[numpy.datetime64]) -> npt.NDArray[numpy.float64]:
+    """Return the duration (in hours) that each timestep represents, i.e. the time until the next one."""
+    import numpy as np
+
+    hours = (times - times[0]) / np.timedelta64(1, "h")
+    if len(hours) < 2:
+        return np.zeros(len(hours))
+    durations = np.diff(hours)
+    return T.cast("npt.NDArray[numpy.float64]", np.append(durations, durations[-1]))
+
+
+class _BlockResult(T.NamedTuple):
+    first_exceedance: npt.NDArray[numpy.float64]
+    duration: npt.NDArray[numpy.float64]
+    maximum: npt.NDArray[numpy.float64]
+    flooded_area: npt.NDArray[numpy.float64]
+
+
+def _process_block(
+    data: xarray.DataArray,
+    block: slice,
+    threshold: float,
+    hours: npt.NDArray[numpy.float64],
+    durations: npt.NDArray[numpy.float64],
+    node_areas: npt.NDArray[numpy.float64],
+    time_chunk_size: int,
+) -> _BlockResult:
+    import numpy as np
+
+    size = block.stop - block.start
+    first_exceedance = np.full(size, np.nan)
+    duration = np.zeros(size)
+    maximum = np.full(size, -np.inf)
+    flooded_area = np.zeros(len(hours))
+    has_values = np.zeros(size, dtype=bool)
+    areas = node_areas[block]
+    with instrumentation.span("exceedance.block", nodes=size) as span:
+        for start in range(0, len(hours), time_chunk_size):
+            chunk = slice(start, min(start + time_chunk_size, len(hours)))
+            values = data.isel(time=chunk, node=block).values
+            span.record_bytes(values.nbytes)
+            valid = ~np.isnan(values)
+            with np.errstate(invalid="ignore"):
+                exceeds = values > threshold
+            # The first exceedance is only set once per node
+            new = np.isnan(first_exceedance) & exceeds.any(axis=0)
+            first_exceedance[new] = hours[chunk][exceeds[:, new].argmax(axis=0)]
+            duration += durations[chunk] @ exceeds
+            maximum = np.fmax(maximum, np.where(valid, values, -np.inf).max(axis=0))
+            has_values |= valid.any(axis=0)
+            flooded_area[chunk] = exceeds @ areas
+    maximum[~has_values] = np.nan
+    return _BlockResult(first_exceedance, duration, maximum, flooded_area)
+
+
+def compute_exceedance(
+    ds: xarray.Dataset,
+    variable: str = "zeta",
+    threshold: float = 0.0,
+    *,
+    time_chunk_size: int = 24,
+    node_block_size: int = 100_000,
+    max_workers: int | None = None,
+    memory_budget: planning.Budget = None,
+) -> xarray.Dataset:
+    """
+    Compute per-node exceedance statistics and the flooded area over time.
+
+    The data are processed in a single pass over time, `time_chunk_size` timesteps at a time,
+    so the whole ``("time", "node")`` array is never loaded in memory.
+    The nodes are split into blocks of `node_block_size` nodes which are processed in parallel.
+    If the blocks that are processed concurrently do not fit in the `memory_budget`, then
+    `time_chunk_size` gets reduced and, if even a single timestep per block does not fit,
+    fewer blocks are processed concurrently.
+
+    A node "exceeds" the threshold on a timestep if its value is greater than `threshold`.
+    Each timestep is assumed to last until the next one.
+
+    Examples:
+        ``` python
+        import thalassa
+        from thalassa import analytics
+
+        ds = thalassa.open_dataset("some_netcdf.nc")
+        exceedance = analytics.compute_exceedance(ds, variable="zeta", threshold=1.5)
+        thalassa.plot(exceedance, variable="exceedance_duration")
+        ```
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema". `variable` must have
+            dimensions ``("time", "node")``.
+        variable: The variable whose values are compared to the threshold.
+        threshold: The threshold.
+        time_chunk_size: The number of timesteps that are loaded at once.
+        node_block_size: The number of nodes per parallel block.
+        max_workers: The maximum number of threads. Defaults to the ``concurrent.futures`` default.
+        memory_budget: The memory budget. Check `thalassa.planning`.
+
+    Returns:
+        A dataset with the mesh of `ds` and the following variables:
+
+        - ``first_exceedance`` (node): hours since the first timestep until the first exceedance
+          (``NaN`` if the node never exceeds the threshold).
+        - ``exceedance_duration`` (node): The total duration of the exceedance in hours.
+        - ``<variable>_max`` (node): The maximum value of `variable`.
+        - ``flooded_area`` (time): The total area of the nodes that exceed the threshold in m².
+    """
+    import numpy as np
+    import xarray as xr
+
+    data = ds[variable]
+    if data.dims != ("time", "node"):
+        raise ValueError(f"The dimensions of '{variable}' must be ('time', 'node'), not: {data.dims}")
+    times = ds.time.values
+    hours = (times - times[0]) / np.timedelta64(1, "h")
+    durations = _get_timestep_durations(times)
+    _, node_areas = get_areas(ds)
+    no_nodes = ds.sizes["node"]
+    blocks = [slice(i, min(i + node_block_size, no_nodes)) for i in range(0, no_nodes, node_block_size)]
+    # The default of `ThreadPoolExecutor`
+    no_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    # Each timestep of a block needs the values, their masked copy and the boolean masks
+    chunking = planning.limit_chunk_size(
+        time_chunk_size,
+        item_nbytes=min(node_block_size, no_nodes) * 8 * 3,
+        budget=memory_budget,
+        parallelism=max(min(len(blocks), no_workers), 1),
+    )
+    time_chunk_size = chunking.size
+    with concurrent.futures.ThreadPoolExecutor(max_workers=chunking.parallelism) as executor:
+        results = list(
+            executor.map(
+                lambda block: _process_block(
+                    data=data,
+                    block=block,
+                    threshold=threshold,
+                    hours=hours,
+                    durations=durations,
+                    node_areas=node_areas,
+                    time_chunk_size=time_chunk_size,
+                ),
+                blocks,
+            ),
+        )
+    result: xarray.Dataset = ds[["lon", "lat", "triface_nodes"]].copy()
+    start = np.datetime_as_string(times[0], unit="s") if len(times) else ""
+    result["first_exceedance"] = (
+        ("node",),
+        np.concatenate([r.first_exceedance for r in results]),
+        dict(units=f"hours since {start}", threshold=threshold),
+    )
+    result["exceedance_duration"] = (
+        ("node",),
+        np.concatenate([r.duration for r in results]),
+        dict(units="hours", threshold=threshold),
+    )
+    result[f"{variable}_max"] = (("node",), np.concatenate([r.maximum for r in results]), data.attrs)
+    result["flooded_area"] = xr.DataArray(
+        np.sum([r.flooded_area for r in results], axis=0),
+        dims=("time",),
+        coords=dict(time=times),
+        attrs=dict(units="m2", threshold=threshold),
+    )
+    return result
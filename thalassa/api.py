@@ -1,14 +1,22 @@
 from __future__ import annotations
 
+import concurrent.futures
 import functools
 import logging
-import operator
 import os
+import threading
 import typing as T
 import warnings
+import weakref
 
+from . import instrumentation
+from . import masking
 from . import normalization
+from . import planning
+from . import prefetch
+from . import registry
 from . import utils
+from . import validation
 
 # from holoviews import opts as hvopts
 
@@ -16,9 +24,14 @@ if T.TYPE_CHECKING:  # pragma: no cover
     import bokeh.models
     import geoviews
     import holoviews
+    import numpy
+    import numpy.typing as npt
+    import pandas
     import pyproj
+    import scipy.spatial
     import xarray
     from holoviews.streams import Stream
+    from . import follow as follow_module
     from bokeh.models.formatters import DatetimeTickFormatter
 
 logger = logging.getLogger(__name__)
@@ -58,15 +71,47 @@ def _resolve_ranges(
 ADCIRC_VARIABLES_TO_BE_DROPPED = ["neta", "nvel", "max_nvdll", "max_nvell"]
 
 
+@T.overload
+def open_dataset(
+    path: str | os.PathLike[str],
+    normalize: bool = ...,
+    compact: bool = ...,
+    share_mesh: bool = ...,
+    follow: T.Literal[False] = ...,
+    memory_budget: planning.Budget = ...,
+    **kwargs: dict[str, T.Any],
+) -> xarray.Dataset: ...
+
+
+@T.overload
+def open_dataset(
+    path: str | os.PathLike[str],
+    normalize: bool = ...,
+    compact: bool = ...,
+    share_mesh: bool = ...,
+    *,
+    follow: T.Literal[True],
+    memory_budget: planning.Budget = ...,
+    **kwargs: dict[str, T.Any],
+) -> follow_module.DatasetFollower: ...
+
+
+@instrumentation.instrumented("open_dataset")
 def open_dataset(
     path: str | os.PathLike[str],
     normalize: bool = True,
+    compact: bool = False,
+    share_mesh: bool = False,
+    follow: bool = False,
+    memory_budget: planning.Budget = None,
     **kwargs: dict[str, T.Any],
-) -> xarray.Dataset:
+) -> xarray.Dataset | follow_module.DatasetFollower:
     """
     Open the file specified at ``path`` using ``xarray`` and return an ``xarray.Dataset``.
 
     If `normalize` is `True` then convert the dataset to the "Thalassa schema", too.
+    If `follow` is `True`, then return a `thalassa.follow.DatasetFollower` instead, which keeps the dataset
+    (available as its `ds` attribute) in sync with a file that is still being written by a running simulation.
     Additional `kwargs` are passed on to `xarray.open_dataset()`.
 
     !!! note
@@ -88,9 +133,50 @@ def open_dataset(
         path: The path to the dataset file (netCDF, zarr, grib)
         normalize: Boolean flag indicating whether the dataset should be converted/normalized to the "Thalassa schema".
             Normalization is currently only supported for ``SCHISM``, ``TELEMAC``,  and ``ADCIRC`` netcdf files.
+        compact: Boolean flag indicating whether the normalized dataset should use `int32` connectivity
+            tables and `float32` coordinates. Only used if `normalize` is `True`. Check
+            `thalassa.normalization.compact_dataset()` for downcasting data variables, too.
+        share_mesh: Boolean flag indicating whether the geometry of the mesh should be stored in
+            (and attached from) the shared mesh registry. Check `thalassa.share_mesh()` for more info.
+            Only used if `normalize` is `True`.
+        follow: Boolean flag indicating whether the file should be followed for new timesteps.
+        memory_budget: The memory budget, e.g. ``"4GB"``. If the mesh does not fit, then the compact
+            dtypes are used; if the data do not fit, then they are chunked along ``time`` (unless
+            ``chunks`` is passed explicitly). Check `thalassa.planning` for the default.
         kwargs: The ``kwargs`` are being passed through to ``xarray.open_dataset``.
 
     """
+    if follow:
+        from .follow import DatasetFollower
+
+        return DatasetFollower(
+            path,
+            normalize=normalize,
+            compact=compact,
+            share_mesh=share_mesh,
+            memory_budget=memory_budget,
+            **kwargs,
+        )
+    ds, _ = _open_dataset(
+        path,
+        normalize=normalize,
+        compact=compact,
+        share_mesh=share_mesh,
+        memory_budget=memory_budget,
+        **kwargs,
+    )
+    return ds
+
+
+def _open_dataset(
+    path: str | os.PathLike[str],
+    normalize: bool = True,
+    compact: bool = False,
+    share_mesh: bool = False,
+    memory_budget: planning.Budget = None,
+    **kwargs: T.Any,
+) -> tuple[xarray.Dataset, planning.Plan]:
+    """Return the dataset and the plan that was used to open it; check `open_dataset()`."""
     import xarray as xr
 
     default_kwargs: dict[str, T.Any] = dict(
@@ -100,9 +186,14 @@ def open_dataset(
     )
     with warnings.catch_warnings(record=True):
         ds = xr.open_dataset(path, **(default_kwargs | kwargs))
+    plan = planning.plan_dataset(ds, compact=compact, budget=memory_budget, normalize=normalize)
+    if plan.chunks and "chunks" not in kwargs:
+        ds = ds.chunk(plan.chunks)
     if normalize:
-        ds = normalization.normalize(ds)
-    return ds
+        ds = normalization.normalize(ds, compact=plan.compact)
+        if share_mesh:
+            ds = registry.share_mesh(ds)
+    return ds, plan
 
 
 def get_dtf() -> DatetimeTickFormatter:
@@ -117,9 +208,22 @@ def get_dtf() -> DatetimeTickFormatter:
     return dtf
 
 
+def _estimate_trimesh_nbytes(ds: xarray.Dataset, variable: str = "") -> int:
+    """Return the (approximate) memory that `create_trimesh()` and its rasterization need."""
+    no_columns = 3 if variable else 2
+    # The dataframe of the nodes (plus its index) and the projected coordinates
+    nodes_nbytes = ds.sizes["node"] * (no_columns + 1 + 2) * 8
+    # The mesh that datashader precomputes, i.e. the columns for each vertex of each triangle
+    mesh_nbytes = ds.sizes["triface"] * 3 * no_columns * 8
+    return int(nodes_nbytes + mesh_nbytes + ds.triface_nodes.nbytes)
+
+
+@instrumentation.instrumented("create_trimesh")
 def create_trimesh(
     ds_or_trimesh: geoviews.TriMesh | xarray.Dataset,
     variable: str = "",
+    mask: bool = False,
+    memory_budget: planning.Budget = None,
 ) -> geoviews.TriMesh:
     """
     Create a ``geoviews.TriMesh`` object from the provided dataset.
@@ -128,6 +232,15 @@ def create_trimesh(
         ds_or_trimesh: The dataset containing the variable we want to visualize.
             If a trimesh object is passed, then return it immediately.
         variable: The data variable we want to visualize
+        mask: Boolean flag indicating whether the inactive (e.g. dry) nodes should be masked.
+            If ``True``, the fill values of `variable` are replaced with ``NaN`` and the triangles
+            that have inactive nodes are dropped. Check `thalassa.masking.get_active_nodes()` for more info.
+            Defaults to ``False``, i.e. the values are used as they are.
+        memory_budget: The memory budget. Check `thalassa.planning`.
+
+    Raises:
+        MemoryBudgetExceeded: If the trimesh does not fit in the memory budget. Use
+            `thalassa.outofcore` for meshes that are larger than the available memory.
     """
     import geoviews as gv
     from cartopy import crs
@@ -137,16 +250,31 @@ def create_trimesh(
         return ds_or_trimesh
     else:
         ds = ds_or_trimesh
+    planning.check(_estimate_trimesh_nbytes(ds, variable), "Creating the trimesh", memory_budget)
     # create the trimesh object
     # Start by getting a "tabular" dataset (i.e. a pandas dataframe).
     columns = ["lon", "lat"]
     if variable:
         columns.append(variable)
     points_df = ds[columns].to_dataframe()
+    triface_nodes = ds.triface_nodes.data
+    if variable and mask and ds[variable].dims == (normalization.NODE_DIM,):
+        active_nodes = masking.get_active_nodes(ds, variable).values
+        if not active_nodes.all():
+            # Fill values would distort the color range, while the triangles with inactive nodes
+            # produce no pixels; dropping them means less work for datashader
+            points_df[variable] = points_df[variable].where(active_nodes)
+            active_elements = masking.get_active_elements_from_nodes(active_nodes, triface_nodes)
+            triface_nodes = triface_nodes[active_elements]
+            instrumentation.current_span().set_attribute("inactive_elements", int((~active_elements).sum()))
     # Convert the data to Google Mercator. This makes interactive usage faster
     transformer = _get_transformer(from_crs="EPSG:4326", to_crs="EPSG:3857")
     tlon, tlat = transformer.transform(points_df.lon, points_df.lat)
-    points_df = points_df.assign(lon=tlon, lat=tlat)
+    # pyproj always returns float64. Keep the original dtype, e.g. when using a "compact" dataset
+    points_df = points_df.assign(
+        lon=tlon.astype(points_df.lon.dtype, copy=False),
+        lat=tlat.astype(points_df.lat.dtype, copy=False),
+    )
     # Create the geoviews object
     kwargs = dict(data=points_df, kdims=["lon", "lat"], crs=crs.GOOGLE_MERCATOR)
     if variable:
@@ -154,12 +282,25 @@ def create_trimesh(
     points_gv = gv.Points(**kwargs)
     # Create the trimesh
     if variable:
-        trimesh = gv.TriMesh((ds.triface_nodes.data, points_gv), name=variable)
+        trimesh = gv.TriMesh((triface_nodes, points_gv), name=variable)
     else:
-        trimesh = gv.TriMesh((ds.triface_nodes.data, points_gv))
+        trimesh = gv.TriMesh((triface_nodes, points_gv))
     return trimesh
 
 
+@functools.cache
+def _get_rasterize_operation() -> T.Any:
+    """Return a ``rasterize`` operation which records a span each time an element gets rasterized."""
+    import holoviews.operation.datashader as hv_operation_datashader
+
+    class rasterize(hv_operation_datashader.rasterize):  # type: ignore[misc]
+        def _process(self, element: T.Any, key: T.Any = None) -> T.Any:
+            with instrumentation.span("rasterize", element=type(element).__name__):
+                return super()._process(element, key)
+
+    return rasterize
+
+
 def get_tiles(url: str = "http://c.tile.openstreetmap.org/{Z}/{X}/{Y}.png") -> geoviews.Tiles:
     """
     Return a WMTS using the provided `url`.
@@ -202,6 +343,210 @@ def get_nodes(
     return points.opts(tools=tools, size=size, title=title, color="green")
 
 
+# Above this number of visible nodes, the nodes are rasterized instead of being drawn as glyphs
+DEFAULT_MAX_NODE_GLYPHS = 50_000
+
+
+class _NodeIndex:
+    """A spatial index over the (web mercator) coordinates of the nodes of a trimesh."""
+
+    def __init__(self, nodes: pandas.DataFrame) -> None:
+        import numpy as np
+
+        self.df = nodes.rename(columns={"index": "node"})[["lon", "lat", "node"]]
+        self.x = self.df.lon.values
+        self.y = self.df.lat.values
+        # Sorting along x allows selecting the nodes within a range with a binary search
+        self.order = np.argsort(self.x, kind="stable")
+        self.x_sorted = self.x[self.order]
+
+    @functools.cached_property
+    def tree(self) -> scipy.spatial.cKDTree:
+        import numpy as np
+        import scipy.spatial
+
+        return scipy.spatial.cKDTree(np.c_[self.x, self.y])
+
+    def select(
+        self,
+        x_range: tuple[float, float] | None,
+        y_range: tuple[float, float] | None,
+    ) -> npt.NDArray[numpy.intp]:
+        """Return the positions of the nodes which are within the provided ranges."""
+        positions = self.order
+        if x_range:
+            start = self.x_sorted.searchsorted(x_range[0], side="left")
+            stop = self.x_sorted.searchsorted(x_range[1], side="right")
+            positions = positions[start:stop]
+        if y_range:
+            y = self.y[positions]
+            positions = positions[(y >= y_range[0]) & (y <= y_range[1])]
+        return positions
+
+    def nearest(self, x: float, y: float, max_distance: float = float("inf")) -> int | None:
+        """Return the position of the node that is nearest to `(x, y)` or ``None`` if it is too far."""
+        distance, position = self.tree.query([x, y], distance_upper_bound=max_distance)
+        return None if distance == float("inf") else int(position)
+
+
+def _get_padded_range(
+    values: npt.NDArray[numpy.floating[T.Any]], padding: float = 0.01
+) -> tuple[float, float]:
+    # datashader excludes the points that lie on the upper bound of the range
+    vmin, vmax = float(values.min()), float(values.max())
+    pad = (vmax - vmin) * padding or 1.0
+    return vmin - pad, vmax + pad
+
+
+class _NodeView:
+    """The callbacks of the ``DynamicMap`` which is returned by `get_node_view()`."""
+
+    def __init__(
+        self,
+        index: _NodeIndex,
+        x_range: tuple[float, float],
+        y_range: tuple[float, float],
+        max_glyphs: int,
+    ) -> None:
+        self.index = index
+        self.x_range = x_range
+        self.y_range = y_range
+        self.max_glyphs = max_glyphs
+
+    def get_points(self, positions: npt.NDArray[numpy.intp] | T.Sequence[int]) -> geoviews.Points:
+        from cartopy import crs
+        import geoviews as gv
+
+        df = self.index.df.iloc[positions]
+        return gv.Points(df, kdims=["lon", "lat"], vdims=["node"], crs=crs.GOOGLE_MERCATOR)
+
+    def resolve_ranges(
+        self,
+        x_range: tuple[float, float] | None,
+        y_range: tuple[float, float] | None,
+    ) -> tuple[tuple[float, float], tuple[float, float]]:
+        # Before the plot gets laid out, the ranges may be missing or NaN
+        import numpy as np
+
+        if x_range is None or not np.isfinite(x_range).all():
+            x_range = self.x_range
+        if y_range is None or not np.isfinite(y_range).all():
+            y_range = self.y_range
+        return x_range, y_range
+
+    def get_visible(
+        self,
+        x_range: tuple[float, float],
+        y_range: tuple[float, float],
+    ) -> tuple[npt.NDArray[numpy.intp], bool]:
+        """Return the positions of the visible nodes and whether they should be rasterized."""
+        positions = self.index.select(x_range, y_range)
+        return positions, len(positions) > self.max_glyphs
+
+    def rasterize(
+        self,
+        x_range: tuple[float, float] | None,
+        y_range: tuple[float, float] | None,
+        width: int | None,
+        height: int | None,
+        scale: float = 1.0,
+    ) -> holoviews.Image:
+        import datashader as dsh
+        import holoviews as hv
+
+        x_range, y_range = self.resolve_ranges(x_range, y_range)
+        with instrumentation.span("rasterize_nodes"):
+            positions, rasterized = self.get_visible(x_range, y_range)
+            if not rasterized:
+                # The glyphs are being drawn; return an empty (i.e. transparent) image
+                positions = positions[:0]
+            canvas = dsh.Canvas(
+                plot_width=int((width or 400) * scale),
+                plot_height=int((height or 400) * scale),
+                x_range=x_range,
+                y_range=y_range,
+            )
+            agg = canvas.points(self.index.df.iloc[positions], x="lon", y="lat", agg=dsh.count())
+        return hv.Image(agg.where(agg > 0), kdims=["lon", "lat"], vdims=["count"])
+
+    def draw_glyphs(
+        self,
+        x_range: tuple[float, float] | None,
+        y_range: tuple[float, float] | None,
+    ) -> geoviews.Points:
+        positions, rasterized = self.get_visible(*self.resolve_ranges(x_range, y_range))
+        return self.get_points(positions[:0] if rasterized else positions)
+
+    def lookup(
+        self,
+        x: float | None,
+        y: float | None,
+        x_range: tuple[float, float] | None,
+        y_range: tuple[float, float] | None,
+    ) -> geoviews.Points:
+        x_range, y_range = self.resolve_ranges(x_range, y_range)
+        _, rasterized = self.get_visible(x_range, y_range)
+        # When the glyphs are drawn, their own hover tool is being used.
+        if x is None or y is None or not rasterized:
+            return self.get_points([])
+        # Only consider the nodes that are close to the cursor, i.e. within 1% of the visible width
+        position = self.index.nearest(x, y, max_distance=(x_range[1] - x_range[0]) / 100)
+        return self.get_points([] if position is None else [position])
+
+
+def get_node_view(
+    ds_or_trimesh: geoviews.TriMesh | xarray.Dataset,
+    *,
+    x_range: tuple[float, float] | None = None,
+    y_range: tuple[float, float] | None = None,
+    size: float = 4,
+    title: str = "Nodes",
+    hover: bool = True,
+    max_glyphs: int = DEFAULT_MAX_NODE_GLYPHS,
+) -> holoviews.DynamicMap:
+    """
+    Return a ``DynamicMap`` with the nodes of the mesh which scales to millions of nodes.
+
+    As long as more than `max_glyphs` nodes are visible, the nodes are rasterized using ``datashader``
+    and the hover information is provided by a server-side lookup of the node that is nearest
+    to the cursor. When the user zooms in and fewer nodes are visible, the nodes are drawn as glyphs,
+    like `get_nodes()` does.
+    """
+    import holoviews as hv
+
+    trimesh = create_trimesh(ds_or_trimesh)
+    index = _NodeIndex(trimesh.nodes.data)
+    kwargs: dict[str, T.Any] = {}
+    _resolve_ranges(x_range=x_range, y_range=y_range, kwargs=kwargs)
+    view = _NodeView(
+        index=index,
+        x_range=kwargs.get("x_range", _get_padded_range(index.x)),
+        y_range=kwargs.get("y_range", _get_padded_range(index.y)),
+        max_glyphs=max_glyphs,
+    )
+    ranges = dict(x_range=view.x_range, y_range=view.y_range)
+    tools = ["crosshair"]
+    if hover:
+        tools.append("hover")
+    raster = hv.DynamicMap(
+        view.rasterize,
+        streams=[hv.streams.RangeXY(**ranges), hv.streams.PlotSize()],
+    ).opts(hv.opts.Image(cmap=["lightgreen", "darkgreen"], cnorm="eq_hist", colorbar=False, title=title))
+    glyphs = hv.DynamicMap(
+        view.draw_glyphs,
+        streams=[hv.streams.RangeXY(**ranges)],
+    ).opts(hv.opts.Points(tools=tools, size=size, color="green"))
+    components = [raster, glyphs]
+    if hover:
+        highlight = hv.DynamicMap(
+            view.lookup,
+            streams=[hv.streams.PointerXY(x=None, y=None), hv.streams.RangeXY(**ranges)],
+        ).opts(hv.opts.Points(tools=["hover"], size=size * 2, color="orange"))
+        components.append(highlight)
+    dmap = hv.Overlay(components).collate()
+    return dmap
+
+
 def get_wireframe(
     ds_or_trimesh: geoviews.TriMesh | xarray.Dataset,
     *,
@@ -211,15 +556,13 @@ def get_wireframe(
     hover: bool = False,
 ) -> geoviews.DynamicMap:
     """Return a ``DynamicMap`` with a wireframe of the mesh."""
-    import holoviews.operation.datashader as hv_operation_datashader
-
     trimesh = create_trimesh(ds_or_trimesh)
     kwargs = dict(element=trimesh.edgepaths, precompute=True)
     _resolve_ranges(x_range=x_range, y_range=y_range, kwargs=kwargs)
     tools = ["crosshair"]
     if hover:
         tools.append("hover")
-    wireframe = hv_operation_datashader.rasterize(**kwargs).opts(
+    wireframe = _get_rasterize_operation()(**kwargs).opts(
         tools=tools,
         cmap=["black"],
         title=title,
@@ -239,18 +582,48 @@ def get_raster(
     clim_max: float | None = None,
     x_range: tuple[float, float] | None = None,
     y_range: tuple[float, float] | None = None,
+    memory_budget: planning.Budget = None,
+    mask: bool = False,
 ) -> geoviews.DynamicMap:
     """
     Return a ``DynamicMap`` with a rasterized image of the variable.
 
-    Uses ``datashader`` behind the scenes.
+    Uses ``datashader`` behind the scenes. If the trimesh of a node variable does not fit in
+    the `memory_budget`, then the mesh is rasterized out-of-core with `thalassa.outofcore.get_raster()`.
+    If `mask` is ``True``, the inactive (e.g. dry) nodes are masked; check `create_trimesh()`.
     """
-    import holoviews.operation.datashader as hv_operation_datashader
+    import xarray as xr
 
-    trimesh = create_trimesh(ds_or_trimesh=ds_or_trimesh, variable=variable)
+    if (
+        isinstance(ds_or_trimesh, xr.Dataset)
+        and variable
+        and ds_or_trimesh[variable].dims == (normalization.NODE_DIM,)
+        and not planning.fits(_estimate_trimesh_nbytes(ds_or_trimesh, variable), memory_budget)
+    ):
+        from . import outofcore
+
+        logger.warning("The trimesh does not fit in the memory budget; rasterizing out-of-core")
+        return outofcore.get_raster(
+            ds_or_trimesh,
+            variable,
+            title=title,
+            cmap=cmap,
+            colorbar=colorbar,
+            clabel=clabel,
+            clim_min=clim_min,
+            clim_max=clim_max,
+            x_range=x_range,
+            y_range=y_range,
+        )
+    trimesh = create_trimesh(
+        ds_or_trimesh=ds_or_trimesh,
+        variable=variable,
+        mask=mask,
+        memory_budget=memory_budget,
+    )
     kwargs = dict(element=trimesh, precompute=True)
     _resolve_ranges(x_range=x_range, y_range=y_range, kwargs=kwargs)
-    raster = hv_operation_datashader.rasterize(**kwargs).opts(
+    raster = _get_rasterize_operation()(**kwargs).opts(
         cmap=cmap,
         clabel=clabel,
         colorbar=colorbar,
@@ -261,6 +634,161 @@ def get_raster(
     return raster
 
 
+class _TimeRaster:
+    """
+    The callback of the ``DynamicMap`` which is returned by `get_time_raster()`.
+
+    The geometry of the mesh (i.e. the web mercator coordinates of the vertices of each triangle)
+    is computed once; for each timestep only the values of the vertices are updated.
+    """
+
+    def __init__(
+        self,
+        ds: xarray.Dataset,
+        variable: str,
+        prefetcher: prefetch.TimestepPrefetcher,
+    ) -> None:
+        import numpy as np
+        import pandas as pd
+
+        self.variable = variable
+        self.prefetcher = prefetcher
+        self.times = pd.Index(ds.time.values)
+        self.fill_values = masking.get_fill_values(ds[variable])
+        nodes = create_trimesh(ds[["lon", "lat", "triface_nodes"]]).nodes.data
+        x = nodes.lon.values
+        y = nodes.lat.values
+        simplices = ds.triface_nodes.values
+        # datashader expects the triangles of a mesh to have the same winding
+        # (this is what `datashader.utils.mesh()` does, too)
+        winding = [0, 1, 2]
+        if len(simplices):
+            a, b, c = np.c_[x, y][simplices[0]]
+            if (b - a)[0] * (c - a)[1] - (b - a)[1] * (c - a)[0] >= 0:
+                winding = [0, 2, 1]
+        self.vertex_index = simplices[:, winding].ravel().astype(np.int64)
+        self.mesh_x = x[self.vertex_index]
+        self.mesh_y = y[self.vertex_index]
+        self.x_range = _get_padded_range(x)
+        self.y_range = _get_padded_range(y)
+
+    def get_values(self, time: T.Any) -> npt.NDArray[T.Any]:
+        import numpy as np
+
+        values = self.prefetcher.get(self.times.get_loc(time))
+        if self.fill_values:
+            is_fill = np.isin(values, self.fill_values)
+            if is_fill.any():
+                # Keep the (e.g. compact float32) dtype; the buffer of the prefetcher must not be modified
+                values = values.astype(np.result_type(values, np.float32))
+                values[is_fill] = np.nan
+        return values
+
+    def __call__(
+        self,
+        time: T.Any,
+        x_range: tuple[float, float] | None,
+        y_range: tuple[float, float] | None,
+        width: int | None,
+        height: int | None,
+        scale: float = 1.0,
+    ) -> holoviews.Image:
+        import datashader as dsh
+        import holoviews as hv
+        import pandas as pd
+
+        with instrumentation.span("time_raster"):
+            values = self.get_values(time)
+            mesh = pd.DataFrame(
+                {"lon": self.mesh_x, "lat": self.mesh_y, self.variable: values[self.vertex_index]},
+                copy=False,
+            )
+            canvas = dsh.Canvas(
+                plot_width=int((width or 400) * scale),
+                plot_height=int((height or 400) * scale),
+                x_range=x_range or self.x_range,
+                y_range=y_range or self.y_range,
+            )
+            # With a precomputed mesh, datashader only uses the columns of the vertices
+            vertices = mesh.iloc[:0]
+            agg = canvas.trimesh(vertices, None, mesh=mesh, agg=dsh.mean(self.variable))
+        return hv.Image(agg, kdims=["lon", "lat"], vdims=[self.variable])
+
+
+def get_time_raster(
+    ds: xarray.Dataset,
+    variable: str,
+    *,
+    prefetch_window: int = 2,
+    prefetcher: prefetch.TimestepPrefetcher | None = None,
+    title: str = "",
+    cmap: str = "plasma",
+    colorbar: bool = True,
+    clabel: str = "",
+    clim_min: float | None = None,
+    clim_max: float | None = None,
+    x_range: tuple[float, float] | None = None,
+    y_range: tuple[float, float] | None = None,
+) -> holoviews.DynamicMap:
+    """
+    Return a ``DynamicMap`` with a rasterized image of a ``("time", "node")`` variable and a time slider.
+
+    Contrary to calling `get_raster()` for each timestep, the geometry of the mesh is only processed once,
+    while the timesteps that are adjacent to the current one are prefetched in the background
+    (check `thalassa.prefetch.TimestepPrefetcher`). This makes scrubbing and playback smooth.
+
+    The background thread of the prefetcher is stopped when the ``DynamicMap`` gets garbage collected
+    or, when the plot is served with panel, when the session is destroyed. Pass your own `prefetcher`
+    in order to control its lifetime (or to inspect its statistics); closing it is then up to you.
+
+    Parameters:
+        ds: The dataset. It must adhere to the "Thalassa Schema".
+        variable: The variable; its dimensions must be ``("time", "node")``.
+        prefetch_window: The number of timesteps before and after the current one which get prefetched.
+        prefetcher: A prefetcher of ``ds[variable]``. Defaults to a new one with `prefetch_window`.
+    """
+    import holoviews as hv
+
+    if ds[variable].dims != ("time", normalization.NODE_DIM):
+        raise ValueError(
+            f"The dimensions of '{variable}' must be ('time', 'node'), not: {ds[variable].dims}"
+        )
+    owned = prefetcher is None
+    if prefetcher is None:
+        prefetcher = prefetch.TimestepPrefetcher(ds[variable], window=prefetch_window)
+    callback = _TimeRaster(ds, variable, prefetcher)
+    kwargs: dict[str, T.Any] = {}
+    _resolve_ranges(x_range=x_range, y_range=y_range, kwargs=kwargs)
+    time_dim = hv.Dimension("time", values=list(ds.time.values))
+    dmap = hv.DynamicMap(
+        callback,
+        kdims=[time_dim],
+        streams=[hv.streams.RangeXY(**kwargs), hv.streams.PlotSize()],
+    ).opts(
+        hv.opts.Image(
+            cmap=cmap,
+            clabel=clabel,
+            colorbar=colorbar,
+            clim=(clim_min, clim_max),
+            title=title or variable,
+            tools=["crosshair", "hover"],
+        ),
+    )
+    if owned:
+        _close_with(dmap, prefetcher)
+    return dmap
+
+
+def _close_with(dmap: holoviews.DynamicMap, prefetcher: prefetch.TimestepPrefetcher) -> None:
+    """Close `prefetcher` when `dmap` gets garbage collected or when the panel session is destroyed."""
+    import panel as pn
+
+    # The finalizer must not reference `dmap`, otherwise it would never be collected
+    weakref.finalize(dmap, prefetcher.close)
+    if pn.state.curdoc is not None and pn.state.curdoc.session_context is not None:
+        pn.state.on_session_destroyed(lambda session_context: prefetcher.close())
+
+
 def get_hover(variable: str) -> bokeh.models.HoverTool:
     import bokeh.models
 
@@ -276,6 +804,162 @@ def get_hover(variable: str) -> bokeh.models.HoverTool:
     return hover
 
 
+# Slow I/O (e.g. loading the timeseries of a node from a remote file) must not happen on the
+# event loop of the bokeh server, otherwise every connected user has to wait for it.
+# When `asynchronous=True`, the callbacks are executed on a bounded thread pool and
+# the results are pushed back to the plots when they are ready.
+IO_WORKERS_ENV_VARIABLE = "THALASSA_IO_WORKERS"
+_DEFAULT_IO_WORKERS = 4
+_io_executor: concurrent.futures.ThreadPoolExecutor | None = None
+_io_executor_lock = threading.Lock()
+
+
+def _get_io_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _io_executor
+    with _io_executor_lock:
+        if _io_executor is None:
+            max_workers = int(os.environ.get(IO_WORKERS_ENV_VARIABLE, _DEFAULT_IO_WORKERS))
+            _io_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix="thalassa-io",
+            )
+        return _io_executor
+
+
+def set_io_concurrency(max_workers: int) -> None:
+    """
+    Set the maximum number of threads which are used by the asynchronous callbacks.
+
+    The default value is 4 and it can also be set with the ``THALASSA_IO_WORKERS``
+    environment variable. Requests which are already running are not affected.
+
+    Parameters:
+        max_workers: The maximum number of concurrent I/O requests for the whole process.
+    """
+    global _io_executor
+    if max_workers < 1:
+        raise ValueError(f"The number of workers must be positive: {max_workers}")
+    with _io_executor_lock:
+        previous = _io_executor
+        _io_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="thalassa-io",
+        )
+    if previous is not None:
+        previous.shutdown(wait=False, cancel_futures=False)
+
+
+class _AsyncCallback:
+    """
+    The callback of a ``DynamicMap`` whose data are loaded on the I/O thread pool.
+
+    Every event of `stream` submits `load(**stream_contents)` to the thread pool. When the
+    result is ready, it is passed to `render()` via a ``Pipe`` stream. Only the latest request
+    matters: requests that are superseded before they start are cancelled, while the results
+    of superseded requests that were already running are discarded.
+
+    The ``DynamicMap`` owns the callback, which in turn owns the state of the pending request.
+    """
+
+    def __init__(
+        self,
+        load: T.Callable[..., T.Any],
+        render: T.Callable[..., holoviews.Element],
+        stream: Stream,
+        initial: T.Any,
+    ) -> None:
+        import holoviews as hv
+
+        self.load = load
+        self.render = render
+        self.pipe = hv.streams.Pipe(data=initial)
+        self.generation = 0
+        self.future: concurrent.futures.Future[T.Any] | None = None
+        self._lock = threading.Lock()
+        stream.add_subscriber(self.on_event)
+
+    def __call__(self, data: T.Any) -> holoviews.Element:
+        return self.render(*data)
+
+    def deliver(self, future: concurrent.futures.Future[T.Any], generation: int, doc: T.Any) -> None:
+        if future.cancelled() or generation != self.generation:
+            return
+        try:
+            result = future.result()
+        except Exception:
+            logger.exception("Asynchronous callback failed")
+            return
+        if doc is not None:
+            # `add_next_tick_callback()` is the only thread-safe method of bokeh documents
+            doc.add_next_tick_callback(functools.partial(self.pipe.send, result))
+        else:
+            self.pipe.send(result)
+
+    def on_event(self, **kwargs: T.Any) -> None:
+        import panel as pn
+
+        with self._lock:
+            self.generation += 1
+            generation = self.generation
+            if self.future is not None:
+                self.future.cancel()
+            future = _get_io_executor().submit(self.load, **kwargs)
+            self.future = future
+        future.add_done_callback(
+            functools.partial(self.deliver, generation=generation, doc=pn.state.curdoc)
+        )
+
+
+def _get_async_dmap(
+    load: T.Callable[..., T.Any],
+    render: T.Callable[..., holoviews.Element],
+    stream: Stream,
+    initial: T.Any,
+) -> holoviews.DynamicMap:
+    """Return a ``DynamicMap`` whose data are loaded on the I/O thread pool; check `_AsyncCallback`."""
+    import holoviews as hv
+
+    callback = _AsyncCallback(load=load, render=render, stream=stream, initial=initial)
+    dmap = hv.DynamicMap(callback, streams=[callback.pipe])
+    return dmap
+
+
+# The number of bins that are used until the plot reports its actual width
+DEFAULT_TIMESERIES_BINS = 800
+
+
+def _decimate_curve(
+    curve: holoviews.Curve,
+    x_range: tuple[T.Any, T.Any] | None,
+    width: int | None,
+    scale: float = 1.0,
+    **kwargs: T.Any,
+) -> holoviews.Curve:
+    no_bins = max(int((width or DEFAULT_TIMESERIES_BINS) * scale), 1)
+    indices = utils.get_decimated_indices(
+        x=curve.dimension_values(0),
+        y=curve.dimension_values(1),
+        no_bins=no_bins,
+        x_range=x_range,
+    )
+    if len(indices) == len(curve):
+        return curve
+    return curve.iloc[indices]
+
+
+def _decimate_timeseries(dmap: holoviews.DynamicMap) -> holoviews.DynamicMap:
+    """
+    Return a ``DynamicMap`` which only sends to the browser the points that are visible.
+
+    The full timeseries stays in `dmap`. Whenever the plot is zoomed or resized, the curve is
+    decimated again using the current x-range and width, so the detail is restored when zooming in.
+    """
+    import holoviews as hv
+
+    decimated = dmap.apply(_decimate_curve, streams=[hv.streams.RangeX(), hv.streams.PlotSize()])
+    return decimated
+
+
 def _get_stream_timeseries(
     ds: xarray.Dataset,
     variable: str,
@@ -283,6 +967,8 @@ def _get_stream_timeseries(
     stream_class: Stream,
     title_template: str,
     fontscale: float = 1,
+    asynchronous: bool = False,
+    decimate: bool = True,
 ) -> geoviews.DynamicMap:
     import geoviews as gv
     import holoviews as hv
@@ -298,15 +984,18 @@ def _get_stream_timeseries(
     hover = get_hover(variable)
     initial_render = True
 
-    def callback(x: float, y: float) -> holoviews.Curve:
+    def get_empty() -> tuple[xarray.Dataset, str]:
+        # Using slice(0, 0) ensures that there are no data to display but we keep the correct
+        # variable names to display as labels in the X and Y axis.
+        ts = ds.isel(node=0, time=slice(0, 0))
+        title = "Please click on the map!"
+        return ts, title
+
+    def load(x: float, y: float) -> tuple[xarray.Dataset, str]:
         logger.debug("tsplot: start - %s, %s", x, y)
-        nonlocal initial_render
-        if initial_render or (not utils.is_point_in_the_raster(raster=source_raster, lon=x, lat=y)):
+        if not utils.is_point_in_the_raster(raster=source_raster, lon=x, lat=y):
             # if the point is not inside the mesh, then display an empty graph
-            # Using slice(0, 0) ensures that there are no data to display but we keep the correct
-            # variable names to display as labels in the X and Y axis.
-            ts = ds.isel(node=0, time=slice(0, 0))
-            title = "Please click on the map!"
+            ts, title = get_empty()
         else:
             x, y = to_wgs84(x, y)
             node_index = utils.get_index_of_nearest_node(ds=ds, lon=x, lat=y)
@@ -318,10 +1007,14 @@ def _get_stream_timeseries(
                 node_index=node_index,
             )
         logger.debug("tsplot: title: %s", title)
-        with utils.timer("tsplot: data loaded ts in"):
-            ts[variable].load()
+        with instrumentation.span("timeseries", variable=variable) as span:
+            with utils.timer("tsplot: data loaded ts in"):
+                ts[variable].load()
+            span.record_bytes(ts[variable].nbytes)
+        return ts, title
+
+    def render(ts: xarray.Dataset, title: str) -> holoviews.Curve:
         plot = hv.Curve(ts[variable])
-        initial_render = False
         plot = plot.opts(
             title=title,
             framewise=True,
@@ -334,40 +1027,193 @@ def _get_stream_timeseries(
         logger.debug("tsplot: end")
         return plot
 
+    def callback(x: float, y: float) -> holoviews.Curve:
+        nonlocal initial_render
+        if initial_render:
+            ts, title = get_empty()
+        else:
+            ts, title = load(x=x, y=y)
+        initial_render = False
+        return render(ts, title)
+
     stream = stream_class(x=0, y=0, source=source_raster)
-    dmap = gv.DynamicMap(callback, streams=[stream])
+    if asynchronous:
+        dmap = _get_async_dmap(load=load, render=render, stream=stream, initial=get_empty())
+    else:
+        dmap = gv.DynamicMap(callback, streams=[stream])
+    if decimate:
+        dmap = _decimate_timeseries(dmap)
     return dmap
 
 
+_STATION_VARIABLES = [
+    "ioc_code",
+    "lat",
+    "lon",
+    "location",
+    *validation.SKILL_METRICS,
+]
+
+
+class StationStore:
+    """
+    A precomputed, in-memory index of a "stations" dataset.
+
+    The table of the station attributes/metrics, the timeseries of each station and a KD-tree
+    over the station locations are computed once, so that resolving a selection of pins
+    does not need to touch the dataset.
+
+    Parameters:
+        stations: A dataset with a ``node`` dimension (one per station), like the one that
+            is returned by `validation.compute_skill()`.
+    """
+
+    def __init__(self, stations: xarray.Dataset) -> None:
+        import numpy as np
+        import pandas as pd
+        import scipy.spatial
+
+        with instrumentation.span("station_store") as span:
+            stations = stations.load()
+            span.record_bytes(stations.nbytes)
+        self.size = stations.sizes["node"]
+        self.lon = stations.lon.values
+        self.lat = stations.lat.values
+        self.location = stations.location.values.astype(str)
+        # Pins with the same location would end up with the same column in the table
+        counts: dict[str, int] = {}
+        labels = []
+        for location in self.location:
+            counts[location] = counts.get(location, 0) + 1
+            labels.append(location if counts[location] == 1 else f"{location} ({counts[location]})")
+        self.labels = np.array(labels)
+        # Map the labels of the "node" dimension (i.e. the index of the pins) to positions
+        self._positions: pandas.Index = pd.Index(
+            stations.node.values if "node" in stations.coords else np.arange(self.size)
+        )
+        variables = [var for var in _STATION_VARIABLES if var in stations]
+        self.table: pandas.DataFrame = pd.DataFrame(
+            {var: stations[var].values for var in variables},
+        ).T
+        self.table.index.name = "attribute"
+        self.series: list[dict[str, tuple[npt.NDArray[T.Any], npt.NDArray[T.Any]]]] = [
+            {} for _ in range(self.size)
+        ]
+        for x, y in (("stime", "elev_sim"), ("time", "elev_obs")):
+            if y not in stations:
+                continue
+            times = stations[x].values
+            values = stations[y].transpose("node", x).values
+            for i in range(self.size):
+                valid = ~np.isnan(values[i])
+                self.series[i][y] = (times[valid], values[i][valid])
+        self._tree = scipy.spatial.cKDTree(np.c_[self.lon, self.lat])
+
+    def get_positions(self, index: T.Iterable[T.Any]) -> npt.NDArray[numpy.intp]:
+        """Return the positions of the stations whose ``node`` labels are `index`."""
+        import pandas as pd
+
+        positions = self._positions.get_indexer(pd.Index(list(index)))
+        return positions[positions >= 0]
+
+    def get_table(self, positions: T.Sequence[int] | npt.NDArray[numpy.intp]) -> pandas.DataFrame:
+        """Return the attributes of the stations at `positions`; one column per station."""
+        df: pandas.DataFrame = self.table.iloc[:, list(positions)]
+        df.columns = self.labels[list(positions)]
+        return df
+
+    def get_curves(self, positions: T.Sequence[int] | npt.NDArray[numpy.intp]) -> list[holoviews.Curve]:
+        """Return the simulated and the observed timeseries of the stations at `positions`."""
+        import holoviews as hv
+
+        curves = []
+        for position in positions:
+            # Only add the name of the station to the label when there are more than one
+            prefix = f"{self.labels[position]}: " if len(positions) > 1 else ""
+            series = self.series[position]
+            for y, kdim, label in (
+                ("elev_sim", "stime", "Simulation"),
+                ("elev_obs", "time", "Observation"),
+            ):
+                if y in series:
+                    curves.append(hv.Curve(series[y], kdims=[kdim], vdims=[y], label=prefix + label))
+        return curves
+
+    def query(
+        self,
+        lon: float | npt.ArrayLike,
+        lat: float | npt.ArrayLike,
+        tolerance: float = 0.0,
+    ) -> npt.NDArray[numpy.intp]:
+        """
+        Return the sorted positions of the stations that are nearest to the `(lon, lat)` points.
+
+        All the stations that are within `tolerance` of the nearest one are returned,
+        e.g. pins that share the same coordinates.
+        """
+        import numpy as np
+
+        points = np.c_[np.atleast_1d(lon), np.atleast_1d(lat)]
+        if not self.size or not len(points):
+            return np.empty(0, dtype=np.intp)
+        distances, _ = self._tree.query(points)
+        # `nextafter()` makes sure that the nearest stations are included despite rounding errors
+        matches = self._tree.query_ball_point(points, r=np.nextafter(distances + tolerance, np.inf))
+        return np.unique(np.concatenate([np.asarray(match, dtype=np.intp) for match in matches]))
+
+    def get_pins_df(self) -> pandas.DataFrame:
+        """Return the pins; their index holds the ``node`` labels, like the index of `get_station_pins()`."""
+        import pandas as pd
+
+        df: pandas.DataFrame = pd.DataFrame(
+            dict(lon=self.lon, lat=self.lat, location=self.location), index=self._positions.copy()
+        )
+        df.index.name = "node"
+        return df
+
+
+def get_station_store(stations: xarray.Dataset | StationStore) -> StationStore:
+    if isinstance(stations, StationStore):
+        return stations
+    return StationStore(stations)
+
+
+def _get_selected_positions(store: StationStore, pins: T.Any, index: list[int]) -> npt.NDArray[numpy.intp]:
+    """Resolve the pins that were selected with the tap or the box select tool through the KD-tree of `store`."""
+    if len(index) >= 2:
+        logger.debug("Multiple pins selected: %r", index)
+    selected = pins.data.iloc[index]
+    return store.query(selected.lon.values, selected.lat.values)
+
+
 def get_station_timeseries(
-    stations: xarray.Dataset,
+    stations: xarray.Dataset | StationStore,
     pins: geoviews.DynamicMap,
+    asynchronous: bool = False,
 ) -> holoviews.DynamicMap:  # pragma: no cover
     import holoviews as hv
-    import pandas as pd
 
-    def callback(index: list[int]) -> holoviews.Curve:
-        # sometimes there are multiple pins with the same lon/lat
-        # When one of these pins gets selected index contains the indices of both pins
-        # This causes an exception to be raised.
-        # TODO: Until we decide how to resolve this, we just pick the first pin, no matter what.
-        if len(index) >= 2:
-            logger.warning("TS: multiple pins selected: %r", index)
-            index = [index[0]]
-        logger.warning("TS: Choosing the first one: %r", index)
-        columns = ["stime", "elev_sim", "time", "elev_obs"]
-        if not index:
+    store = get_station_store(stations)
+
+    def load(index: list[int]) -> tuple[npt.NDArray[numpy.intp], str]:
+        with instrumentation.span("station_timeseries", pins=len(index)):
+            positions = _get_selected_positions(store, pins, index)
+        if not len(positions):
             title = "No stations selected"
-            ds = pd.DataFrame(columns=columns)
+        elif len(positions) == 1:
+            title = str(store.location[positions[0]])
         else:
-            df = pins.data
-            title = df.iloc[index[0]].location
-            ds = stations.isel(node=df.index[index])[columns]
-        dataset = hv.Dataset(ds)
-        curve1 = hv.Curve(dataset, kdims=["stime"], vdims=["elev_sim"], label="Simulation")
-        curve2 = hv.Curve(dataset, kdims=["time"], vdims=["elev_obs"], label="Observation")
-        components = [curve1, curve2]
-        overlay = functools.reduce(operator.mul, components).opts(
+            title = f"{len(positions)} stations selected"
+        return positions, title
+
+    def render(positions: npt.NDArray[numpy.intp], title: str) -> holoviews.Overlay:
+        components = store.get_curves(positions)
+        if not components:
+            components = [
+                hv.Curve([], kdims=["stime"], vdims=["elev_sim"], label="Simulation"),
+                hv.Curve([], kdims=["time"], vdims=["elev_obs"], label="Observation"),
+            ]
+        overlay = hv.Overlay(components).opts(
             hv.opts.Curve(
                 padding=0.05,
                 title=title,
@@ -380,66 +1226,62 @@ def get_station_timeseries(
         )
         return overlay
 
+    def callback(index: list[int]) -> holoviews.Overlay:
+        return render(*load(index))
+
     stream = hv.streams.Selection1D(source=pins, index=[])
-    dmap = hv.DynamicMap(callback, streams=[stream])
+    if asynchronous:
+        dmap = _get_async_dmap(load=load, render=render, stream=stream, initial=load([]))
+    else:
+        dmap = hv.DynamicMap(callback, streams=[stream])
     return dmap
 
 
-_STATION_VARIABLES = [
-    "ioc_code",
-    "lat",
-    "lon",
-    "location",
-    "Mean Absolute Error",
-    "RMSE",
-    "Scatter Index",
-    "percentage RMSE",
-    "BIAS or mean error",
-    "Standard deviation of residuals",
-    "Correlation Coefficient",
-    "R^2",
-    "Nash-Sutcliffe Coefficient",
-    "lambda index",
-]
-
-
 def get_station_table(
-    stations: xarray.Dataset,
+    stations: xarray.Dataset | StationStore,
     pins: geoviews.DynamicMap,
+    asynchronous: bool = False,
 ) -> holoviews.DynamicMap:  # pragma: no cover
     import holoviews as hv
     import pandas as pd
 
-    def callback(index: list[int]) -> holoviews.Table:
-        # sometimes there are multiple pins with the same lon/lat
-        # When one of these pins gets selected index contains the indices of both pins
-        # This causes an exception to be raised.
-        # TODO: Until we decide how to resolve this, we just pick the first pin, no matter what.
-        if len(index) >= 2:
-            logger.warning("ST: multiple pins selected: %r", index)
-            index = [index[0]]
-        logger.warning("ST: Choosing the first one: %r", index)
-        if not index:
-            df = pd.DataFrame(columns=["attribute", "value"]).set_index("attribute")
-        else:
-            ds = stations.isel(node=pins.data.index[index])
-            df = ds[_STATION_VARIABLES].to_dataframe().T
-            df.index.name = "attribute"
-            df.columns = pd.Index(["value"])
+    store = get_station_store(stations)
+
+    def load(index: list[int]) -> tuple[pandas.DataFrame]:
+        with instrumentation.span("station_table", pins=len(index)):
+            positions = _get_selected_positions(store, pins, index)
+            if not len(positions):
+                df = pd.DataFrame(columns=["attribute", "value"]).set_index("attribute")
+            else:
+                df = store.get_table(positions)
+            if len(positions) == 1:
+                df.columns = pd.Index(["value"])
+        return (df,)
+
+    def render(df: pandas.DataFrame) -> holoviews.Table:
         table = hv.Table(df, kdims=["attribute"])
         return table
 
+    def callback(index: list[int]) -> holoviews.Table:
+        return render(*load(index))
+
     stream = hv.streams.Selection1D(source=pins, index=[])
-    dmap = hv.DynamicMap(callback, streams=[stream])
+    if asynchronous:
+        dmap = _get_async_dmap(load=load, render=render, stream=stream, initial=load([]))
+    else:
+        dmap = hv.DynamicMap(callback, streams=[stream])
     return dmap
 
 
-def get_station_pins(stations: xarray.Dataset) -> geoviews.Points:
+def get_station_pins(stations: xarray.Dataset | StationStore) -> geoviews.Points:
     import geoviews as gv
 
-    df = stations[["lon", "lat", "location"]].to_dataframe()
+    if isinstance(stations, StationStore):
+        df = stations.get_pins_df()
+    else:
+        df = stations[["lon", "lat", "location"]].to_dataframe()
     pins = gv.Points(df, kdims=["lon", "lat"], vdims=["location"])
-    pins = pins.opts(color="red", marker="circle_dot", size=10, tools=["tap", "hover"])
+    pins = pins.opts(color="red", marker="circle_dot", size=10, tools=["tap", "box_select", "hover"])
     return pins
 
 
@@ -449,6 +1291,8 @@ def get_tap_timeseries(
     source_raster: geoviews.DynamicMap,
     title_template: str = "{variable} - Node={node_index} Lon={lon:.6f} Lat={lat:.6f}",
     fontscale: float = 1,
+    asynchronous: bool = False,
+    decimate: bool = True,
 ) -> geoviews.DynamicMap:
     import holoviews.streams as hv_streams
 
@@ -459,6 +1303,8 @@ def get_tap_timeseries(
         stream_class=hv_streams.Tap,
         title_template=title_template,
         fontscale=fontscale,
+        asynchronous=asynchronous,
+        decimate=decimate,
     )
     return dmap
 
@@ -469,6 +1315,8 @@ def get_pointer_timeseries(
     source_raster: geoviews.DynamicMap,
     title_template: str = "",
     fontscale: float = 1,
+    asynchronous: bool = False,
+    decimate: bool = True,
 ) -> geoviews.DynamicMap:
     import holoviews.streams as hv_streams
 
@@ -479,10 +1327,104 @@ def get_pointer_timeseries(
         stream_class=hv_streams.PointerXY,
         title_template=title_template,
         fontscale=fontscale,
+        asynchronous=asynchronous,
+        decimate=decimate,
     )
     return dmap
 
 
+NUMBA_CACHE_DIR_ENV_VARIABLE = "NUMBA_CACHE_DIR"
+
+
+def _get_warmup_ds() -> xarray.Dataset:
+    """Return a tiny dataset with two triangles."""
+    import numpy as np
+
+    return utils.generate_thalassa_ds(
+        nodes=range(4),
+        triface_nodes=np.array([[0, 1, 2], [1, 3, 2]]),
+        lons=np.array([10.0, 11.0, 10.0, 11.0]),
+        lats=np.array([40.0, 40.0, 41.0, 41.0]),
+        variable=(("node",), np.array([1.0, 2.0, 3.0, 4.0])),
+    )
+
+
+def warmup(cache_dir: str | os.PathLike[str] | None = None) -> dict[str, float]:
+    """
+    Prepare the current process for interactive usage and return the duration of each phase.
+
+    The first plot of a fresh process is slow because the plotting stack (holoviews, geoviews,
+    cartopy, bokeh, datashader) needs to be imported and because datashader's kernels need to be
+    JIT compiled by numba. This function pays these costs upfront by rendering a tiny synthetic
+    mesh, so that e.g. a newly started server is fast for its first user, too.
+
+    If `cache_dir` is provided (or the ``NUMBA_CACHE_DIR`` environment variable is set) then
+    numba stores the kernels which support caching on disk, so that subsequent processes can load
+    them instead of compiling them again. Do notice that this needs to happen before numba gets
+    imported, and that kernels which have been compiled without ``cache=True`` (e.g. most of
+    datashader's ones) are always compiled in-process.
+
+    Examples:
+        ``` python
+        import thalassa
+
+        timings = thalassa.warmup()
+        print(timings)
+        ```
+
+    Parameters:
+        cache_dir: The directory where numba stores the compiled kernels.
+    """
+    import importlib
+    import sys
+    import time
+
+    timings: dict[str, float] = {}
+
+    def run_phase(name: str, func: T.Callable[[], T.Any]) -> T.Any:
+        with instrumentation.span(f"warmup.{name}"):
+            t1 = time.perf_counter()
+            result = func()
+            timings[name] = time.perf_counter() - t1
+        logger.info("warmup: %s: %.3fs", name, timings[name])
+        return result
+
+    if cache_dir is not None:
+        if "numba" in sys.modules:
+            logger.warning("warmup: numba has already been imported; %s is ignored", cache_dir)
+        else:
+            os.makedirs(cache_dir, exist_ok=True)
+            os.environ[NUMBA_CACHE_DIR_ENV_VARIABLE] = os.fspath(cache_dir)
+
+    def import_plotting_stack() -> None:
+        for module in (
+            "numba",
+            "bokeh.models",
+            "cartopy.crs",
+            "datashader",
+            "holoviews",
+            "holoviews.operation.datashader",
+            "holoviews.plotting.bokeh",
+            "geoviews",
+            "geoviews.plotting.bokeh",
+        ):
+            importlib.import_module(module)
+
+    def render(element: T.Any) -> None:
+        import holoviews as hv
+
+        hv.render(element, backend="bokeh")
+
+    ds = _get_warmup_ds()
+    run_phase("imports", import_plotting_stack)
+    trimesh = run_phase("trimesh", lambda: create_trimesh(ds, variable="variable"))
+    run_phase("raster", lambda: render(get_raster(trimesh)))
+    run_phase("wireframe", lambda: render(get_wireframe(trimesh)))
+    run_phase("idl", lambda: utils.get_elements_crossing_idl(ds))
+    timings["total"] = sum(timings.values())
+    return timings
+
+
 # def plot_timeseries(ds: xarray.DataArray, lon: float, lat: float) -> geoviews.DynamicMap:
 #     node_index = utils.get_index_of_nearest_node(ds=ds, lon=lon, lat=lat)
 #     node_lon = ds.lon.isel(node_index)
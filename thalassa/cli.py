@@ -0,0 +1,417 @@
+"""
+The ``thalassa`` command line interface, which pre-processes whole output archives in parallel.
+
+The work is described by a JSON job file, e.g.:
+
+``` json
+{
+    "files": ["outputs/*.nc"],
+    "output_dir": "processed",
+    "regions": {"north_sea": [-5, 50, 10, 62], "baltic": [9, 53, 31, 66]},
+    "variables": ["elev"],
+    "reductions": ["max", "exceedance"],
+    "threshold": 1.5,
+    "compact": true,
+    "format": "zarr",
+    "memory_budget": "16GB"
+}
+```
+
+Each file is opened, its format is inferred and it gets normalized. Then, for each region, the dataset
+is cropped, the `reductions` are applied to the `variables` and the result is written to
+``<output_dir>/<file stem>_<region>.<zarr|nc>``. The files are processed in parallel by a pool
+of processes. The outputs which are newer than their input file and which were computed with the
+same parameters (e.g. the same `variables`, `reductions`, `threshold` and region bbox) are not
+computed again.
+"""
+
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import glob
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import pathlib
+import shutil
+import sys
+import time
+import traceback
+import typing as T
+
+from . import analytics
+from . import api
+from . import normalization
+from . import planning
+from . import registry
+from . import utils
+from . import vertical
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import xarray
+
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = {"zarr": ".zarr", "netcdf": ".nc"}
+TIME_REDUCTIONS = ("max", "min", "mean")
+VERTICAL_REDUCTIONS = {
+    "surface": vertical.select_surface,
+    "bottom": vertical.select_bottom,
+    "depth_average": vertical.depth_average,
+}
+REDUCTIONS = (*TIME_REDUCTIONS, *VERTICAL_REDUCTIONS, "exceedance")
+# The attribute of the outputs which holds the hash of the parameters that they were computed with
+JOB_HASH_ATTRIBUTE = "thalassa_job_hash"
+
+_JOB_KEYS = {
+    "files",
+    "output_dir",
+    "regions",
+    "variables",
+    "reductions",
+    "threshold",
+    "compact",
+    "format",
+    "memory_budget",
+}
+
+
+class Job(T.NamedTuple):
+    """The description of the work; check the module docstring."""
+
+    files: list[pathlib.Path]
+    output_dir: pathlib.Path
+    # The region name and its ``(lon_min, lat_min, lon_max, lat_max)`` bbox; `None` means no cropping
+    regions: dict[str, tuple[float, float, float, float] | None]
+    variables: tuple[str, ...] | None = None
+    reductions: tuple[str, ...] = ()
+    threshold: float = 0.0
+    compact: bool = False
+    output_format: str = "zarr"
+    memory_budget: planning.Budget = None
+
+
+class FileReport(T.NamedTuple):
+    """The outcome of processing a single file."""
+
+    path: pathlib.Path
+    written: list[pathlib.Path]
+    skipped: list[pathlib.Path]
+    nbytes: int
+    elapsed: float
+    error: str | None = None
+
+    @property
+    def throughput(self) -> float:
+        """The size of the input file that was processed per second, in MiB/s."""
+        return self.nbytes / 1024**2 / self.elapsed if self.elapsed else 0.0
+
+
+def _resolve_files(patterns: T.Sequence[str], base_dir: pathlib.Path) -> list[pathlib.Path]:
+    files: list[pathlib.Path] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(str(base_dir / pattern)))
+        if not matches:
+            raise ValueError(f"No files match: {pattern}")
+        files.extend(pathlib.Path(match) for match in matches)
+    return files
+
+
+def load_job(path: str | os.PathLike[str]) -> Job:
+    """
+    Load and validate a JSON job file. Relative paths are relative to the directory of the job file.
+
+    Raises:
+        ValueError: If the job is not valid.
+    """
+    path = pathlib.Path(path)
+    data = json.loads(path.read_text())
+    if unknown := set(data) - _JOB_KEYS:
+        raise ValueError(f"Unknown job keys: {sorted(unknown)}")
+    if "files" not in data or "output_dir" not in data:
+        raise ValueError("A job needs 'files' and 'output_dir'")
+    if unknown := set(data.get("reductions", [])) - set(REDUCTIONS):
+        raise ValueError(f"Unknown reductions: {sorted(unknown)}. Choose from: {REDUCTIONS}")
+    if data.get("format", "zarr") not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {data['format']}. Choose from: {list(OUTPUT_FORMATS)}")
+    regions = data.get("regions") or {"": None}
+    return Job(
+        files=_resolve_files(data["files"], path.parent),
+        output_dir=path.parent / data["output_dir"],
+        regions={name: tuple(bbox) if bbox else None for name, bbox in regions.items()},
+        variables=tuple(data["variables"]) if data.get("variables") else None,
+        reductions=tuple(data.get("reductions", ())),
+        threshold=float(data.get("threshold", 0.0)),
+        compact=bool(data.get("compact", False)),
+        output_format=data.get("format", "zarr"),
+        memory_budget=data.get("memory_budget"),
+    )
+
+
+def get_output_path(job: Job, path: pathlib.Path, region: str) -> pathlib.Path:
+    """Return the path of the output of `path` for `region`."""
+    name = f"{path.stem}_{region}" if region else path.stem
+    return job.output_dir / f"{name}{OUTPUT_FORMATS[job.output_format]}"
+
+
+def _get_size(path: pathlib.Path) -> int:
+    if path.is_dir():
+        return sum(child.stat().st_size for child in path.rglob("*") if child.is_file())
+    return path.stat().st_size
+
+
+def get_job_hash(job: Job, region: str) -> str:
+    """Return a hash of the parameters of `job` which affect the output of `region`."""
+    parameters = dict(
+        variables=job.variables,
+        reductions=job.reductions,
+        threshold=job.threshold,
+        bbox=job.regions[region],
+        compact=job.compact,
+        output_format=job.output_format,
+    )
+    return hashlib.sha256(json.dumps(parameters, sort_keys=True).encode()).hexdigest()
+
+
+def _read_attrs(output: pathlib.Path) -> dict[T.Hashable, T.Any]:
+    import xarray as xr
+
+    # Only the metadata get read
+    with xr.open_dataset(output, engine="zarr" if output.suffix == ".zarr" else None) as ds:
+        return dict(ds.attrs)
+
+
+def is_up_to_date(output: pathlib.Path, path: pathlib.Path, job_hash: str) -> bool:
+    """Return `True` if `output` exists, it is newer than `path` and it was computed with `job_hash`."""
+    if not output.exists() or output.stat().st_mtime < path.stat().st_mtime:
+        return False
+    try:
+        attrs = _read_attrs(output)
+    except Exception:
+        # An output that can't be read gets computed again
+        logger.warning("Can't read the attributes of: %s", output, exc_info=True)
+        return False
+    return bool(attrs.get(JOB_HASH_ATTRIBUTE) == job_hash)
+
+
+def _open(job: Job, path: pathlib.Path) -> xarray.Dataset:
+    ds = api.open_dataset(path, normalize=False, memory_budget=job.memory_budget)
+    fmt = normalization.infer_format(ds)
+    if fmt == normalization.THALASSA_FORMATS.UNKNOWN:
+        raise ValueError(f"Can't infer the format of: {path}")
+    logger.info("%s: %s", path, fmt.value)
+    plan = planning.plan_dataset(ds, compact=job.compact, budget=job.memory_budget)
+    return normalization.normalize(ds, compact=plan.compact)
+
+
+def _get_variables(job: Job, ds: xarray.Dataset) -> list[str]:
+    if job.variables is not None:
+        if missing := [variable for variable in job.variables if variable not in ds]:
+            raise ValueError(f"Missing variables: {missing}")
+        return list(job.variables)
+    return [
+        str(name)
+        for name, data in ds.data_vars.items()
+        if "node" in data.dims and name not in registry.MESH_VARIABLES
+    ]
+
+
+def _reduce_variable(job: Job, ds: xarray.Dataset, variable: str) -> xarray.Dataset:
+    """Return the `reductions` of `variable` that apply to its dimensions."""
+    import xarray as xr
+
+    dims = ds[variable].dims
+    results = []
+    for reduction in job.reductions:
+        if reduction in TIME_REDUCTIONS and "time" in dims:
+            data = getattr(ds[variable], reduction)("time", keep_attrs=True)
+            results.append(data.to_dataset(name=f"{variable}_{reduction}"))
+        elif reduction in VERTICAL_REDUCTIONS and "layer" in dims:
+            result = VERTICAL_REDUCTIONS[reduction](ds, variable)
+            results.append(result[[variable]].rename({variable: f"{variable}_{reduction}"}))
+        elif reduction == "exceedance" and dims == ("time", "node"):
+            result = analytics.compute_exceedance(
+                ds,
+                variable,
+                threshold=job.threshold,
+                memory_budget=job.memory_budget,
+            )
+            names = [name for name in result.data_vars if name not in registry.MESH_VARIABLES]
+            renamed = {
+                name: name if str(name).startswith(variable) else f"{variable}_{name}" for name in names
+            }
+            results.append(result[names].rename(renamed))
+    return xr.merge(results, compat="override") if results else xr.Dataset()
+
+
+def process_region(job: Job, ds: xarray.Dataset, region: str) -> xarray.Dataset:
+    """Crop `ds` to `region` and return the mesh with the (reduced) variables of `job`."""
+    bbox = job.regions[region]
+    if bbox is not None:
+        ds = utils.crop(ds, bbox, memory_budget=job.memory_budget)
+    variables = _get_variables(job, ds)
+    result: xarray.Dataset = ds[list(registry.MESH_VARIABLES)]
+    if not job.reductions:
+        result = result.assign({variable: ds[variable] for variable in variables})
+    else:
+        for variable in variables:
+            result = result.assign(_reduce_variable(job, ds, variable).data_vars)
+    return result
+
+
+def _write(job: Job, ds: xarray.Dataset, output: pathlib.Path) -> None:
+    # Write to a temporary path first, so that an interrupted write never looks up to date
+    tmp = output.with_name(f".{output.name}.tmp")
+    ds = ds.drop_encoding()
+    if job.output_format == "zarr":
+        ds.to_zarr(tmp, mode="w")
+    else:
+        ds.to_netcdf(tmp)
+    if output.is_dir():
+        shutil.rmtree(output)
+    os.replace(tmp, output)
+
+
+def process_file(job: Job, path: pathlib.Path, force: bool = False) -> FileReport:
+    """
+    Process all the regions of a single file and return a report. Errors are reported, not raised.
+
+    Parameters:
+        job: The job.
+        path: The input file.
+        force: Whether the outputs that are up to date should be computed again.
+    """
+    start = time.perf_counter()
+    written: list[pathlib.Path] = []
+    skipped: list[pathlib.Path] = []
+    try:
+        outputs = {region: get_output_path(job, path, region) for region in job.regions}
+        hashes = {region: get_job_hash(job, region) for region in job.regions}
+        pending = {
+            region: output
+            for region, output in outputs.items()
+            if force or not is_up_to_date(output, path, hashes[region])
+        }
+        skipped = [output for region, output in outputs.items() if region not in pending]
+        if pending:
+            job.output_dir.mkdir(parents=True, exist_ok=True)
+            ds = _open(job, path)
+            for region, output in pending.items():
+                result = process_region(job, ds, region).assign_attrs({JOB_HASH_ATTRIBUTE: hashes[region]})
+                _write(job, result, output)
+                written.append(output)
+        nbytes = _get_size(path) if written else 0
+        return FileReport(path, written, skipped, nbytes, time.perf_counter() - start)
+    except Exception:
+        error = traceback.format_exc()
+        return FileReport(path, written, skipped, 0, time.perf_counter() - start, error=error)
+
+
+def format_report(report: FileReport, verbose: bool = False) -> str:
+    """Return a single line (or the whole traceback if `verbose`) which summarizes `report`."""
+    if report.error is not None:
+        error = report.error.strip() if verbose else report.error.strip().splitlines()[-1]
+        return f"FAILED  {report.path}: {error}"
+    return (
+        f"OK      {report.path}: {len(report.written)} written, {len(report.skipped)} skipped, "
+        f"{report.nbytes / 1024**2:.1f} MiB in {report.elapsed:.2f}s ({report.throughput:.1f} MiB/s)"
+    )
+
+
+def run(
+    job: Job,
+    max_workers: int | None = None,
+    force: bool = False,
+    callback: T.Callable[[FileReport], None] | None = None,
+) -> list[FileReport]:
+    """
+    Process all the files of `job` in parallel.
+
+    The memory budget of the job (or the default one, check `thalassa.planning`) is split
+    among the worker processes. If a worker process dies (e.g. it gets killed for running out
+    of memory), then the files it was processing are reported as failed.
+
+    Parameters:
+        job: The job.
+        max_workers: The number of processes. Defaults to the number of CPUs (but not more than
+            the number of files). With a single worker, the files are processed in the current process.
+        force: Whether the outputs that are up to date should be computed again.
+        callback: It is called with the report of each file as soon as the file has been processed.
+
+    Returns:
+        The reports, in the order the files were processed.
+    """
+    max_workers = min(max_workers or os.cpu_count() or 1, len(job.files)) or 1
+    budget = planning.get_memory_budget(job.memory_budget)
+    if budget is not None:
+        job = job._replace(memory_budget=budget // max_workers)
+    reports: list[FileReport] = []
+
+    def collect(report: FileReport) -> None:
+        reports.append(report)
+        if callback is not None:
+            callback(report)
+
+    if max_workers == 1:
+        for path in job.files:
+            collect(process_file(job, path, force))
+        return reports
+    # "spawn", since forking a process with running threads (e.g. dask, numba) may deadlock
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = {executor.submit(process_file, job, path, force): path for path in job.files}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                report = future.result()
+            except Exception:
+                # `process_file()` doesn't raise, so the pool itself failed (e.g. `BrokenProcessPool`)
+                report = FileReport(futures[future], [], [], 0, 0.0, error=traceback.format_exc())
+            collect(report)
+    return reports
+
+
+def _get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="thalassa", description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    process = subparsers.add_parser("process", help="Process the files of a JSON job file")
+    process.add_argument("job", type=pathlib.Path, help="The JSON job file")
+    process.add_argument("-j", "--workers", type=int, default=None, help="The number of processes")
+    process.add_argument(
+        "-f", "--force", action="store_true", help="Process the outputs that are up to date, too"
+    )
+    process.add_argument("-v", "--verbose", action="store_true", help="Show logs and full tracebacks")
+    return parser
+
+
+def main(argv: T.Sequence[str] | None = None) -> int:
+    """The entry point of the ``thalassa`` command. Return the exit code."""
+    args = _get_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    try:
+        job = load_job(args.job)
+    except (OSError, ValueError) as exc:
+        print(f"Invalid job: {exc}", file=sys.stderr)
+        return 2
+    start = time.perf_counter()
+    reports = run(
+        job,
+        max_workers=args.workers,
+        force=args.force,
+        callback=lambda report: print(format_report(report, verbose=args.verbose), flush=True),
+    )
+    elapsed = time.perf_counter() - start
+    failures = sum(report.error is not None for report in reports)
+    nbytes = sum(report.nbytes for report in reports)
+    print(
+        f"{len(reports)} files, {failures} failed, {nbytes / 1024**2:.1f} MiB in {elapsed:.2f}s "
+        f"({nbytes / 1024**2 / elapsed if elapsed else 0:.1f} MiB/s)",
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
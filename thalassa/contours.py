@@ -0,0 +1,366 @@
+"""
+Vectorized extraction of isolines and filled contours from the node values of a mesh.
+
+Both algorithms operate directly on the triangles of the mesh (i.e. no regridding is needed):
+
+- Isolines are extracted with "marching triangles": every triangle whose nodes are on both sides
+  of the level contributes one segment, which connects the points where the level crosses its edges.
+  The segments are then merged into lines.
+- Filled contours are extracted by clipping every triangle against the lower and the upper bound
+  of each band. The clipped pieces form a coverage, so they are merged with
+  ``shapely.coverage_union_all()``.
+
+The point where a level crosses an edge is always interpolated from the vertex with the lowest value,
+so neighboring triangles produce bit-identical points on their shared edges.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import os
+import typing as T
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import geopandas
+    import numpy
+    import numpy.typing as npt
+    import xarray
+
+
+logger = logging.getLogger(__name__)
+
+CRS = "EPSG:4326"
+
+_Mesh = tuple["npt.NDArray[numpy.floating]", "npt.NDArray[numpy.floating]", "npt.NDArray[numpy.integer]"]
+
+
+def _interpolate(
+    coords_a: npt.NDArray[numpy.float64],
+    values_a: npt.NDArray[numpy.float64],
+    coords_b: npt.NDArray[numpy.float64],
+    values_b: npt.NDArray[numpy.float64],
+    level: float,
+) -> npt.NDArray[numpy.float64]:
+    """Return the points where `level` crosses the edges `a -> b`."""
+    import numpy as np
+
+    # Always interpolate from the lowest value, so that the result does not depend on the direction
+    swap = values_a > values_b
+    low_coords = np.where(swap[:, None], coords_b, coords_a)
+    high_coords = np.where(swap[:, None], coords_a, coords_b)
+    low_values = np.where(swap, values_b, values_a)
+    high_values = np.where(swap, values_a, values_b)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (level - low_values) / (high_values - low_values)
+    t = np.nan_to_num(t, nan=0.0)
+    return T.cast("npt.NDArray[numpy.float64]", low_coords + t[:, None] * (high_coords - low_coords))
+
+
+def _get_triangles(
+    mesh: _Mesh,
+    values: npt.ArrayLike,
+) -> tuple[npt.NDArray[numpy.float64], npt.NDArray[numpy.float64]]:
+    """Return the coordinates `(T, 3, 2)` and the values `(T, 3)` of the triangles without NaNs."""
+    import numpy as np
+
+    lon, lat, triface_nodes = mesh
+    values = np.asarray(values, dtype=np.float64)[triface_nodes]
+    valid = ~np.isnan(values).any(axis=1)
+    triface_nodes = triface_nodes[valid]
+    coords = np.stack((lon[triface_nodes], lat[triface_nodes]), axis=-1).astype(np.float64)
+    return coords, values[valid]
+
+
+def get_isoline_segments(mesh: _Mesh, values: npt.ArrayLike, level: float) -> npt.NDArray[numpy.float64]:
+    """
+    Return the segments of the isoline of `level` as an array with shape `(S, 2, 2)`.
+
+    Parameters:
+        mesh: A tuple with the ``lon``, ``lat`` and ``triface_nodes`` arrays.
+        values: The values on the nodes.
+        level: The level of the isoline.
+    """
+    import numpy as np
+
+    coords, values = _get_triangles(mesh, values)
+    above = values >= level
+    # The triangles whose nodes are all on the same side of the level do not contribute
+    crossing = above.any(axis=1) & ~above.all(axis=1)
+    coords = coords[crossing]
+    values = values[crossing]
+    above = above[crossing]
+    # Exactly two of the three edges are crossed; find them
+    start = np.arange(3)
+    end = (start + 1) % 3
+    crossed_edges = above[:, start] != above[:, end]
+    edges = np.argsort(~crossed_edges, axis=1, kind="stable")[:, :2]
+    rows = np.arange(len(coords))[:, None]
+    points = _interpolate(
+        coords[rows, start[edges]].reshape(-1, 2),
+        values[rows, start[edges]].ravel(),
+        coords[rows, end[edges]].reshape(-1, 2),
+        values[rows, end[edges]].ravel(),
+        level,
+    )
+    return points.reshape(-1, 2, 2)
+
+
+def _clip(
+    coords: npt.NDArray[numpy.float64],
+    values: npt.NDArray[numpy.float64],
+    counts: npt.NDArray[numpy.intp],
+    level: float,
+    keep_above: bool,
+) -> tuple[npt.NDArray[numpy.float64], npt.NDArray[numpy.float64], npt.NDArray[numpy.intp]]:
+    """
+    Clip many (padded) convex polygons against a level using the Sutherland-Hodgman algorithm.
+
+    When `keep_above` is ``True`` the parts where ``value >= level`` are kept,
+    otherwise the parts where ``value < level`` are kept.
+    """
+    import numpy as np
+
+    size, max_vertices = values.shape
+    out_coords = np.zeros((size, max_vertices + 1, 2))
+    out_values = np.zeros((size, max_vertices + 1))
+    out_counts = np.zeros(size, dtype=np.intp)
+    rows = np.arange(size)
+    inside = values >= level if keep_above else values < level
+    for i in range(max_vertices):
+        active = i < counts
+        j = np.where(i + 1 < counts, i + 1, 0)
+        current_inside = inside[:, i]
+        next_inside = inside[rows, j]
+        emit = active & current_inside
+        out_coords[rows[emit], out_counts[emit]] = coords[emit, i]
+        out_values[rows[emit], out_counts[emit]] = values[emit, i]
+        out_counts += emit
+        cross = active & (current_inside != next_inside)
+        cross_rows = rows[cross]
+        out_coords[cross_rows, out_counts[cross]] = _interpolate(
+            coords[cross, i],
+            values[cross, i],
+            coords[cross_rows, j[cross]],
+            values[cross_rows, j[cross]],
+            level,
+        )
+        out_values[cross_rows, out_counts[cross]] = level
+        out_counts += cross
+    return out_coords, out_values, out_counts
+
+
+def get_band_polygons(
+    mesh: _Mesh,
+    values: npt.ArrayLike,
+    lower: float,
+    upper: float,
+) -> npt.NDArray[numpy.object_]:
+    """
+    Return the pieces of the triangles where ``lower <= value < upper`` as ``shapely`` polygons.
+
+    Parameters:
+        mesh: A tuple with the ``lon``, ``lat`` and ``triface_nodes`` arrays.
+        values: The values on the nodes.
+        lower: The lower bound of the band. Use ``-numpy.inf`` for an unbounded band.
+        upper: The upper bound of the band. Use ``numpy.inf`` for an unbounded band.
+    """
+    import numpy as np
+    import shapely
+
+    coords, triangle_values = _get_triangles(mesh, values)
+    # Skip the triangles which are entirely outside of the band
+    relevant = (triangle_values.max(axis=1) >= lower) & (triangle_values.min(axis=1) < upper)
+    coords = coords[relevant]
+    triangle_values = triangle_values[relevant]
+    counts = np.full(len(triangle_values), 3, dtype=np.intp)
+    if np.isfinite(lower):
+        coords, triangle_values, counts = _clip(coords, triangle_values, counts, lower, keep_above=True)
+    if np.isfinite(upper):
+        coords, triangle_values, counts = _clip(coords, triangle_values, counts, upper, keep_above=False)
+    # `shapely.polygons()` needs the same number of vertices, so create the polygons per vertex count
+    polygons = []
+    for count in np.unique(counts[counts >= 3]):
+        polygons.append(shapely.polygons(coords[counts == count, :count]))
+    if not polygons:
+        return np.empty(0, dtype=object)
+    return T.cast("npt.NDArray[numpy.object_]", np.concatenate(polygons))
+
+
+def get_mesh(ds: xarray.Dataset) -> _Mesh:
+    return ds.lon.values, ds.lat.values, ds.triface_nodes.values
+
+
+def _extract(
+    mesh: _Mesh,
+    values: npt.NDArray[numpy.floating],
+    levels: T.Sequence[float],
+    filled: bool,
+) -> list[dict[str, T.Any]]:
+    import shapely
+
+    records = []
+    if filled:
+        for lower, upper in zip(levels[:-1], levels[1:]):
+            pieces = get_band_polygons(mesh, values, lower=lower, upper=upper)
+            geometry = shapely.coverage_union_all(pieces) if len(pieces) else shapely.Polygon()
+            records.append(dict(lower=lower, upper=upper, geometry=geometry))
+    else:
+        for level in levels:
+            segments = get_isoline_segments(mesh, values, level=level)
+            geometry = shapely.line_merge(shapely.multilinestrings(segments))
+            records.append(dict(level=level, geometry=geometry))
+    return records
+
+
+def _check_variable(ds: xarray.Dataset, variable: str, allowed: tuple[tuple[str, ...], ...]) -> None:
+    if ds[variable].dims not in allowed:
+        raise ValueError(
+            f"The dimensions of '{variable}' must be one of {allowed}, not: {ds[variable].dims}"
+        )
+
+
+def get_isolines(ds: xarray.Dataset, variable: str, levels: T.Sequence[float]) -> geopandas.GeoDataFrame:
+    """
+    Return the isolines of `variable` for each one of the `levels`.
+
+    Examples:
+        ``` python
+        import thalassa
+        from thalassa import contours
+
+        ds = thalassa.open_dataset("some_netcdf.nc")
+        gdf = contours.get_isolines(ds, variable="zeta_max", levels=[1.0, 2.0])
+        ```
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema".
+        variable: The variable; its only dimension must be ``node``.
+        levels: The levels of the isolines.
+
+    Returns:
+        A ``GeoDataFrame`` with one row per level, with columns ``level`` and ``geometry``.
+    """
+    import geopandas as gpd
+
+    _check_variable(ds, variable, (("node",),))
+    records = _extract(get_mesh(ds), ds[variable].values, levels=list(levels), filled=False)
+    return gpd.GeoDataFrame(records, geometry="geometry", crs=CRS)
+
+
+def get_filled_contours(
+    ds: xarray.Dataset,
+    variable: str,
+    levels: T.Sequence[float],
+) -> geopandas.GeoDataFrame:
+    """
+    Return the polygons where the values of `variable` are between consecutive `levels`.
+
+    For example, the flood extent above 1m is ``get_filled_contours(ds, "zeta_max", [1, numpy.inf])``.
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema".
+        variable: The variable; its only dimension must be ``node``.
+        levels: The bounds of the bands in increasing order. A band includes its lower bound,
+            but not its upper one.
+
+    Returns:
+        A ``GeoDataFrame`` with one row per band, with columns ``lower``, ``upper`` and ``geometry``.
+    """
+    import geopandas as gpd
+
+    _check_variable(ds, variable, (("node",),))
+    records = _extract(get_mesh(ds), ds[variable].values, levels=sorted(levels), filled=True)
+    return gpd.GeoDataFrame(records, geometry="geometry", crs=CRS)
+
+
+# The mesh of the worker processes. It is set once per process by `_init_worker()`,
+# so that it does not have to be pickled for every timestep.
+_worker_mesh: _Mesh | None = None
+
+
+def _init_worker(mesh: _Mesh) -> None:
+    global _worker_mesh
+    _worker_mesh = mesh
+
+
+def _extract_in_worker(
+    values: npt.NDArray[numpy.floating],
+    levels: T.Sequence[float],
+    filled: bool,
+) -> list[dict[str, T.Any]]:
+    if _worker_mesh is None:
+        raise RuntimeError("The worker has not been initialized with the mesh")
+    return _extract(_worker_mesh, values, levels=levels, filled=filled)
+
+
+def extract_contours(
+    ds: xarray.Dataset,
+    variable: str,
+    levels: T.Sequence[float],
+    *,
+    filled: bool = False,
+    max_workers: int | None = None,
+    path: str | os.PathLike[str] | None = None,
+    layer: str | None = None,
+) -> geopandas.GeoDataFrame:
+    """
+    Extract the isolines (or the filled contours) of every timestep of `variable` using a process pool.
+
+    Each timestep is loaded just before it is submitted to the pool and at most two timesteps per worker
+    are in flight, so the memory usage does not depend on the number of timesteps.
+
+    Examples:
+        ``` python
+        import thalassa
+        from thalassa import contours
+
+        ds = thalassa.open_dataset("some_netcdf.nc")
+        contours.extract_contours(ds, variable="zeta", levels=[1.0], path="surge.gpkg")
+        ```
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema".
+        variable: The variable; its dimensions must be ``("time", "node")`` or ``("node",)``.
+        levels: The levels of the isolines or the bounds of the bands (check `get_filled_contours()`).
+        filled: If ``True`` extract filled contours, otherwise extract isolines.
+        max_workers: The maximum number of processes. Defaults to the ``concurrent.futures`` default.
+        path: If provided, the result is also written to this GeoPackage.
+        layer: The name of the GeoPackage layer. Defaults to `variable`.
+
+    Returns:
+        A ``GeoDataFrame`` like the one of `get_isolines()` or `get_filled_contours()`,
+        with an additional ``time`` column if `variable` has a ``time`` dimension.
+    """
+    import geopandas as gpd
+
+    _check_variable(ds, variable, (("node",), ("time", "node")))
+    levels = sorted(levels) if filled else list(levels)
+    if ds[variable].dims == ("node",):
+        records = _extract(get_mesh(ds), ds[variable].values, levels=levels, filled=filled)
+    else:
+        records = []
+        no_timesteps = ds.sizes["time"]
+        max_workers = max_workers or os.cpu_count() or 1
+        max_in_flight = 2 * max_workers
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(get_mesh(ds),),
+        ) as executor:
+            futures: dict[int, concurrent.futures.Future[list[dict[str, T.Any]]]] = {}
+            for index in range(no_timesteps + max_in_flight):
+                if index < no_timesteps:
+                    values = ds[variable].isel(time=index).values
+                    futures[index] = executor.submit(_extract_in_worker, values, levels, filled)
+                # Collect the results in order, so that the output does not depend on scheduling
+                done = index - max_in_flight + 1
+                if 0 <= done < no_timesteps:
+                    timestamp = ds.time.values[done]
+                    for record in futures.pop(done).result():
+                        records.append(dict(time=timestamp, **record))
+    gdf = gpd.GeoDataFrame(records, geometry="geometry", crs=CRS)
+    if path is not None:
+        logger.debug("Writing contours to: %s", path)
+        gdf.to_file(path, layer=layer or variable, driver="GPKG")
+    return gdf
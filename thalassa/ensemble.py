@@ -0,0 +1,164 @@
+"""
+Lazy operations on ensemble members and forecast cycles that share the same mesh.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import typing as T
+
+from . import api
+from . import normalization
+from . import registry
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import xarray
+
+
+logger = logging.getLogger(__name__)
+
+MEMBER_DIM = "member"
+# Each chunk contains a single timestep of (at most) 100k nodes of a single member
+DEFAULT_CHUNKS = {"time": 1, "node": 100_000}
+# The geometry and the connectivity tables, which are only kept once, in `Ensemble.mesh`
+MESH_VARIABLES = (*registry.MESH_VARIABLES, normalization.CONNECTIVITY, "triface_face")
+
+
+class Ensemble:
+    """
+    A set of datasets (e.g. ensemble members or forecast cycles) that share the same mesh.
+
+    The meshes of the members are compared once, when the ensemble is created, and the geometry
+    is only kept once, in `mesh`. The variables of the members are stacked lazily along the
+    ``member`` dimension, so the statistics are computed chunk by chunk when they are plotted
+    or loaded. The results are datasets which reuse the arrays of `mesh`, so they can be passed
+    directly to `thalassa.plot()` or to `thalassa.api.get_raster()`.
+
+    The members are aligned on their common timesteps, i.e. when comparing forecast cycles,
+    only the overlapping period is used.
+
+    Examples:
+        ``` python
+        import thalassa
+        from thalassa.ensemble import Ensemble
+
+        ensemble = Ensemble.open(["cycle_00.nc", "cycle_06.nc"])
+        diff = ensemble.get_difference("zeta", "cycle_06", "cycle_00")
+        thalassa.plot(diff.isel(time=0), variable="zeta")
+        ```
+
+    Parameters:
+        members: The datasets, either as a mapping of names to datasets or as a sequence
+            (in which case the members are named ``"0"``, ``"1"``, etc).
+        chunks: The chunks that are used for the variables that are not already backed by ``dask``.
+
+    Raises:
+        ValueError: If the members do not share the same mesh.
+    """
+
+    def __init__(
+        self,
+        members: T.Mapping[str, xarray.Dataset] | T.Sequence[xarray.Dataset],
+        *,
+        chunks: dict[str, int] | None = DEFAULT_CHUNKS,
+    ) -> None:
+        if not isinstance(members, T.Mapping):
+            members = {str(i): ds for i, ds in enumerate(members)}
+        if not members:
+            raise ValueError("An ensemble needs at least one member")
+        fingerprints = {name: registry.get_mesh_fingerprint(ds) for name, ds in members.items()}
+        self.fingerprint = next(iter(fingerprints.values()))
+        mismatching = [
+            name for name, fingerprint in fingerprints.items() if fingerprint != self.fingerprint
+        ]
+        if mismatching:
+            raise ValueError(f"The meshes of these members differ from the first one: {mismatching}")
+        self.names = list(members)
+        self.chunks = chunks
+        first = next(iter(members.values()))
+        self.mesh = first[[name for name in MESH_VARIABLES if name in first.variables]]
+        # Keep the geometry only once
+        self._members = {
+            name: ds.drop_vars(list(MESH_VARIABLES), errors="ignore") for name, ds in members.items()
+        }
+
+    @classmethod
+    def open(
+        cls,
+        paths: T.Sequence[str | os.PathLike[str]],
+        names: T.Sequence[str] | None = None,
+        **kwargs: T.Any,
+    ) -> Ensemble:
+        """
+        Open the files with `thalassa.open_dataset()` and return an ensemble.
+
+        The members are named after the stems of the files, unless `names` are specified.
+        The `kwargs` are passed on to `thalassa.open_dataset()`.
+        """
+        import pathlib
+
+        if names is None:
+            names = [pathlib.Path(path).stem for path in paths]
+        return cls(dict(zip(names, (api.open_dataset(path, **kwargs) for path in paths), strict=True)))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _get_variable(self, name: str, variable: str) -> xarray.DataArray:
+        data: xarray.DataArray = self._members[name][variable]
+        if data.chunks is None and self.chunks:
+            data = data.chunk({dim: size for dim, size in self.chunks.items() if dim in data.dims})
+        return data
+
+    def _to_dataset(self, variable: str, result: xarray.DataArray, **attrs: T.Any) -> xarray.Dataset:
+        # A shallow copy, so the arrays of the mesh are not duplicated
+        ds: xarray.Dataset = self.mesh.copy(deep=False)
+        ds[variable] = result.drop_vars(list(MESH_VARIABLES), errors="ignore")
+        ds[variable].attrs = self._members[self.names[0]][variable].attrs | attrs
+        return ds
+
+    def get_stacked(self, variable: str) -> xarray.DataArray:
+        """Return the (lazy) values of `variable` of all the members, stacked along the ``member`` dimension."""
+        import pandas as pd
+        import xarray as xr
+
+        stacked = xr.concat(
+            [self._get_variable(name, variable) for name in self.names],
+            dim=pd.Index(self.names, name=MEMBER_DIM),
+            join="inner",
+            coords="minimal",
+            compat="override",
+        )
+        return stacked
+
+    def get_difference(self, variable: str, member: str, reference: str) -> xarray.Dataset:
+        """Return a dataset where `variable` is the difference ``member - reference``."""
+        import xarray as xr
+
+        data, reference_data = xr.align(
+            self._get_variable(member, variable),
+            self._get_variable(reference, variable),
+            join="inner",
+        )
+        return self._to_dataset(variable, data - reference_data, ensemble=f"{member} - {reference}")
+
+    def get_mean(self, variable: str) -> xarray.Dataset:
+        """Return a dataset where `variable` is the mean of the members."""
+        return self._to_dataset(variable, self.get_stacked(variable).mean(MEMBER_DIM), ensemble="mean")
+
+    def get_spread(self, variable: str) -> xarray.Dataset:
+        """Return a dataset where `variable` is the standard deviation of the members."""
+        return self._to_dataset(variable, self.get_stacked(variable).std(MEMBER_DIM), ensemble="spread")
+
+    def get_percentiles(self, variable: str, percentiles: T.Sequence[float]) -> xarray.Dataset:
+        """
+        Return a dataset where `variable` contains the `percentiles` (in ``[0, 100]``) of the members.
+
+        The percentiles are stored along the ``percentile`` dimension,
+        e.g. use ``.sel(percentile=90)`` before plotting.
+        """
+        stacked = self.get_stacked(variable).chunk({MEMBER_DIM: -1})
+        result = stacked.quantile([p / 100 for p in percentiles], dim=MEMBER_DIM, skipna=True)
+        result = result.rename(quantile="percentile").assign_coords(percentile=list(percentiles))
+        return self._to_dataset(variable, result, ensemble="percentiles")
@@ -0,0 +1,206 @@
+"""
+Follow the output files of running simulations, which keep appending new timesteps.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import pathlib
+import threading
+import typing as T
+
+from . import api
+from . import normalization
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import holoviews
+    import numpy
+    import numpy.typing as npt
+    import xarray
+
+
+logger = logging.getLogger(__name__)
+
+Subscriber = T.Callable[["xarray.Dataset", "npt.NDArray[numpy.datetime64]"], None]
+
+
+class DatasetFollower:
+    """
+    Keep a dataset in sync with an output file that is still being written.
+
+    The file is opened and normalized once. On every `refresh()`, if the file has changed, it is
+    re-opened lazily, the timesteps that are newer than the last known one are sliced out of its
+    time-dependent variables and they are appended to the dataset, i.e. the geometry is kept,
+    the mesh is not normalized again and the existing timesteps are not touched. When new timesteps
+    are found, `ds` is replaced with the updated dataset, the subscribers are called with it and
+    with the new timestamps and the `stream` is triggered.
+
+    !!! note
+
+        The datasets are immutable, so the objects that were created from the previous `ds`
+        (e.g. DynamicMaps, time rasters and their prefetchers) keep showing the previous timesteps.
+        Use `subscribe()` or `stream` to re-create them, or to extend their time widgets.
+
+    Examples:
+        ``` python
+        import thalassa
+
+        follower = thalassa.open_dataset("out2d_1.nc", follow=True)
+        follower.subscribe(lambda ds, new_times: print(f"New timesteps: {new_times}"))
+        follower.start(interval=30)
+        ...
+        follower.stop()
+        ```
+
+    !!! note
+
+        HDF5 (i.e. netCDF4) files that are being written may not be readable, unless file locking
+        is disabled with the ``HDF5_USE_FILE_LOCKING=FALSE`` environment variable.
+
+    In a panel application, prefer calling `refresh()` from a periodic callback, so that the
+    subscribers run on the thread of the bokeh document, e.g.
+    ``pn.state.add_periodic_callback(follower.refresh, period=30_000)``.
+
+    Parameters:
+        path: The path to the dataset file.
+        normalize: Check `thalassa.open_dataset()`.
+        compact: Check `thalassa.open_dataset()`. If the memory budget forces the compact dtypes,
+            then the appended timesteps use them, too.
+        kwargs: The ``kwargs`` are being passed through to `thalassa.open_dataset()`.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        normalize: bool = True,
+        compact: bool = False,
+        **kwargs: T.Any,
+    ) -> None:
+        self.path = pathlib.Path(path)
+        self.normalize = normalize
+        self.compact = compact
+        self.kwargs = kwargs
+        self._subscribers: list[Subscriber] = []
+        self._stream: holoviews.streams.Stream | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._stat = self._get_stat()
+        self.ds, plan = api._open_dataset(self.path, normalize=normalize, compact=compact, **kwargs)
+        # The plan may have switched to the compact dtypes in order to fit the memory budget
+        self.compact = plan.compact
+        # The geometry and everything else that does not change while the simulation is running
+        self._static = self.ds.drop_vars(
+            [name for name, var in self.ds.variables.items() if "time" in var.dims]
+        )
+
+    def _get_stat(self) -> tuple[int, int] | None:
+        # Directories (e.g. zarr stores) are always re-opened
+        if not self.path.is_file():
+            return None
+        stat = self.path.stat()
+        return stat.st_size, stat.st_mtime_ns
+
+    @property
+    def stream(self) -> holoviews.streams.Stream:
+        """A stream which is triggered with the number of timesteps whenever new timesteps are found."""
+        import holoviews as hv
+
+        if self._stream is None:
+            self._stream = hv.streams.Stream.define("DatasetUpdate", no_timesteps=0)(
+                no_timesteps=self.ds.sizes.get("time", 0),
+            )
+        return self._stream
+
+    def subscribe(self, callback: Subscriber) -> None:
+        """Call `callback(ds, new_times)` whenever new timesteps are found."""
+        self._subscribers.append(callback)
+
+    def _read_new_timesteps(self) -> xarray.Dataset:
+        """Re-open the file and return its time-dependent variables after the last known timestep."""
+        import xarray as xr
+
+        ds = api.open_dataset(self.path, normalize=False, **self.kwargs)
+        if self.normalize:
+            # Only rename the variables; the expensive part of the normalization
+            # (i.e. the triangulation of the mesh) is not needed again
+            ds = normalization.NORMALIZE_DISPATCHER[normalization.infer_format(ds)](ds)
+        variables = {
+            name: var
+            for name, var in ds.variables.items()
+            if "time" in var.dims and name in self.ds.variables
+        }
+        update = xr.Dataset(variables)
+        if self.ds.sizes.get("time", 0):
+            update = update.isel(time=update.time.values > self.ds.time.values.max())
+        if self.compact:
+            update = normalization.compact_dataset(update)
+        return update
+
+    def _append(self, update: xarray.Dataset) -> xarray.Dataset:
+        import xarray as xr
+
+        variables = {
+            name: xr.concat([self.ds[name], update[name]], dim="time").variable for name in update.variables
+        }
+        appended: xarray.Dataset = self._static.assign(variables)
+        return appended
+
+    def refresh(self) -> npt.NDArray[numpy.datetime64]:
+        """
+        Check the file for new timesteps and append them to `ds`.
+
+        Returns:
+            The timestamps of the new timesteps (which is empty if there are none).
+        """
+        import numpy as np
+
+        with self._lock:
+            stat = self._get_stat()
+            if stat is not None and stat == self._stat:
+                return np.array([], dtype="datetime64[ns]")
+            update = self._read_new_timesteps()
+            self._stat = stat
+            new_times: npt.NDArray[numpy.datetime64] = update.time.values
+            if not len(new_times):
+                return new_times
+            logger.info("%s: %d new timesteps", self.path, len(new_times))
+            ds = self._append(update)
+            self.ds = ds
+        for callback in self._subscribers:
+            try:
+                callback(ds, new_times)
+            except Exception:
+                logger.exception("Follow subscriber failed")
+        if self._stream is not None:
+            self._stream.event(no_timesteps=ds.sizes["time"])
+        return new_times
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception:
+                # The file may be in the middle of a write; try again later
+                logger.exception("Failed to refresh: %s", self.path)
+
+    def start(self, interval: float = 10.0) -> None:
+        """Call `refresh()` every `interval` seconds on a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(interval,),
+            name="thalassa-follow",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread that was started with `start()`."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,335 @@
+"""
+Lightweight instrumentation of the hot paths of thalassa.
+
+The hot paths (opening, normalizing, creating trimeshes, rasterizing, loading timeseries etc)
+are wrapped in named "spans". Each span records its duration, its parent span, the number of
+bytes that were read and, optionally, the peak memory that was allocated while it was active
+(for the spans of the main thread).
+Finished spans are passed to one or more "sinks".
+
+Instrumentation is disabled by default. When it is disabled, `span()` returns a shared no-op
+context manager, so the overhead is negligible.
+
+Examples:
+    ``` python
+    import thalassa
+    from thalassa import instrumentation
+
+    sink = instrumentation.InMemorySink()
+    instrumentation.enable(sink, track_memory=True)
+    ds = thalassa.open_dataset("some_netcdf.nc")
+    print(sink.summary())
+    ```
+"""
+
+from __future__ import annotations
+
+import collections
+import contextvars
+import dataclasses
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import typing as T
+
+
+logger = logging.getLogger(__name__)
+
+P = T.ParamSpec("P")
+R = T.TypeVar("R")
+
+
+@dataclasses.dataclass
+class SpanRecord:
+    """A finished span."""
+
+    name: str
+    start: float
+    duration: float
+    parent: str | None
+    depth: int
+    thread: str
+    bytes_read: int = 0
+    peak_memory: int | None = None
+    attributes: dict[str, T.Any] = dataclasses.field(default_factory=dict)
+
+
+class Sink(T.Protocol):
+    def emit(self, record: SpanRecord) -> None: ...  # pragma: no cover
+
+
+@dataclasses.dataclass
+class SpanStats:
+    count: int = 0
+    total: float = 0.0
+    min: float = float("inf")
+    max: float = 0.0
+    bytes_read: int = 0
+    peak_memory: int = 0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def update(self, record: SpanRecord) -> None:
+        self.count += 1
+        self.total += record.duration
+        self.min = min(self.min, record.duration)
+        self.max = max(self.max, record.duration)
+        self.bytes_read += record.bytes_read
+        self.peak_memory = max(self.peak_memory, record.peak_memory or 0)
+
+
+class InMemorySink:
+    """
+    Keep aggregated statistics per span name, plus the most recent spans.
+
+    Parameters:
+        max_records: The maximum number of the most recent spans which are kept.
+    """
+
+    def __init__(self, max_records: int = 1000) -> None:
+        self.records: collections.deque[SpanRecord] = collections.deque(maxlen=max_records)
+        self.stats: dict[str, SpanStats] = collections.defaultdict(SpanStats)
+        self._lock = threading.Lock()
+
+    def emit(self, record: SpanRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+            self.stats[record.name].update(record)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Return the aggregated statistics as a dictionary."""
+        with self._lock:
+            return {
+                name: dict(dataclasses.asdict(stats), mean=stats.mean) for name, stats in self.stats.items()
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self.records.clear()
+            self.stats.clear()
+
+
+class JSONLinesSink:
+    """
+    Write each span as a JSON object on a separate line.
+
+    Parameters:
+        path: The path of the output file. The file is opened in append mode.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self._file = open(path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def emit(self, record: SpanRecord) -> None:
+        line = json.dumps(dataclasses.asdict(record), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class PrometheusSink(InMemorySink):
+    """Aggregate the spans and render them using the Prometheus text exposition format."""
+
+    def render(self, prefix: str = "thalassa_span") -> str:
+        """Return the metrics as text, e.g. in order to serve them from a ``/metrics`` endpoint."""
+        metrics = [
+            ("duration_seconds_count", "counter", "Number of finished spans", "count"),
+            ("duration_seconds_sum", "counter", "Total duration of the spans in seconds", "total"),
+            ("duration_seconds_max", "gauge", "Maximum duration of the spans in seconds", "max"),
+            ("bytes_read_total", "counter", "Total number of bytes read within the spans", "bytes_read"),
+            ("peak_memory_bytes", "gauge", "Maximum peak memory allocated within the spans", "peak_memory"),
+        ]
+        summary = self.summary()
+        lines = []
+        for suffix, kind, help_text, key in metrics:
+            metric = f"{prefix}_{suffix}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, stats in sorted(summary.items()):
+                lines.append(f'{metric}{{span="{name}"}} {stats[key]}')
+        return "\n".join(lines) + "\n"
+
+
+class _Config:
+    enabled: bool = False
+    track_memory: bool = False
+    sinks: list[Sink] = []
+
+
+_config = _Config()
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("thalassa_span", default=None)
+
+
+def enable(*sinks: Sink, track_memory: bool = False) -> None:
+    """
+    Enable instrumentation and send the finished spans to `sinks`.
+
+    Parameters:
+        sinks: The sinks which will receive the finished spans.
+        track_memory: Boolean flag indicating whether the peak memory of the spans should be tracked.
+            This uses `tracemalloc` which has a significant overhead, so it should only be used
+            while profiling. The peak is process-wide, so it is only recorded for the spans of
+            the main thread (and it includes the allocations of any concurrent threads).
+    """
+    _config.sinks = list(sinks)
+    _config.track_memory = track_memory
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _config.enabled = True
+
+
+def disable() -> None:
+    """Disable instrumentation."""
+    _config.enabled = False
+    if _config.track_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _config.track_memory = False
+    _config.sinks = []
+
+
+def is_enabled() -> bool:
+    return _config.enabled
+
+
+class Span:
+    """An active span. Use `span()` in order to create one."""
+
+    def __init__(self, name: str, attributes: dict[str, T.Any]) -> None:
+        self.name = name
+        self.attributes = attributes
+        self.bytes_read = 0
+        self.parent: Span | None = None
+        self.depth = 0
+        self.start = 0.0
+        self._t1 = 0.0
+        self._peak = 0
+        self._start_memory = 0
+        self._track_memory = False
+        self._token: contextvars.Token[Span | None] | None = None
+
+    def record_bytes(self, nbytes: int) -> None:
+        """Add `nbytes` to the number of bytes that were read within the span."""
+        self.bytes_read += int(nbytes)
+
+    def set_attribute(self, key: str, value: T.Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> Span:
+        self.parent = _current_span.get()
+        self.depth = self.parent.depth + 1 if self.parent else 0
+        # The peak of `tracemalloc` is global, so resetting it from concurrent threads (e.g. the io pool
+        # or the prefetcher) would corrupt the peaks of each other. Only the main thread resets it.
+        self._track_memory = _config.track_memory and threading.current_thread() is threading.main_thread()
+        if self._track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.parent:
+                # Resetting the peak below would otherwise hide the peak of the parent
+                self.parent._peak = max(self.parent._peak, peak)
+            tracemalloc.reset_peak()
+            self._start_memory = current
+        self._token = _current_span.set(self)
+        self.start = time.time()
+        self._t1 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: T.Any) -> None:
+        duration = time.perf_counter() - self._t1
+        if self._token is not None:
+            _current_span.reset(self._token)
+        peak_memory = None
+        if self._track_memory and tracemalloc.is_tracing():
+            peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            if self.parent:
+                self.parent._peak = max(self.parent._peak, peak)
+            peak_memory = max(peak - self._start_memory, 0)
+        if self.parent:
+            self.parent.bytes_read += self.bytes_read
+        record = SpanRecord(
+            name=self.name,
+            start=self.start,
+            duration=duration,
+            parent=self.parent.name if self.parent else None,
+            depth=self.depth,
+            thread=threading.current_thread().name,
+            bytes_read=self.bytes_read,
+            peak_memory=peak_memory,
+            attributes=self.attributes,
+        )
+        for sink in _config.sinks:
+            try:
+                sink.emit(record)
+            except Exception:
+                logger.exception("Instrumentation sink failed: %r", sink)
+
+
+class _NullSpan:
+    """The span that is used when instrumentation is disabled."""
+
+    def __enter__(self) -> _NullSpan:
+        return self
+
+    def __exit__(self, *exc_info: T.Any) -> None:
+        pass
+
+    def record_bytes(self, nbytes: int) -> None:
+        pass
+
+    def set_attribute(self, key: str, value: T.Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **attributes: T.Any) -> Span | _NullSpan:
+    """
+    Return a context manager which records a span named `name`.
+
+    Examples:
+        ``` python
+        with instrumentation.span("load", node=10) as s:
+            data = ds.zeta.isel(node=10).load()
+            s.record_bytes(data.nbytes)
+        ```
+
+    Parameters:
+        name: The name of the span.
+        attributes: Arbitrary attributes which are attached to the span.
+    """
+    if not _config.enabled:
+        return _NULL_SPAN
+    return Span(name, attributes)
+
+
+def current_span() -> Span | _NullSpan:
+    """Return the active span of the current thread (or a no-op span if there is none)."""
+    if not _config.enabled:
+        return _NULL_SPAN
+    return _current_span.get() or _NULL_SPAN
+
+
+def instrumented(name: str) -> T.Callable[[T.Callable[P, R]], T.Callable[P, R]]:
+    """
+    Return a decorator which records a span named `name` for each call of the decorated function.
+    """
+
+    def decorator(func: T.Callable[P, R]) -> T.Callable[P, R]:
+        @functools.wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if not _config.enabled:
+                return func(*args, **kwargs)
+            with Span(name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
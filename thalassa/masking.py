@@ -0,0 +1,144 @@
+"""
+Masking of the inactive (i.e. dry or missing) parts of the mesh.
+
+Model outputs mark the dry nodes either with a fill value (e.g. ADCIRC uses ``-99999``),
+with ``NaN`` or with a separate wet/dry flag (e.g. SCHISM's ``wetdry_node``).
+The fill values are taken from the ``_FillValue``/``missing_value`` attributes; `DEFAULT_FILL_VALUES`
+are only used for the variables that do not declare any.
+An element is active only if all of its nodes are active.
+"""
+
+from __future__ import annotations
+
+import logging
+import typing as T
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import numpy
+    import numpy.typing as npt
+    import xarray
+
+
+logger = logging.getLogger(__name__)
+
+# Values which are used as fill values if none are declared in the attributes
+DEFAULT_FILL_VALUES = (-99999.0,)
+# Variables which flag the dry nodes with `1`
+WET_DRY_VARIABLES = ("wetdry_node",)
+
+
+def get_fill_values(data: xarray.DataArray) -> list[float]:
+    """Return the fill values of `data`, i.e. the declared ones or, if there are none, `DEFAULT_FILL_VALUES`."""
+    fill_values = []
+    for source in (data.attrs, data.encoding):
+        for key in ("_FillValue", "missing_value"):
+            if key in source and source[key] is not None:
+                fill_values.append(float(source[key]))
+    return fill_values or list(DEFAULT_FILL_VALUES)
+
+
+def _get_wet_dry_variable(
+    ds: xarray.Dataset, data: xarray.DataArray, dry_variable: str | None
+) -> str | None:
+    if dry_variable is not None:
+        return dry_variable
+    for name in WET_DRY_VARIABLES:
+        if name in ds and set(ds[name].dims) == set(data.dims):
+            return name
+    return None
+
+
+def get_active_nodes(
+    ds: xarray.Dataset,
+    variable: str,
+    *,
+    fill_values: T.Sequence[float] | None = None,
+    dry_variable: str | None = None,
+) -> xarray.DataArray:
+    """
+    Return a boolean array which is ``True`` for the nodes that are active.
+
+    A node is inactive if the value of `variable` is ``NaN`` or one of the `fill_values`,
+    or if it is flagged as dry by the `dry_variable`. The result has the same dimensions as `variable`
+    and it is lazy if `variable` is backed by ``dask``.
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema".
+        variable: The variable whose values are checked.
+        fill_values: The values which denote inactive nodes. Defaults to `get_fill_values()`.
+        dry_variable: A variable that is ``1`` on the dry nodes. Defaults to ``wetdry_node``,
+            if it exists and it has the same dimensions as `variable`.
+    """
+    data = ds[variable]
+    if fill_values is None:
+        fill_values = get_fill_values(data)
+    active: xarray.DataArray = data.notnull()
+    if fill_values:
+        active &= ~data.isin(list(fill_values))
+    dry_variable = _get_wet_dry_variable(ds, data, dry_variable)
+    if dry_variable is not None:
+        active &= ds[dry_variable] != 1
+    return active
+
+
+def get_active_elements_from_nodes(
+    active_nodes: npt.NDArray[numpy.bool_],
+    triface_nodes: npt.NDArray[numpy.integer],
+) -> npt.NDArray[numpy.bool_]:
+    """Return the mask of the active triangles given the mask of the active nodes (on the last axis)."""
+    # Avoid materializing an `(..., triface, 3)` array; combine the vertices one at a time
+    active = active_nodes[..., triface_nodes[:, 0]]
+    active &= active_nodes[..., triface_nodes[:, 1]]
+    active &= active_nodes[..., triface_nodes[:, 2]]
+    return active
+
+
+def get_active_elements(
+    ds: xarray.Dataset,
+    variable: str,
+    *,
+    fill_values: T.Sequence[float] | None = None,
+    dry_variable: str | None = None,
+) -> xarray.DataArray:
+    """
+    Return a boolean array which is ``True`` for the triangles whose nodes are all active.
+
+    The node dimension of `variable` is replaced by ``triface``, i.e. if `variable` has dimensions
+    ``("time", "node")``, then the masks of all the timesteps are computed at once, with dimensions
+    ``("time", "triface")``. If `variable` is backed by ``dask``, the masks are computed lazily, chunk by chunk.
+
+    Check `get_active_nodes()` for the parameters.
+    """
+    import xarray as xr
+
+    active_nodes = get_active_nodes(ds, variable, fill_values=fill_values, dry_variable=dry_variable)
+    active_elements: xarray.DataArray = xr.apply_ufunc(
+        get_active_elements_from_nodes,
+        active_nodes,
+        input_core_dims=[["node"]],
+        output_core_dims=[["triface"]],
+        kwargs=dict(triface_nodes=ds.triface_nodes.values),
+        dask="parallelized",
+        output_dtypes=[bool],
+        dask_gufunc_kwargs=dict(output_sizes={"triface": ds.sizes["triface"]}, allow_rechunk=True),
+    )
+    return active_elements
+
+
+def mask_inactive(
+    ds: xarray.Dataset,
+    variable: str,
+    *,
+    fill_values: T.Sequence[float] | None = None,
+    dry_variable: str | None = None,
+) -> xarray.Dataset:
+    """
+    Return a copy of `ds` where the values of `variable` on the inactive nodes are replaced by ``NaN``.
+
+    This way the fill values do not distort e.g. the color range of the plots.
+    Check `get_active_nodes()` for the parameters.
+    """
+    active_nodes = get_active_nodes(ds, variable, fill_values=fill_values, dry_variable=dry_variable)
+    ds = ds.copy()
+    ds[variable] = ds[variable].where(active_nodes)
+    return ds
@@ -9,6 +9,7 @@ if typing.TYPE_CHECKING:  # pragma: no cover
     import xarray
 
 from . import api
+from . import instrumentation
 from . import utils
 
 
@@ -186,7 +187,47 @@ NORMALIZE_DISPATCHER = {
 }
 
 
-def normalize(ds: xarray.Dataset) -> xarray.Dataset:
+_INT32_MAX = 2**31 - 1
+_COMPACT_INTEGER_VARS = ("triface_nodes", "triface_face", CONNECTIVITY)
+
+
+def compact_dataset(ds: xarray.Dataset, variables: typing.Iterable[str] = ()) -> xarray.Dataset:
+    """
+    Return a "compact" version of a normalized dataset.
+
+    In a compact dataset the connectivity tables are stored as `int32` while the ``lon``/``lat``
+    coordinates are stored as `float32`. This halves the memory footprint of the mesh, at the cost
+    of precision that is irrelevant for visualization (`float32` longitudes have a resolution that
+    is better than 2 meters). The other variables (e.g. ``depth`` or the vertical coordinates) are
+    only downcast to `float32` if they are explicitly listed in `variables`, since their precision
+    may matter for computations.
+
+    The conversion is only applied when it is safe to do so, i.e. integer variables are only
+    downcast if the number of nodes fits in `int32` and padded connectivity tables
+    which use `NaN` are left untouched. Lazily loaded variables remain lazy.
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema".
+        variables: The names of the additional `float64` variables which should be downcast to `float32`,
+            e.g. the variables that are only going to be visualized.
+    """
+    import numpy as np
+
+    updates = {}
+    if ds.sizes.get(NODE_DIM, 0) <= _INT32_MAX:
+        for name in _COMPACT_INTEGER_VARS:
+            if name in ds and np.issubdtype(ds[name].dtype, np.integer) and ds[name].dtype.itemsize > 4:
+                updates[name] = ds[name].astype(np.int32)
+    for name in (X_DIM, Y_DIM, *variables):
+        if name in ds.variables and ds[name].dtype == np.float64 and name not in ds.indexes:
+            updates[name] = ds[name].astype(np.float32)
+    if updates:
+        ds = ds.assign(updates)
+    return ds
+
+
+@instrumentation.instrumented("normalize")
+def normalize(ds: xarray.Dataset, compact: bool = False) -> xarray.Dataset:
     """
     Normalize the `dataset` i.e. convert it to the "Thalassa Schema".
 
@@ -202,27 +243,39 @@ def normalize(ds: xarray.Dataset) -> xarray.Dataset:
 
     Parameters:
         ds: The dataset we want to convert.
+        compact: Boolean flag indicating whether the dataset should use `int32` connectivity tables
+            and `float32` coordinates. Check `thalassa.normalization.compact_dataset()` for more info.
 
     """
     logger.debug("Dataset normalization: Started")
     fmt = infer_format(ds)
     normalizer_func = NORMALIZE_DISPATCHER[fmt]
     normalized_ds = normalizer_func(ds)
-    # Let's ensure that we use zero-based indices everywhere.
-    if normalized_ds[CONNECTIVITY].min() == 1:
-        normalized_ds[CONNECTIVITY] -= 1
-    # Handle quad elements
-    # Splitting quad elements to triangles, means that the number of faces increases
-    # There are two options:
-    # 1. We insert new faces and we keep on using `face_nodes`
-    # 2. We define a new variable and a new dimension which specifically address triangular elements
-    # I'd rather avoid altering the values of the provided netcdf file therefore we go for option #2,
-    # i.e. we create the `triface_nodes` variable.
-    if "triface_nodes" not in ds.data_vars:
-        if "max_no_vertices" in normalized_ds.dims and len(normalized_ds.max_no_vertices) == 4:
-            triface_nodes = utils.split_quads(normalized_ds.face_nodes.values)
-        else:
-            triface_nodes = normalized_ds.face_nodes.values
-        normalized_ds["triface_nodes"] = (("triface", "three"), triface_nodes)
+    if CONNECTIVITY in normalized_ds:
+        connectivity = normalized_ds[CONNECTIVITY]
+        face_nodes = connectivity.values
+        instrumentation.current_span().record_bytes(face_nodes.nbytes)
+        fill_value = connectivity.attrs.get("_FillValue")
+        valid = utils.get_valid_vertices(face_nodes, fill_value=fill_value)
+        # Let's ensure that we use zero-based indices everywhere.
+        # The padding values must be left untouched, otherwise they will no longer match `fill_value`
+        if valid.any() and face_nodes[valid].min() == 1:
+            face_nodes = face_nodes - valid.astype(face_nodes.dtype)
+            normalized_ds[CONNECTIVITY] = connectivity.copy(data=face_nodes)
+        # Handle non-triangular elements
+        # Splitting quad (or other polygonal) elements to triangles, means that the number of faces increases
+        # There are two options:
+        # 1. We insert new faces and we keep on using `face_nodes`
+        # 2. We define a new variable and a new dimension which specifically address triangular elements
+        # I'd rather avoid altering the values of the provided netcdf file therefore we go for option #2,
+        # i.e. we create the `triface_nodes` variable. We also keep the mapping between
+        # the triangles and the original faces in `triface_face`, so that face-centred
+        # data can be visualized, too.
+        if "triface_nodes" not in ds.data_vars:
+            triface_nodes, triface_face = utils.triangulate(face_nodes, fill_value=fill_value)
+            normalized_ds["triface_nodes"] = (("triface", "three"), triface_nodes)
+            normalized_ds["triface_face"] = (("triface",), triface_face)
+    if compact:
+        normalized_ds = compact_dataset(normalized_ds)
     logger.debug("Dataset normalization: Finished")
     return normalized_ds
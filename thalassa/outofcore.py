@@ -0,0 +1,314 @@
+"""
+Rasterization of meshes which are larger than the available memory.
+
+Contrary to `thalassa.api.create_trimesh()`, the nodes and the triangles of the mesh are never loaded
+at once. The triangles are sorted along a Hilbert curve of their centroids and split into spatially
+compact partitions, which are rasterized independently on a local ``dask`` scheduler. The partitions
+whose bounding box is outside of the plot are skipped without reading anything. Each partition only
+reads the nodes it needs (the coordinates, the connectivity and the values may be backed by ``dask``
+or by the lazily loaded variables of a file) and produces a partial aggregate. The partial aggregates
+are merged with a tree reduction, so the peak memory depends on the size of the partitions and on the
+size of the image, not on the size of the mesh. Only the centroids of the triangles and their order
+on the curve (32 bytes per triangle) are kept in memory while the partitions are computed.
+"""
+
+from __future__ import annotations
+
+import logging
+import typing as T
+
+from . import api
+from . import instrumentation
+from . import masking
+from . import normalization
+from . import reordering
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import holoviews
+    import numpy
+    import numpy.typing as npt
+    import xarray
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITION_SIZE = 1_000_000
+
+# The sum and the count of the values of each pixel
+_Partial = tuple["npt.NDArray[numpy.float64]", "npt.NDArray[numpy.uint32]"]
+
+
+class _CanvasSpec(T.NamedTuple):
+    x_range: tuple[float, float]
+    y_range: tuple[float, float]
+    width: int
+    height: int
+
+
+class _Partition(T.NamedTuple):
+    # The sorted indices of the triangles
+    triangles: npt.NDArray[numpy.intp]
+    # The web mercator bounding box of the triangles
+    x_range: tuple[float, float]
+    y_range: tuple[float, float]
+
+
+def _get_partitions(ds: xarray.Dataset, partition_size: int) -> list[_Partition]:
+    """Split the triangles into spatially compact partitions, reading the mesh `partition_size` triangles at a time."""
+    import numpy as np
+
+    no_triangles = ds.sizes["triface"]
+    centroid_lon = np.empty(no_triangles)
+    centroid_lat = np.empty(no_triangles)
+    # The maximum distance of a vertex from the centroid of its triangle
+    max_dlon = max_dlat = 0.0
+    with instrumentation.span("outofcore.partitions", triangles=no_triangles) as span:
+        for start in range(0, no_triangles, partition_size):
+            simplices = ds.triface_nodes.isel(triface=slice(start, start + partition_size)).values
+            nodes, inverse = np.unique(simplices, return_inverse=True)
+            subset = ds[["lon", "lat"]].isel(node=nodes)
+            lon = subset.lon.values.astype(np.float64)[inverse.reshape(simplices.shape)]
+            lat = subset.lat.values.astype(np.float64)[inverse.reshape(simplices.shape)]
+            span.record_bytes(simplices.nbytes + subset.lon.nbytes + subset.lat.nbytes)
+            stop = start + len(simplices)
+            centroid_lon[start:stop] = lon.mean(axis=1)
+            centroid_lat[start:stop] = lat.mean(axis=1)
+            max_dlon = max(max_dlon, float(np.abs(lon - centroid_lon[start:stop, None]).max(initial=0)))
+            max_dlat = max(max_dlat, float(np.abs(lat - centroid_lat[start:stop, None]).max(initial=0)))
+    order = np.argsort(reordering.hilbert_index(centroid_lon, centroid_lat), kind="stable")
+    transformer = api._get_transformer()
+    partitions = []
+    for start in range(0, no_triangles, partition_size):
+        # Sorted, so that each partition reads the file in order
+        triangles = np.sort(order[start : start + partition_size])
+        lon, lat = centroid_lon[triangles], centroid_lat[triangles]
+        x, y = transformer.transform(
+            [lon.min() - max_dlon, lon.max() + max_dlon],
+            np.clip([lat.min() - max_dlat, lat.max() + max_dlat], -90, 90),
+        )
+        partitions.append(_Partition(triangles, (float(x[0]), float(x[1])), (float(y[0]), float(y[1]))))
+    return partitions
+
+
+def _overlaps(partition: _Partition, spec: _CanvasSpec) -> bool:
+    return (
+        partition.x_range[0] <= spec.x_range[1]
+        and partition.x_range[1] >= spec.x_range[0]
+        and partition.y_range[0] <= spec.y_range[1]
+        and partition.y_range[1] >= spec.y_range[0]
+    )
+
+
+def _rasterize_partition(
+    ds: xarray.Dataset,
+    variable: str,
+    triangles: npt.NDArray[numpy.intp],
+    spec: _CanvasSpec,
+    fill_values: T.Sequence[float],
+) -> _Partial:
+    import datashader as dsh
+    import numpy as np
+    import pandas as pd
+
+    with instrumentation.span("outofcore.partition", triangles=len(triangles)) as span:
+        simplices = ds.triface_nodes.isel(triface=triangles).values
+        nodes, inverse = np.unique(simplices, return_inverse=True)
+        # A single read of the nodes of the partition
+        subset = ds[["lon", "lat", variable]].isel(node=nodes)
+        lon, lat = subset.lon.values, subset.lat.values
+        span.record_bytes(simplices.nbytes + lon.nbytes + lat.nbytes)
+        x, y = api._get_transformer().transform(lon, lat)
+        values = subset[variable].values.astype(np.float64)
+        span.record_bytes(values.nbytes)
+        values[np.isin(values, fill_values)] = np.nan
+        simplices = inverse.reshape(simplices.shape)
+        # datashader expects the triangles of a mesh to have the same winding
+        a, b, c = np.c_[x, y][simplices[0]]
+        winding = [0, 2, 1] if (b - a)[0] * (c - a)[1] - (b - a)[1] * (c - a)[0] >= 0 else [0, 1, 2]
+        vertex_index = simplices[:, winding].ravel()
+        mesh = pd.DataFrame({"x": x[vertex_index], "y": y[vertex_index], "z": values[vertex_index]})
+        canvas = dsh.Canvas(
+            plot_width=spec.width,
+            plot_height=spec.height,
+            x_range=spec.x_range,
+            y_range=spec.y_range,
+        )
+        # With a precomputed mesh, datashader only uses the columns of the vertices
+        vertices = mesh.iloc[:0]
+        # The partial means are merged as sums and counts. `Canvas.trimesh()` rejects `datashader.summary()`,
+        # so the two reductions need separate passes.
+        sums = canvas.trimesh(vertices, None, mesh=mesh, agg=dsh.sum("z")).values
+        counts = canvas.trimesh(vertices, None, mesh=mesh, agg=dsh.count("z")).values
+    # The pixels without values are NaN in the sums
+    return np.nan_to_num(sums), counts.astype(np.uint32)
+
+
+def _merge(first: _Partial, second: _Partial) -> _Partial:
+    return first[0] + second[0], first[1] + second[1]
+
+
+def _get_extent(ds: xarray.Dataset) -> tuple[tuple[float, float], tuple[float, float]]:
+    """Return the web mercator extent of the mesh, computing the bounds chunk by chunk."""
+    import numpy as np
+
+    transformer = api._get_transformer()
+    bounds = [float(ds.lon.min()), float(ds.lon.max()), float(ds.lat.min()), float(ds.lat.max())]
+    x, y = transformer.transform(bounds[:2], bounds[2:])
+    return api._get_padded_range(np.asarray(x)), api._get_padded_range(np.asarray(y))
+
+
+def rasterize(
+    ds: xarray.Dataset,
+    variable: str,
+    *,
+    x_range: tuple[float, float] | None = None,
+    y_range: tuple[float, float] | None = None,
+    width: int = 800,
+    height: int = 600,
+    partition_size: int = DEFAULT_PARTITION_SIZE,
+    max_workers: int | None = None,
+) -> xarray.DataArray:
+    """
+    Rasterize `variable` partition by partition and return the mean value of each pixel.
+
+    Examples:
+        ``` python
+        import thalassa
+        from thalassa import outofcore
+
+        ds = thalassa.open_dataset("huge.zarr", chunks={})
+        image = outofcore.rasterize(ds.isel(time=0), "zeta", width=1600, height=1200)
+        ```
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema".
+        variable: The variable; its only dimension must be ``node``.
+        x_range: The web mercator range of the x axis. Defaults to the extent of the mesh.
+        y_range: The web mercator range of the y axis. Defaults to the extent of the mesh.
+        width: The width of the image in pixels.
+        height: The height of the image in pixels.
+        partition_size: The number of triangles per partition.
+        max_workers: The number of threads of the ``dask`` scheduler. Defaults to the ``dask`` default.
+
+    Returns:
+        An array with dimensions ``("lat", "lon")`` and web mercator coordinates.
+        The pixels that are not covered by the mesh are ``NaN``.
+    """
+    if ds[variable].dims != (normalization.NODE_DIM,):
+        raise ValueError(f"The only dimension of '{variable}' must be 'node', not: {ds[variable].dims}")
+    if x_range is None or y_range is None:
+        default_x_range, default_y_range = _get_extent(ds)
+        x_range = x_range or default_x_range
+        y_range = y_range or default_y_range
+    spec = _CanvasSpec(x_range=x_range, y_range=y_range, width=width, height=height)
+    partitions = _get_partitions(ds, partition_size)
+    return _rasterize(ds, variable, partitions, spec=spec, max_workers=max_workers)
+
+
+def _rasterize(
+    ds: xarray.Dataset,
+    variable: str,
+    partitions: T.Sequence[_Partition],
+    spec: _CanvasSpec,
+    max_workers: int | None,
+) -> xarray.DataArray:
+    import numpy as np
+    import xarray as xr
+    from dask.delayed import delayed
+
+    fill_values = masking.get_fill_values(ds[variable])
+
+    # The dataset is captured by a closure, so that dask does not try to convert it to a graph
+    def rasterize_partition(triangles: npt.NDArray[numpy.intp]) -> _Partial:
+        return _rasterize_partition(ds, variable, triangles, spec=spec, fill_values=fill_values)
+
+    partials = [
+        delayed(rasterize_partition, pure=False)(partition.triangles)
+        for partition in partitions
+        if _overlaps(partition, spec)
+    ]
+    # A tree reduction, so that only a few partial images are in memory at any time
+    while len(partials) > 1:
+        merged = [delayed(_merge)(a, b) for a, b in zip(partials[::2], partials[1::2], strict=False)]
+        partials = merged + partials[len(merged) * 2 :]
+    with instrumentation.span("outofcore.rasterize", variable=variable):
+        result = partials[0].compute(scheduler="threads", num_workers=max_workers) if partials else None
+    x_range, y_range, width, height = spec
+    if result is None:
+        mean = np.full((height, width), np.nan)
+    else:
+        total, count = result
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, total / count, np.nan)
+    # The coordinates of the centers of the pixels, like datashader does
+    dx = (x_range[1] - x_range[0]) / width
+    dy = (y_range[1] - y_range[0]) / height
+    return xr.DataArray(
+        mean,
+        dims=("lat", "lon"),
+        coords=dict(
+            lon=np.linspace(x_range[0] + dx / 2, x_range[1] - dx / 2, width),
+            lat=np.linspace(y_range[0] + dy / 2, y_range[1] - dy / 2, height),
+        ),
+        name=variable,
+    )
+
+
+def get_raster(
+    ds: xarray.Dataset,
+    variable: str,
+    *,
+    partition_size: int = DEFAULT_PARTITION_SIZE,
+    max_workers: int | None = None,
+    title: str = "",
+    cmap: str = "plasma",
+    colorbar: bool = True,
+    clabel: str = "",
+    clim_min: float | None = None,
+    clim_max: float | None = None,
+    x_range: tuple[float, float] | None = None,
+    y_range: tuple[float, float] | None = None,
+) -> holoviews.DynamicMap:
+    """
+    Return a ``DynamicMap`` which is re-rasterized with `rasterize()` whenever the plot is zoomed or resized.
+
+    This is the out-of-core equivalent of `thalassa.api.get_raster()`.
+    Check `rasterize()` for the parameters.
+    """
+    import holoviews as hv
+
+    if ds[variable].dims != (normalization.NODE_DIM,):
+        raise ValueError(f"The only dimension of '{variable}' must be 'node', not: {ds[variable].dims}")
+    extent = _get_extent(ds)
+    # The partitions only depend on the mesh, so they are computed once for all the zoom levels
+    partitions = _get_partitions(ds, partition_size)
+
+    def callback(
+        x_range: tuple[float, float] | None,
+        y_range: tuple[float, float] | None,
+        width: int | None,
+        height: int | None,
+        scale: float = 1.0,
+    ) -> holoviews.Image:
+        spec = _CanvasSpec(
+            x_range=x_range or extent[0],
+            y_range=y_range or extent[1],
+            width=int((width or 400) * scale),
+            height=int((height or 400) * scale),
+        )
+        image = _rasterize(ds, variable, partitions, spec=spec, max_workers=max_workers)
+        return hv.Image(image, kdims=["lon", "lat"], vdims=[variable])
+
+    kwargs: dict[str, T.Any] = {}
+    api._resolve_ranges(x_range=x_range, y_range=y_range, kwargs=kwargs)
+    dmap = hv.DynamicMap(callback, streams=[hv.streams.RangeXY(**kwargs), hv.streams.PlotSize()])
+    return dmap.opts(
+        hv.opts.Image(
+            cmap=cmap,
+            clabel=clabel,
+            colorbar=colorbar,
+            clim=(clim_min, clim_max),
+            title=title or variable,
+            tools=["crosshair", "hover"],
+        ),
+    )
@@ -0,0 +1,213 @@
+"""
+Memory budget aware planning of the operations that may load large arrays in memory.
+
+The budget is resolved in this order:
+
+1. The `budget` argument of the function that is being called (e.g. ``open_dataset(..., memory_budget="8GB")``).
+2. The value set with `set_memory_budget()`.
+3. The ``THALASSA_MEMORY_BUDGET`` environment variable.
+4. Half of the physical memory of the machine.
+
+Given the budget, the operations pick the chunking and the dtypes of the arrays, they process
+the data in smaller batches or they switch to an out-of-core implementation. When none of these
+is possible, they raise `MemoryBudgetExceeded` instead of exhausting the memory.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import typing as T
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import xarray
+
+
+logger = logging.getLogger(__name__)
+
+MEMORY_BUDGET_ENV_VARIABLE = "THALASSA_MEMORY_BUDGET"
+# The fraction of the physical memory that is used when no budget has been set
+DEFAULT_MEMORY_FRACTION = 0.5
+# The fraction of the budget that a single chunk may use
+CHUNK_FRACTION = 1 / 8
+# The normalization creates the triangles from the faces, so the mesh needs more memory than it occupies on disk
+MESH_OVERHEAD = 2
+
+_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+_SIZE_REGEX = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*$", re.IGNORECASE)
+
+_memory_budget: int | None = None
+
+Budget = T.Union[int, str, None]
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """Raised when an operation would need more memory than the memory budget."""
+
+
+class Plan(T.NamedTuple):
+    """How a dataset should be opened."""
+
+    compact: bool
+    chunks: dict[str, int] | None
+
+
+class Chunking(T.NamedTuple):
+    """How many items each chunk should contain and how many chunks may be processed concurrently."""
+
+    size: int
+    parallelism: int
+
+
+def parse_size(size: int | str) -> int:
+    """Convert a size like ``"512MB"`` or ``"4GiB"`` to bytes. The units are powers of 1024."""
+    if isinstance(size, int):
+        return size
+    match = _SIZE_REGEX.match(size)
+    if match is None:
+        raise ValueError(f"Invalid size: {size!r}")
+    number, unit = match.groups()
+    return int(float(number) * _UNITS[unit.upper()])
+
+
+def format_size(nbytes: int) -> str:
+    """Convert a number of bytes to a human readable size like ``"512 bytes"``, ``"1.5 KiB"`` or ``"4.0 GiB"``."""
+    if nbytes < 1024:
+        return f"{nbytes} bytes"
+    for power, unit in ((1, "KiB"), (2, "MiB")):
+        if nbytes < 1024 ** (power + 1):
+            return f"{nbytes / 1024**power:.1f} {unit}"
+    return f"{nbytes / 1024**3:.1f} GiB"
+
+
+def _get_physical_memory() -> int | None:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def set_memory_budget(budget: Budget) -> None:
+    """Set the memory budget of the current process. Use ``None`` to revert to the default."""
+    global _memory_budget
+    _memory_budget = None if budget is None else parse_size(budget)
+
+
+def get_memory_budget(budget: Budget = None) -> int | None:
+    """Return the memory budget in bytes (or ``None`` if it can't be determined)."""
+    if budget is not None:
+        return parse_size(budget)
+    if _memory_budget is not None:
+        return _memory_budget
+    if os.environ.get(MEMORY_BUDGET_ENV_VARIABLE):
+        return parse_size(os.environ[MEMORY_BUDGET_ENV_VARIABLE])
+    physical_memory = _get_physical_memory()
+    if physical_memory is None:
+        return None
+    return int(physical_memory * DEFAULT_MEMORY_FRACTION)
+
+
+def fits(nbytes: int, budget: Budget = None) -> bool:
+    """Return `True` if `nbytes` fit in the memory budget."""
+    limit = get_memory_budget(budget)
+    return limit is None or nbytes <= limit
+
+
+def check(nbytes: int, operation: str, budget: Budget = None) -> None:
+    """
+    Raise `MemoryBudgetExceeded` if `nbytes` do not fit in the memory budget.
+
+    Parameters:
+        nbytes: The (estimated) memory that `operation` needs.
+        operation: The name of the operation; it is used in the error message.
+        budget: The memory budget. Check `get_memory_budget()`.
+    """
+    if not fits(nbytes, budget):
+        raise MemoryBudgetExceeded(
+            f"{operation} needs ~{format_size(nbytes)}, which exceeds the memory budget "
+            f"of {format_size(T.cast(int, get_memory_budget(budget)))}",
+        )
+
+
+def limit_chunk_size(size: int, item_nbytes: int, budget: Budget = None, parallelism: int = 1) -> Chunking:
+    """
+    Return the largest chunk size (up to `size`) so that `parallelism` chunks fit in the memory budget.
+
+    If not even a single item per chunk fits, then the parallelism gets reduced first.
+
+    Parameters:
+        size: The requested number of items per chunk.
+        item_nbytes: The memory that a single item (e.g. a timestep) needs.
+        budget: The memory budget. Check `get_memory_budget()`.
+        parallelism: The number of chunks that are processed concurrently.
+
+    Raises:
+        MemoryBudgetExceeded: If not even a single item fits.
+    """
+    limit = get_memory_budget(budget)
+    if limit is None:
+        return Chunking(size=size, parallelism=parallelism)
+    item_nbytes = max(item_nbytes, 1)
+    if item_nbytes * parallelism > limit:
+        check(item_nbytes, "Processing a single item", budget)
+        allowed_parallelism = limit // item_nbytes
+        logger.info(
+            "Reducing the parallelism from %d to %d due to the memory budget",
+            parallelism,
+            allowed_parallelism,
+        )
+        parallelism = allowed_parallelism
+    allowed = limit // (item_nbytes * parallelism)
+    if allowed < size:
+        logger.info("Reducing the chunk size from %d to %d due to the memory budget", size, allowed)
+    return Chunking(size=min(size, allowed), parallelism=parallelism)
+
+
+def plan_dataset(
+    ds: xarray.Dataset,
+    compact: bool = False,
+    budget: Budget = None,
+    normalize: bool = True,
+) -> Plan:
+    """
+    Return how a (lazily opened) dataset should be opened so that it fits in the memory budget.
+
+    - The mesh (i.e. the variables without a ``time`` dimension) gets loaded during the normalization.
+      If it doesn't fit, then the compact dtypes are used. If it doesn't fit even then,
+      `MemoryBudgetExceeded` is raised.
+    - If the time dependent variables don't fit, then they get chunked so that each chunk uses
+      at most `CHUNK_FRACTION` of the budget.
+
+    Parameters:
+        ds: The dataset, as returned by ``xarray.open_dataset()``.
+        compact: Whether the compact dtypes have been requested anyway.
+        budget: The memory budget. Check `get_memory_budget()`.
+        normalize: Whether the dataset will be normalized. If not, the mesh is not loaded either.
+    """
+    limit = get_memory_budget(budget)
+    if limit is None:
+        return Plan(compact=compact, chunks=None)
+    mesh_nbytes = sum(var.nbytes for var in ds.variables.values() if "time" not in var.dims)
+    data_nbytes = sum(var.nbytes for var in ds.variables.values() if "time" in var.dims)
+    if normalize:
+        mesh_nbytes *= MESH_OVERHEAD
+        if mesh_nbytes > limit and not compact:
+            # The values change (e.g. float64 becomes float32), so this should not go unnoticed
+            logger.warning(
+                "The mesh needs ~%s, which exceeds the memory budget of %s; using compact dtypes",
+                format_size(mesh_nbytes),
+                format_size(limit),
+            )
+            compact = True
+        if compact:
+            mesh_nbytes //= 2
+        check(mesh_nbytes, "Normalizing the mesh", budget)
+    else:
+        mesh_nbytes = 0
+    chunks = None
+    if "time" in ds.sizes and data_nbytes > limit - mesh_nbytes:
+        timestep_nbytes = data_nbytes // max(ds.sizes["time"], 1)
+        chunks = {"time": max(1, int(limit * CHUNK_FRACTION) // max(timestep_nbytes, 1))}
+        logger.info("The data do not fit in the memory budget; using chunks: %s", chunks)
+    return Plan(compact=compact, chunks=chunks)
@@ -22,6 +22,13 @@ def _sanity_check(ds: xarray.Dataset, variable: str) -> None:
             f"The dimensions of variable '{variable}' are: {ds[variable].dims}"
         )
         raise ValueError(msg)
+    if "layer" in dims:
+        msg = (
+            f"Variable '{variable}' has a 'layer' dimension. Please use the functions of `thalassa.vertical` "
+            f"(e.g. `select_surface()` or `depth_average()`) in order to remove it. "
+            f"Current dimensions are: {ds[variable].dims}"
+        )
+        raise ValueError(msg)
     if dims != ("node",):
         msg = (
             f"In order to plot variable '{variable}', the dataset must be filtered in such a way "
@@ -38,6 +45,7 @@ def plot_nodes(
     x_range: tuple[float, float] | None = None,
     y_range: tuple[float, float] | None = None,
     size: float = 4,
+    max_glyphs: int = api.DEFAULT_MAX_NODE_GLYPHS,
 ) -> holoviews.Overlay:
     """
     Plot the nodes of the mesh.
@@ -56,13 +64,18 @@ def plot_nodes(
         x_range: A tuple specifying the range of the longitudes of the plotted area
         y_range: A tuple specifying the range of the latitudes of the plotted area
         size: The size of the points in the plot
+        max_glyphs: The maximum number of nodes that are drawn as glyphs. When more nodes
+            are visible, they are rasterized instead (check `api.get_node_view()`).
 
     """
     import holoviews as hv
 
     ds = normalization.normalize(ds)
     tiles = api.get_tiles()
-    nodes = api.get_nodes(ds, x_range=x_range, y_range=y_range, hover=True, size=size)
+    if ds.sizes["node"] > max_glyphs:
+        nodes = api.get_node_view(ds, x_range=x_range, y_range=y_range, size=size, max_glyphs=max_glyphs)
+    else:
+        nodes = api.get_nodes(ds, x_range=x_range, y_range=y_range, hover=True, size=size)
     overlay = hv.Overlay((tiles, nodes)).opts(title=title).collate()
     return overlay
 
@@ -164,6 +177,7 @@ def plot(
         show_nodes: A boolean flag indicating whether the nodes should be overlaid on top of the data.
             Enabling this makes rendering slower.
         node_size: A float value indicating the size of the nodes. Only used if `show_nodes=True`.
+            When many nodes are visible, they are rasterized instead of being drawn as glyphs.
 
     """
     import holoviews as hv
@@ -189,7 +203,7 @@ def plot(
         mesh = api.get_wireframe(trimesh, x_range=x_range, y_range=y_range, hover=False)
         components.append(mesh)
     if show_nodes:
-        nodes = api.get_nodes(trimesh, x_range=x_range, y_range=y_range, hover=True, size=node_size)
+        nodes = api.get_node_view(trimesh, x_range=x_range, y_range=y_range, hover=True, size=node_size)
         components.append(nodes)
     overlay = hv.Overlay(components)
     dmap = overlay.collate()
@@ -202,6 +216,7 @@ def plot_ts(
     ds: xarray.Dataset,
     variable: str,
     source_plot: geoviews.DynamicMap,
+    asynchronous: bool = False,
 ) -> geoviews.DynamicMap:
     """
     Return a plot with the full timeseries of a specific node.
@@ -224,7 +239,10 @@ def plot_ts(
         variable: The dataset's variable which we want to visualize.
         source_plot: The plot instance which be used to select the coordinates of the node.
             Normally, you get this instance by calling `plot()`.
+        asynchronous: Boolean flag indicating whether the data should be loaded on a background
+            thread pool. Use this when serving the plots with panel/bokeh, in order to avoid
+            blocking the server while the timeseries gets loaded.
     """
     ds = normalization.normalize(ds)
-    ts = api.get_tap_timeseries(ds, variable, source_plot._raster)
+    ts = api.get_tap_timeseries(ds, variable, source_plot._raster, asynchronous=asynchronous)
     return ts
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import collections
+import concurrent.futures
+import contextlib
+import logging
+import threading
+import typing as T
+
+from . import instrumentation
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import numpy.typing as npt
+    import xarray
+
+
+logger = logging.getLogger(__name__)
+
+
+class TimestepPrefetcher:
+    """
+    Load the timesteps of a ``("time", ...)`` variable and prefetch the adjacent ones in the background.
+
+    Each time a timestep is requested with `get()`, the next and the previous `window` timesteps
+    are scheduled for loading on a background thread. The loaded arrays are kept in a bounded
+    buffer; when it is full, the timesteps that are farthest from the current one are evicted.
+
+    Examples:
+        ``` python
+        import thalassa
+        from thalassa.prefetch import TimestepPrefetcher
+
+        ds = thalassa.open_dataset("some_netcdf.nc")
+        prefetcher = TimestepPrefetcher(ds.zeta, window=2)
+        values = prefetcher.get(0)  # timesteps 1 and 2 are now being loaded in the background
+        ```
+
+    Parameters:
+        data: The variable. Its first dimension must be ``time``.
+        window: The number of timesteps before and after the current one that get prefetched.
+        capacity: The maximum number of timesteps in the buffer. Defaults to ``2 * window + 1``.
+    """
+
+    def __init__(self, data: xarray.DataArray, window: int = 2, capacity: int | None = None) -> None:
+        if data.dims[0] != "time":
+            raise ValueError(f"The first dimension of the variable must be 'time', not: {data.dims}")
+        self.data = data
+        self.size = data.sizes["time"]
+        self.window = window
+        self.capacity = max(capacity or 2 * window + 1, 1)
+        self.hits = 0
+        self.misses = 0
+        self._current = 0
+        self._buffer: collections.OrderedDict[int, npt.NDArray[T.Any]] = collections.OrderedDict()
+        self._pending: dict[int, concurrent.futures.Future[npt.NDArray[T.Any]]] = {}
+        self._lock = threading.Lock()
+        # A single thread, so that prefetching does not compete with the foreground for I/O
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="thalassa-prefetch",
+        )
+
+    def _load(self, index: int) -> npt.NDArray[T.Any]:
+        with instrumentation.span("prefetch.load", index=index) as span:
+            values: npt.NDArray[T.Any] = self.data.isel(time=index).values
+            span.record_bytes(values.nbytes)
+        return values
+
+    def _store(self, index: int, values: npt.NDArray[T.Any]) -> None:
+        # Must be called while holding the lock
+        self._buffer[index] = values
+        while len(self._buffer) > self.capacity:
+            farthest = max(self._buffer, key=lambda i: abs(i - self._current))
+            del self._buffer[farthest]
+
+    def _prefetch(self, index: int) -> npt.NDArray[T.Any]:
+        values = self._load(index)
+        with self._lock:
+            self._pending.pop(index, None)
+            # The user may have moved on while we were loading
+            if abs(index - self._current) <= self.window:
+                self._store(index, values)
+        return values
+
+    def _schedule(self, index: int) -> None:
+        # Must be called while holding the lock
+        for i, future in list(self._pending.items()):
+            if abs(i - index) > self.window and future.cancel():
+                del self._pending[i]
+        for offset in range(1, self.window + 1):
+            # Playback moves forward, so the next timesteps are scheduled first
+            for candidate in (index + offset, index - offset):
+                if (
+                    0 <= candidate < self.size
+                    and candidate not in self._buffer
+                    and candidate not in self._pending
+                ):
+                    self._pending[candidate] = self._executor.submit(self._prefetch, candidate)
+
+    def get(self, index: int) -> npt.NDArray[T.Any]:
+        """Return the values of timestep `index` and prefetch the adjacent ones."""
+        if not 0 <= index < self.size:
+            raise IndexError(f"Timestep index out of range: {index}")
+        with self._lock:
+            self._current = index
+            values = self._buffer.get(index)
+            future = self._pending.get(index)
+            if values is not None:
+                self.hits += 1
+                self._buffer.move_to_end(index)
+        prefetched = False
+        if values is None and future is not None:
+            # Already being loaded in the background
+            with contextlib.suppress(concurrent.futures.CancelledError):
+                values = future.result()
+                prefetched = True
+        loaded = values is None
+        if values is None:
+            values = self._load(index)
+        with self._lock:
+            # The statistics are only updated while holding the lock
+            self.hits += prefetched
+            self.misses += loaded
+            self._store(index, values)
+            self._schedule(index)
+        return values
+
+    def close(self) -> None:
+        """Cancel the pending loads and stop the background thread."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import atexit
+import functools
+import hashlib
+import logging
+import os
+import pathlib
+import tempfile
+import threading
+import typing as T
+import uuid
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import numpy
+    import numpy.typing as npt
+    import xarray
+
+
+logger = logging.getLogger(__name__)
+
+MESH_VARIABLES = ("lon", "lat", "triface_nodes")
+REGISTRY_ENV_VARIABLE = "THALASSA_MESH_REGISTRY"
+
+
+def _get_default_directory() -> pathlib.Path:
+    if REGISTRY_ENV_VARIABLE in os.environ:
+        return pathlib.Path(os.environ[REGISTRY_ENV_VARIABLE])
+    # On Linux `/dev/shm` is a RAM backed filesystem, i.e. memory mapping files that live there
+    # is equivalent to using shared memory, but without having to manage the lifetime of the segments.
+    shm = pathlib.Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return shm / "thalassa-meshes"
+    return pathlib.Path(tempfile.gettempdir()) / "thalassa-meshes"
+
+
+def get_mesh_fingerprint(ds: xarray.Dataset) -> str:
+    """
+    Return a string which uniquely identifies the geometry of the mesh of `ds`.
+
+    The fingerprint is a hash of the values, the shapes and the dtypes of
+    ``lon``, ``lat`` and ``triface_nodes``. Datasets which share the same mesh, e.g. different
+    output files of the same model, have the same fingerprint.
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema".
+    """
+    import numpy as np
+
+    hasher = hashlib.blake2b(digest_size=16)
+    for name in MESH_VARIABLES:
+        array = np.ascontiguousarray(ds[name].values)
+        hasher.update(f"{name}:{array.dtype.str}:{array.shape}".encode())
+        hasher.update(array.data.cast("B"))
+    return hasher.hexdigest()
+
+
+class MeshRegistry:
+    """
+    A registry of mesh geometries which can be shared between processes.
+
+    Each mesh is stored once, as a set of ``.npy`` files in a directory named after its fingerprint.
+    The files are attached read-only using memory mapping, so every process (and every dataset)
+    that uses the same mesh is backed by the same physical memory.
+    By default, the files are stored in `/dev/shm` (if available) or in the temporary directory.
+    The location can be overridden with the ``THALASSA_MESH_REGISTRY`` environment variable.
+
+    !!! note
+
+        The files outlive the processes that published them, so that other processes can keep attaching
+        them. Since `/dev/shm` is backed by RAM, the meshes keep using memory until they are removed
+        with `remove()`/`clear()` or until the machine reboots. Pass ``remove_at_exit=True`` to remove
+        the meshes that were published by this instance when the process exits. Processes that have
+        already attached them are not affected.
+
+    Examples:
+        ``` python
+        import thalassa
+        from thalassa.registry import MeshRegistry
+
+        registry = MeshRegistry()
+        ds1 = registry.share(thalassa.open_dataset("run1.nc"))
+        ds2 = registry.share(thalassa.open_dataset("run2.nc"))
+        ```
+
+    Parameters:
+        directory: The directory where the meshes are stored.
+        remove_at_exit: Whether the meshes that are published by this instance should be removed
+            when the process exits.
+    """
+
+    def __init__(
+        self, directory: str | os.PathLike[str] | None = None, remove_at_exit: bool = False
+    ) -> None:
+        self.directory = pathlib.Path(directory) if directory else _get_default_directory()
+        self._meshes: dict[str, dict[str, npt.NDArray[T.Any]]] = {}
+        self._published: set[str] = set()
+        self._lock = threading.Lock()
+        if remove_at_exit:
+            atexit.register(self.remove_published)
+
+    def _get_path(self, fingerprint: str, name: str) -> pathlib.Path:
+        return self.directory / fingerprint / f"{name}.npy"
+
+    def __contains__(self, fingerprint: str) -> bool:
+        return all(self._get_path(fingerprint, name).exists() for name in MESH_VARIABLES)
+
+    def publish(self, ds: xarray.Dataset) -> str:
+        """
+        Store the mesh of `ds` in the registry (if it is not already there) and return its fingerprint.
+        """
+        import numpy as np
+
+        fingerprint = get_mesh_fingerprint(ds)
+        if fingerprint in self:
+            return fingerprint
+        logger.debug("Publishing mesh: %s", fingerprint)
+        (self.directory / fingerprint).mkdir(parents=True, exist_ok=True)
+        for name in MESH_VARIABLES:
+            path = self._get_path(fingerprint, name)
+            if path.exists():
+                continue
+            # Write to a temporary file and rename it, so that other processes never see partial files.
+            # If multiple processes publish the same mesh concurrently, the last rename wins, but since
+            # the contents are identical this doesn't matter.
+            tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, "wb") as fd:
+                np.save(fd, np.ascontiguousarray(ds[name].values))
+            os.replace(tmp_path, path)
+        with self._lock:
+            self._published.add(fingerprint)
+        return fingerprint
+
+    def attach(self, fingerprint: str) -> dict[str, npt.NDArray[T.Any]]:
+        """
+        Return read-only, memory mapped arrays with the mesh variables of `fingerprint`.
+
+        Raises:
+            KeyError: If the mesh has not been published.
+        """
+        import numpy as np
+
+        with self._lock:
+            if fingerprint not in self._meshes:
+                if fingerprint not in self:
+                    raise KeyError(f"Mesh has not been published: {fingerprint}")
+                logger.debug("Attaching mesh: %s", fingerprint)
+                self._meshes[fingerprint] = {
+                    name: np.load(self._get_path(fingerprint, name), mmap_mode="r")
+                    for name in MESH_VARIABLES
+                }
+        return self._meshes[fingerprint]
+
+    def share(self, ds: xarray.Dataset) -> xarray.Dataset:
+        """
+        Return a copy of `ds` whose mesh variables are backed by the registry.
+
+        The data variables are not copied, only the mesh variables are replaced.
+
+        Parameters:
+            ds: A dataset that adheres to the "Thalassa Schema".
+        """
+        fingerprint = self.publish(ds)
+        arrays = self.attach(fingerprint)
+        ds = ds.copy(deep=False)
+        for name in MESH_VARIABLES:
+            # Assigning a Variable preserves the attributes and whether this is a coordinate or not
+            ds[name] = ds[name].variable.copy(deep=False, data=arrays[name])
+        return ds
+
+    def remove(self, fingerprint: str) -> None:
+        """Remove the mesh from the registry. Processes that have already attached it are not affected."""
+        with self._lock:
+            self._meshes.pop(fingerprint, None)
+            self._published.discard(fingerprint)
+        for name in MESH_VARIABLES:
+            self._get_path(fingerprint, name).unlink(missing_ok=True)
+        try:
+            (self.directory / fingerprint).rmdir()
+        except OSError:
+            pass
+
+    def remove_published(self) -> None:
+        """Remove the meshes that were published by this instance."""
+        with self._lock:
+            fingerprints = list(self._published)
+        for fingerprint in fingerprints:
+            self.remove(fingerprint)
+
+    def clear(self) -> None:
+        """Remove all the meshes of the registry, including the ones published by other processes."""
+        if not self.directory.is_dir():
+            return
+        for path in self.directory.iterdir():
+            if path.is_dir():
+                # Also remove the leftovers of interrupted writes
+                for tmp_path in path.glob("*.tmp"):
+                    tmp_path.unlink(missing_ok=True)
+                self.remove(path.name)
+
+
+@functools.cache
+def get_registry() -> MeshRegistry:
+    """Return the default `MeshRegistry` of the current process."""
+    return MeshRegistry()
+
+
+def share_mesh(ds: xarray.Dataset, registry: MeshRegistry | None = None) -> xarray.Dataset:
+    """
+    Return a copy of `ds` whose mesh is stored in shared memory.
+
+    This is useful when serving the same mesh from multiple worker processes or when multiple
+    datasets with the same mesh are open at the same time: The geometry is only kept in memory once.
+    The files are not removed automatically; check `MeshRegistry` for their lifetime.
+
+    Examples:
+        ``` python
+        import thalassa
+
+        ds = thalassa.open_dataset("some_netcdf.nc")
+        ds = thalassa.share_mesh(ds)
+        ```
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema".
+        registry: The registry to use. Defaults to the one returned by `get_registry()`.
+    """
+    if registry is None:
+        registry = get_registry()
+    return registry.share(ds)
+
+
+def is_shared(array: npt.NDArray[T.Any] | numpy.memmap[T.Any, T.Any]) -> bool:
+    """Return `True` if `array` is backed by a memory mapped file."""
+    import numpy as np
+
+    base: T.Any = array
+    while base is not None:
+        if isinstance(base, np.memmap):
+            return True
+        base = getattr(base, "base", None)
+    return False
@@ -0,0 +1,195 @@
+"""
+Remapping of the variables of a mesh to the nodes of another mesh, e.g. to compare the results of
+different versions of a model mesh.
+"""
+
+from __future__ import annotations
+
+import collections
+import logging
+import threading
+import typing as T
+
+from . import instrumentation
+from . import registry
+from . import utils
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import numpy
+    import numpy.typing as npt
+    import scipy.sparse
+    import xarray
+
+
+logger = logging.getLogger(__name__)
+
+WEIGHTS_CACHE_SIZE = 4
+
+_weights: collections.OrderedDict[
+    tuple[str, str], tuple[scipy.sparse.csr_array, npt.NDArray[numpy.bool_]]
+] = collections.OrderedDict()
+_weights_lock = threading.Lock()
+
+
+def _compute_weights(
+    source: xarray.Dataset,
+    target: xarray.Dataset,
+) -> tuple[scipy.sparse.csr_array, npt.NDArray[numpy.bool_]]:
+    import numpy as np
+    import scipy.sparse
+    import scipy.spatial
+
+    target_lon = target.lon.values.astype(np.float64)
+    target_lat = target.lat.values.astype(np.float64)
+    triangles, weights = utils.locate_points(source, target_lon, target_lat)
+    outside = triangles < 0
+    no_targets = len(target_lon)
+    rows = np.repeat(np.arange(no_targets), 3).reshape(-1, 3)
+    columns = source.triface_nodes.values[np.where(outside, 0, triangles)]
+    if outside.any():
+        # Fall back to the nearest source node
+        tree = scipy.spatial.cKDTree(np.column_stack([source.lon.values, source.lat.values]))
+        _, nearest = tree.query(np.column_stack([target_lon[outside], target_lat[outside]]))
+        columns[outside] = nearest[:, None]
+        weights[outside] = [1.0, 0.0, 0.0]
+    matrix = scipy.sparse.csr_array(
+        (weights.ravel(), (rows.ravel(), columns.ravel())),
+        shape=(no_targets, source.sizes["node"]),
+    )
+    matrix.eliminate_zeros()
+    return matrix, outside
+
+
+def get_weights(
+    source: xarray.Dataset,
+    target: xarray.Dataset,
+    source_fingerprint: str | None = None,
+    target_fingerprint: str | None = None,
+) -> tuple[scipy.sparse.csr_array, npt.NDArray[numpy.bool_]]:
+    """
+    Return the sparse interpolation matrix from the nodes of `source` to the nodes of `target`.
+
+    Each target node is located in the triangles of `source` and gets the barycentric weights of
+    the vertices of its triangle. The target nodes that are outside of the source mesh get the value
+    of the nearest source node. The weights of the last `WEIGHTS_CACHE_SIZE` pairs of meshes are cached
+    per pair of mesh fingerprints, so they are only computed once for all the datasets that share the same meshes.
+
+    Parameters:
+        source: A dataset that adheres to the "Thalassa Schema".
+        target: A dataset that adheres to the "Thalassa Schema".
+        source_fingerprint: The fingerprint of the mesh of `source`, if it is already known.
+        target_fingerprint: The fingerprint of the mesh of `target`, if it is already known.
+
+    Returns:
+        A ``(target_node, source_node)`` sparse matrix and a boolean array which is ``True``
+        for the target nodes which use the nearest node fallback.
+    """
+    key = (
+        source_fingerprint or registry.get_mesh_fingerprint(source),
+        target_fingerprint or registry.get_mesh_fingerprint(target),
+    )
+    with _weights_lock:
+        if key in _weights:
+            _weights.move_to_end(key)
+            return _weights[key]
+    with instrumentation.span("remap.weights", nodes=target.sizes["node"]):
+        result = _compute_weights(source, target)
+    with _weights_lock:
+        _weights[key] = result
+        while len(_weights) > WEIGHTS_CACHE_SIZE:
+            _weights.popitem(last=False)
+    return result
+
+
+class Remapper:
+    """
+    Remap the node variables of datasets that use the `source` mesh to the `target` mesh.
+
+    The interpolation weights are computed once (check `get_weights()`) and then any number
+    of variables and timesteps can be remapped with sparse matrix products.
+
+    Examples:
+        ``` python
+        import thalassa
+        from thalassa.remap import Remapper
+
+        old = thalassa.open_dataset("v1.nc")
+        new = thalassa.open_dataset("v2.nc")
+        remapped = Remapper(old, new).remap(old, ["zeta"])
+        difference = new.zeta - remapped.zeta
+        ```
+
+    Parameters:
+        source: A dataset with the mesh of the data that will be remapped.
+        target: A dataset with the mesh that the data will be remapped to.
+        time_chunk_size: The number of timesteps that are loaded and remapped at once.
+    """
+
+    def __init__(self, source: xarray.Dataset, target: xarray.Dataset, time_chunk_size: int = 24) -> None:
+        self.fingerprint = registry.get_mesh_fingerprint(source)
+        self.weights, self.outside = get_weights(source, target, source_fingerprint=self.fingerprint)
+        self.source_shape = (source.sizes["node"], source.triface_nodes.shape)
+        self.target = target[list(registry.MESH_VARIABLES)]
+        self.time_chunk_size = time_chunk_size
+        if self.outside.any():
+            logger.info("%d target nodes are outside of the source mesh", self.outside.sum())
+
+    def _remap_values(self, values: npt.NDArray[T.Any]) -> npt.NDArray[numpy.float64]:
+        """Remap an array whose first axis is ``node``."""
+        shape = values.shape
+        remapped = self.weights @ values.reshape(shape[0], -1)
+        return T.cast("npt.NDArray[numpy.float64]", remapped.reshape(self.weights.shape[0], *shape[1:]))
+
+    def remap_variable(self, data: xarray.DataArray) -> xarray.DataArray:
+        """Remap a variable with a ``node`` dimension, `time_chunk_size` timesteps at a time."""
+        import numpy as np
+        import xarray as xr
+
+        if "node" not in data.dims:
+            raise ValueError(f"The variable must have a 'node' dimension: {data.dims}")
+        original_dims = data.dims
+        dims = ("node", *(dim for dim in data.dims if dim != "node"))
+        data = data.transpose(*dims)
+        with instrumentation.span("remap", variable=data.name) as span:
+            if "time" in data.dims:
+                axis = dims.index("time")
+                chunks = []
+                for start in range(0, data.sizes["time"], self.time_chunk_size):
+                    values = data.isel(time=slice(start, start + self.time_chunk_size)).values
+                    span.record_bytes(values.nbytes)
+                    chunks.append(self._remap_values(values))
+                remapped = np.concatenate(chunks, axis=axis)
+            else:
+                values = data.values
+                span.record_bytes(values.nbytes)
+                remapped = self._remap_values(values)
+        coords = {name: coord for name, coord in data.coords.items() if "node" not in coord.dims}
+        result = xr.DataArray(remapped, dims=dims, coords=coords, name=data.name, attrs=data.attrs)
+        transposed: xarray.DataArray = result.transpose(*original_dims)
+        return transposed
+
+    def remap(self, ds: xarray.Dataset, variables: T.Iterable[str] | None = None) -> xarray.Dataset:
+        """
+        Return a dataset with the target mesh and the remapped `variables` of `ds`.
+
+        Parameters:
+            ds: A dataset with the source mesh.
+            variables: The variables to remap. Defaults to all the variables with a ``node`` dimension.
+
+        Raises:
+            ValueError: If the mesh of `ds` does not have the shape of the source mesh.
+        """
+        # Hashing the mesh on every call would cost as much as remapping a few timesteps,
+        # so only the shape of the mesh is checked.
+        if (ds.sizes["node"], ds.triface_nodes.shape) != self.source_shape:
+            raise ValueError("The mesh of the dataset is not the source mesh of the remapper")
+        if variables is None:
+            variables = [
+                str(name)
+                for name, data in ds.data_vars.items()
+                if "node" in data.dims and name not in registry.MESH_VARIABLES
+            ]
+        result: xarray.Dataset = self.target.copy(deep=False)
+        for variable in variables:
+            result[variable] = self.remap_variable(ds[variable])
+        return result
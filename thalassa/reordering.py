@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import logging
+import os
+import typing as T
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import numpy
+    import numpy.typing as npt
+    import xarray
+
+
+logger = logging.getLogger(__name__)
+
+ORIGINAL_NODE = "original_node"
+ORIGINAL_TRIFACE = "original_triface"
+ORIGINAL_FACE = "original_face"
+
+_CURVE_BITS = 16
+
+
+def _quantize(
+    x: npt.ArrayLike,
+    y: npt.ArrayLike,
+    bits: int,
+) -> tuple[npt.NDArray[numpy.uint64], npt.NDArray[numpy.uint64]]:
+    """Map the coordinates to integers in `[0, 2**bits)`."""
+    import numpy as np
+
+    result = []
+    for values in (np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)):
+        vmin = values.min(initial=np.inf)
+        vmax = values.max(initial=-np.inf)
+        scale = ((1 << bits) - 1) / (vmax - vmin) if vmax > vmin else 0
+        result.append(((values - vmin) * scale).astype(np.uint64))
+    return result[0], result[1]
+
+
+def _spread_bits(values: npt.NDArray[numpy.uint64]) -> npt.NDArray[numpy.uint64]:
+    """Insert a zero bit between each of the lower 32 bits of `values`."""
+    import numpy as np
+
+    values = values & np.uint64(0x00000000FFFFFFFF)
+    for shift, mask in (
+        (16, 0x0000FFFF0000FFFF),
+        (8, 0x00FF00FF00FF00FF),
+        (4, 0x0F0F0F0F0F0F0F0F),
+        (2, 0x3333333333333333),
+        (1, 0x5555555555555555),
+    ):
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+    return values
+
+
+def morton_index(x: npt.ArrayLike, y: npt.ArrayLike, bits: int = _CURVE_BITS) -> npt.NDArray[numpy.uint64]:
+    """
+    Return the position of each point on a Morton (Z-order) curve.
+
+    Parameters:
+        x: The x coordinates of the points (e.g. longitudes)
+        y: The y coordinates of the points (e.g. latitudes)
+        bits: The number of bits per dimension which are used to quantize the coordinates.
+    """
+    import numpy as np
+
+    qx, qy = _quantize(x, y, bits=bits)
+    return T.cast("npt.NDArray[numpy.uint64]", _spread_bits(qx) | (_spread_bits(qy) << np.uint64(1)))
+
+
+def hilbert_index(x: npt.ArrayLike, y: npt.ArrayLike, bits: int = _CURVE_BITS) -> npt.NDArray[numpy.uint64]:
+    """
+    Return the position of each point on a Hilbert curve.
+
+    The Hilbert curve has better locality than the Morton curve (there are no long "jumps"),
+    at the cost of being slightly more expensive to compute.
+
+    Parameters:
+        x: The x coordinates of the points (e.g. longitudes)
+        y: The y coordinates of the points (e.g. latitudes)
+        bits: The number of bits per dimension which are used to quantize the coordinates.
+    """
+    import numpy as np
+
+    qx, qy = _quantize(x, y, bits=bits)
+    n = np.uint64(1 << bits)
+    d = np.zeros_like(qx)
+    s = n >> np.uint64(1)
+    while s > 0:
+        rx = (qx & s) > 0
+        ry = (qy & s) > 0
+        d += s * s * ((np.uint64(3) * rx.astype(np.uint64)) ^ ry.astype(np.uint64))
+        # Rotate the quadrant
+        flip = ~ry & rx
+        qx = np.where(flip, n - np.uint64(1) - qx, qx)
+        qy = np.where(flip, n - np.uint64(1) - qy, qy)
+        qx, qy = np.where(ry, qx, qy), np.where(ry, qy, qx)
+        s >>= np.uint64(1)
+    return d
+
+
+CURVES = {
+    "hilbert": hilbert_index,
+    "morton": morton_index,
+}
+
+
+def _get_curve(method: str) -> T.Callable[..., npt.NDArray[numpy.uint64]]:
+    try:
+        return CURVES[method]
+    except KeyError:
+        raise ValueError(f"Unknown space filling curve: {method!r}. Please choose one of {list(CURVES)}")
+
+
+def _remap_connectivity(ds: xarray.Dataset, mapping: npt.NDArray[numpy.intp]) -> xarray.Dataset:
+    """Replace the node indices of the connectivity tables using `mapping`, i.e. `i -> mapping[i]`."""
+    import numpy as np
+
+    from . import normalization
+    from . import utils
+
+    ds["triface_nodes"] = ds.triface_nodes.copy(
+        data=mapping[ds.triface_nodes.values].astype(ds.triface_nodes.dtype, copy=False),
+    )
+    if normalization.CONNECTIVITY in ds:
+        connectivity = ds[normalization.CONNECTIVITY]
+        face_nodes = connectivity.values
+        valid = utils.get_valid_vertices(face_nodes, fill_value=connectivity.attrs.get("_FillValue"))
+        remapped = face_nodes.copy()
+        remapped[valid] = mapping[face_nodes[valid].astype(np.intp)]
+        ds[normalization.CONNECTIVITY] = connectivity.copy(data=remapped)
+    return ds
+
+
+def reorder(ds: xarray.Dataset, method: str = "hilbert") -> xarray.Dataset:
+    """
+    Reorder the nodes and the elements of the mesh along a space filling curve.
+
+    The output of the solvers usually has an arbitrary node/element order. This means that
+    a spatial subset (e.g. the current viewport or the result of `crop()`) touches indices
+    which are scattered over the whole file. After reordering, nodes and elements that are
+    close in space are also close on disk, which means that spatial subsets map to
+    a few contiguous chunks.
+
+    The connectivity tables are remapped accordingly, while the original indices are stored
+    in the ``original_node``, ``original_triface`` (and ``original_face``) variables.
+    Use `restore_original_order()` in order to undo the reordering.
+
+    Examples:
+        ``` python
+        import thalassa
+        from thalassa import reordering
+
+        ds = thalassa.open_dataset("some_netcdf.nc")
+        ds = reordering.reorder(ds, method="hilbert")
+        ```
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema".
+        method: The space filling curve to use. Either ``"hilbert"`` or ``"morton"``.
+    """
+    import numpy as np
+
+    from . import normalization
+
+    curve = _get_curve(method)
+    lon = ds.lon.values
+    lat = ds.lat.values
+    triface_nodes = ds.triface_nodes.values
+    node_order = np.argsort(curve(lon, lat), kind="stable")
+    # Sort the triangles using their centroids
+    centroid_lon = lon[triface_nodes].mean(axis=1)
+    centroid_lat = lat[triface_nodes].mean(axis=1)
+    triface_order = np.argsort(curve(centroid_lon, centroid_lat), kind="stable")
+    indexers = dict(node=node_order, triface=triface_order)
+    # The faces follow their triangles, i.e. they are sorted by the position of their first triangle
+    has_faces = normalization.FACE_DIM in ds.dims and "triface_face" in ds
+    if has_faces:
+        triface_face = ds.triface_face.values[triface_order]
+        _, first_appearance = np.unique(triface_face, return_index=True)
+        face_order = triface_face[np.sort(first_appearance)]
+        # Degenerate faces have no triangles; keep them at the end
+        missing_faces = np.setdiff1d(np.arange(ds.sizes[normalization.FACE_DIM]), face_order)
+        face_order = np.concatenate((face_order, missing_faces))
+        indexers[normalization.FACE_DIM] = face_order
+    ds = ds.isel(indexers)
+    # Remap the connectivity tables
+    new_node_index = np.empty_like(node_order)
+    new_node_index[node_order] = np.arange(len(node_order))
+    ds = _remap_connectivity(ds, new_node_index)
+    if has_faces:
+        face_order = indexers[normalization.FACE_DIM]
+        new_face_index = np.empty_like(face_order)
+        new_face_index[face_order] = np.arange(len(face_order))
+        ds["triface_face"] = ds.triface_face.copy(
+            data=new_face_index[ds.triface_face.values].astype(np.int32),
+        )
+        ds[ORIGINAL_FACE] = ((normalization.FACE_DIM,), face_order)
+    ds[ORIGINAL_NODE] = ((normalization.NODE_DIM,), node_order)
+    ds[ORIGINAL_TRIFACE] = (("triface",), triface_order)
+    return ds
+
+
+def restore_original_order(ds: xarray.Dataset) -> xarray.Dataset:
+    """
+    Undo the reordering that has been applied by `reorder()`.
+
+    Parameters:
+        ds: A dataset that has been returned by `reorder()`.
+    """
+    import numpy as np
+
+    from . import normalization
+
+    if ORIGINAL_NODE not in ds:
+        raise ValueError(f"The dataset has not been reordered. Variable {ORIGINAL_NODE!r} is missing.")
+    ds = ds.copy()
+    node_order = ds[ORIGINAL_NODE].values
+    indexers = dict(
+        node=np.argsort(node_order),
+        triface=np.argsort(ds[ORIGINAL_TRIFACE].values),
+    )
+    if ORIGINAL_FACE in ds:
+        face_order = ds[ORIGINAL_FACE].values
+        indexers[normalization.FACE_DIM] = np.argsort(face_order)
+        ds["triface_face"] = ds.triface_face.copy(data=face_order[ds.triface_face.values].astype(np.int32))
+    ds = _remap_connectivity(ds, node_order)
+    ds = ds.isel(indexers).drop_vars([ORIGINAL_NODE, ORIGINAL_TRIFACE, ORIGINAL_FACE], errors="ignore")
+    return ds
+
+
+def write_reordered(
+    ds: xarray.Dataset,
+    path: str | os.PathLike[str],
+    *,
+    method: str = "hilbert",
+    node_chunk_size: int = 100_000,
+    time_chunk_size: int = 24,
+    **kwargs: T.Any,
+) -> xarray.Dataset:
+    """
+    Reorder the mesh along a space filling curve and write the result to a ``zarr`` store.
+
+    The store is chunked along the ``node`` dimension, so that spatial subsets map to a few
+    contiguous chunks, and along the ``time`` dimension, so that a chunk does not hold
+    the whole timeseries of its nodes.
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema".
+        path: The path of the ``zarr`` store.
+        method: The space filling curve to use. Either ``"hilbert"`` or ``"morton"``.
+        node_chunk_size: The chunk size along the ``node`` dimension.
+        time_chunk_size: The chunk size along the ``time`` dimension.
+        kwargs: The ``kwargs`` are being passed through to ``xarray.Dataset.to_zarr``.
+
+    Returns:
+        The reordered dataset.
+    """
+    ds = reorder(ds, method=method)
+    # The encoding of the source file (e.g. netcdf chunksizes) is not necessarily valid for the new store
+    for var in ds.variables.values():
+        var.encoding = {}
+    chunk_sizes = {"node": node_chunk_size, "time": time_chunk_size}
+    chunks = {dim: chunk_sizes.get(str(dim), -1) for dim in ds.dims}
+    logger.debug("Writing reordered dataset to: %s", path)
+    ds.chunk(chunks).to_zarr(path, **({"mode": "w"} | kwargs))
+    return ds
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import logging
 import sys
 import time
@@ -7,6 +8,8 @@ import typing as T
 
 import decorator
 
+from . import planning
+
 
 if T.TYPE_CHECKING:  # pragma: no cover
     import geopandas
@@ -39,6 +42,7 @@ def resolve_bbox(
 def crop(
     ds: xarray.Dataset,
     bbox: shapely.Polygon,
+    memory_budget: planning.Budget = None,
 ) -> xarray.Dataset:
     """
     Crop the dataset using the provided `bbox`.
@@ -56,10 +60,20 @@ def crop(
     Parameters:
         ds: The dataset we want to crop.
         bbox: A Shapely polygon whose boundary will be used to crop `ds`.
+        memory_budget: The memory budget. Check `thalassa.planning`.
+
+    Raises:
+        MemoryBudgetExceeded: If the geometry of the mesh does not fit in the memory budget.
     """
     import numpy as np
     import numpy_indexed as npi
 
+    # The coordinates, the connectivity table and its remapped copy are loaded in memory
+    planning.check(
+        ds.lon.nbytes + ds.lat.nbytes + 2 * ds.triface_nodes.nbytes + ds.triface_nodes.size,
+        "Cropping",
+        memory_budget,
+    )
     bbox = resolve_bbox(bbox)
     indices_of_nodes_in_bbox = np.where(
         True
@@ -72,7 +86,7 @@ def crop(
         ds.triface_nodes.isin(indices_of_nodes_in_bbox).all(axis=1),
     )[0]
     ds = ds.isel(node=indices_of_nodes_in_bbox, triface=indices_of_triface_nodes_in_bbox)
-    remapped_nodes = np.arange(len(indices_of_nodes_in_bbox))
+    remapped_nodes = np.arange(len(indices_of_nodes_in_bbox), dtype=ds.triface_nodes.dtype)
     remapped_triface_nodes = np.c_[
         npi.remap(ds.triface_nodes[:, 0], indices_of_nodes_in_bbox, remapped_nodes),
         npi.remap(ds.triface_nodes[:, 1], indices_of_nodes_in_bbox, remapped_nodes),
@@ -88,7 +102,7 @@ def generate_thalassa_ds(
     lons: npt.NDArray[numpy.float64] | None = None,
     lats: npt.NDArray[numpy.float64] | None = None,
     time_range: pandas.DatetimeIndex | None = None,
-    **kwargs: dict[str, tuple[tuple[str], npt.NDArray[numpy.float64]]],
+    **kwargs: tuple[tuple[str, ...], npt.ArrayLike],
 ) -> xarray.Dataset:
     """Return a "thalassa" dataset"""
     import xarray as xr
@@ -105,9 +119,9 @@ def generate_thalassa_ds(
         "triface_nodes": (("triface", "three"), triface_nodes),
         **kwargs,
     }
-    if lons:
+    if lons is not None:
         data_vars["lon"] = (("node"), lons)
-    if lats:
+    if lats is not None:
         data_vars["lat"] = (("node"), lats)
     ds = xr.Dataset(
         coords=coords,
@@ -140,39 +154,107 @@ def filter_visualizable_data_vars(ds: xarray.Dataset, variables: T.Iterable[str]
     return visualizable
 
 
-def split_quads(face_nodes: npt.NDArray[numpy.int_]) -> npt.NDArray[numpy.int_]:
+def get_valid_vertices(
+    face_nodes: npt.NDArray[T.Any],
+    fill_value: float | None = None,
+) -> npt.NDArray[numpy.bool_]:
     """
-    https://gist.github.com/pmav99/5ded91f18ef096b080b2ed45598c7d1c
+    Return a boolean mask which is `True` for the entries of `face_nodes` that are actual vertices.
+
+    Faces with fewer vertices than ``max_no_vertices`` are padded with a fill value.
+    Floating point connectivity tables (e.g. the result of CF masking) use ``NaN`` as padding,
+    while integer ones use a sentinel value which is usually negative (e.g. ``-1`` or ``-99999``).
+
+    Parameters:
+        face_nodes: The connectivity table of the mesh.
+        fill_value: The value used for padding. If it is `None`, then ``NaN`` values
+            and negative integers are considered to be padding.
     """
     import numpy as np
-    import numpy.typing as npt
 
-    if face_nodes.shape[-1] != 4:
-        return face_nodes
-
-    # We assume that the nans only exist in the last column
-    # Therefore the first 3 columns are the existing triangles
-    existing_triangles = face_nodes[:, :3]
-
-    # Identify the quads. They are the rows with nan in the last column
-    # The nonzero() function is a speed optimization. With this, we only keep
-    # the index  values we care about, instead of the whole boolean array
-    quad_indexes = np.nonzero(~np.isnan(face_nodes).any(axis=1))
-    quads = face_nodes[quad_indexes]
-
-    # Create the new triangles
-    quads_first_column = quads[:, 0]
-    quads_last_two_columns = quads[:, -2:]
-    new_triangles = np.c_[quads_first_column, quads_last_two_columns]
-
-    # Append new triangles to the existing ones
-    # Also cast to the proper type for Mypy
-    new_face_nodes = T.cast(
-        npt.NDArray[np.int_],
-        np.r_[existing_triangles, new_triangles].astype(int),
-    )
-    return new_face_nodes
-    # return new_face_nodes.astype(int)
+    if np.issubdtype(face_nodes.dtype, np.floating):
+        valid = ~np.isnan(face_nodes)
+        if fill_value is not None and not np.isnan(fill_value):
+            valid &= face_nodes != fill_value
+    elif fill_value is None:
+        valid = face_nodes >= 0
+    else:
+        valid = face_nodes != fill_value
+    return T.cast("npt.NDArray[numpy.bool_]", valid)
+
+
+def triangulate(
+    face_nodes: npt.NDArray[T.Any],
+    fill_value: float | None = None,
+) -> tuple[npt.NDArray[numpy.int32], npt.NDArray[numpy.int32]]:
+    """
+    Split the faces of a mesh with up to ``max_no_vertices`` vertices into triangles.
+
+    Each face with `n` vertices is split into `n - 2` triangles using a fan triangulation
+    around its first vertex, i.e. a quad `(a, b, c, d)` becomes `(a, b, c)` and `(a, c, d)`.
+    The triangles are returned in the order of the faces they belong to and the output is
+    written in a single preallocated array. Padding is assumed to only exist after the
+    actual vertices of each face.
+
+    Examples:
+        ``` python
+        import numpy as np
+        from thalassa import utils
+
+        face_nodes = np.array([[0, 1, 2, -1], [1, 3, 4, 2]])
+        triface_nodes, triface_face = utils.triangulate(face_nodes)
+        # triface_nodes: [[0, 1, 2], [1, 3, 4], [1, 4, 2]]
+        # triface_face: [0, 1, 1]
+        ```
+
+    Parameters:
+        face_nodes: The connectivity table of the mesh with shape `(face, max_no_vertices)`.
+        fill_value: The value used for padding. Check `get_valid_vertices()` for more info.
+
+    Returns:
+        A tuple with the connectivity table of the triangles and an array which maps each
+        triangle to the index of the face it was created from. The latter can be used to
+        render face-centred data. Both arrays use `int32`, unless the node indices don't fit
+        in it, in which case `int64` is used for the connectivity table.
+    """
+    import numpy as np
+
+    no_faces, max_no_vertices = face_nodes.shape
+    if max_no_vertices < 3:
+        raise ValueError(f"Faces must have at least 3 vertices, not: {max_no_vertices}")
+    valid = get_valid_vertices(face_nodes, fill_value=fill_value)
+    no_vertices = valid.sum(axis=1, dtype=np.int32)
+    no_triangles = np.maximum(no_vertices - 2, 0)
+    total = int(no_triangles.sum())
+    max_index = np.max(face_nodes, where=valid, initial=0)
+    dtype = np.int32 if max_index <= np.iinfo(np.int32).max else np.int64
+    triface_nodes = np.empty((total, 3), dtype=dtype)
+    # The offset of the first triangle of each face in the output array
+    offsets = np.cumsum(no_triangles, dtype=np.int64) - no_triangles
+    # Fast path: all the faces have the same number of vertices, e.g. pure triangular meshes
+    is_uniform = total == no_faces * (max_no_vertices - 2)
+    for i in range(max_no_vertices - 2):
+        faces: slice | npt.NDArray[numpy.intp]
+        faces = slice(None) if is_uniform else np.flatnonzero(no_triangles > i)
+        rows = offsets[faces] + i
+        triface_nodes[rows, 0] = face_nodes[faces, 0]
+        triface_nodes[rows, 1] = face_nodes[faces, i + 1]
+        triface_nodes[rows, 2] = face_nodes[faces, i + 2]
+    triface_face = np.repeat(np.arange(no_faces, dtype=np.int32), no_triangles)
+    return triface_nodes, triface_face
+
+
+def split_quads(face_nodes: npt.NDArray[T.Any]) -> npt.NDArray[numpy.int32]:
+    """
+    Split the quad elements of the mesh into triangles.
+
+    This is a thin wrapper around `triangulate()` which is kept for backwards compatibility.
+    Contrary to older versions, the triangles are returned in the order of their faces.
+
+    https://gist.github.com/pmav99/5ded91f18ef096b080b2ed45598c7d1c
+    """
+    triface_nodes, _ = triangulate(face_nodes)
+    return triface_nodes
 
 
 def get_index_of_nearest_node(ds: xarray.Dataset, lon: float, lat: float) -> int:
@@ -183,9 +265,230 @@ def get_index_of_nearest_node(ds: xarray.Dataset, lon: float, lat: float) -> int
     return index_of_nearest_node
 
 
+def _get_barycentric_weights(
+    x: npt.NDArray[numpy.float64],
+    y: npt.NDArray[numpy.float64],
+    px: npt.NDArray[numpy.float64],
+    py: npt.NDArray[numpy.float64],
+    candidates: npt.NDArray[numpy.intp],
+) -> tuple[npt.NDArray[numpy.intp], npt.NDArray[numpy.float64]]:
+    """Return the first of the `candidates` triangles that contains each point and the weights of its vertices."""
+    import numpy as np
+
+    x0, x1, x2 = (x[candidates, i] for i in range(3))
+    y0, y1, y2 = (y[candidates, i] for i in range(3))
+    dx, dy = px[:, None] - x2, py[:, None] - y2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        det = (y1 - y2) * (x0 - x2) + (x2 - x1) * (y0 - y2)
+        w0 = ((y1 - y2) * dx + (x2 - x1) * dy) / det
+        w1 = ((y2 - y0) * dx + (x0 - x2) * dy) / det
+    weights = np.stack([w0, w1, 1 - w0 - w1], axis=-1)
+    inside: npt.NDArray[numpy.bool_] = np.all(weights >= -1e-9, axis=-1)
+    first = inside.argmax(axis=1)
+    rows = np.arange(len(px))
+    found = inside[rows, first]
+    triangles = np.where(found, candidates[rows, first], -1)
+    return triangles, np.where(found[:, None], weights[rows, first], np.nan)
+
+
+def locate_points(
+    ds: xarray.Dataset,
+    lon: npt.ArrayLike,
+    lat: npt.ArrayLike,
+    k: int = 8,
+) -> tuple[npt.NDArray[numpy.intp], npt.NDArray[numpy.float64]]:
+    """
+    Return the triangles that contain the points and the barycentric weights of their vertices.
+
+    The candidate triangles of each point are the `k` triangles whose centroids are nearest to it.
+    On skewed meshes the containing triangle may not be among them, so for the points which are
+    not inside any of their candidates, `k` is doubled until either the triangle is found or the
+    remaining centroids are too far for their triangles to contain the point. The points which are
+    not inside any triangle (e.g. points outside of the mesh) get the triangle index ``-1`` and
+    ``NaN`` weights.
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema".
+        lon: The longitudes of the points.
+        lat: The latitudes of the points.
+        k: The initial number of candidate triangles per point.
+
+    Returns:
+        The triangle indices with shape ``(n,)`` and the weights with shape ``(n, 3)``.
+        The values at the points are given by ``(weights * values[triface_nodes[triangles]]).sum(axis=1)``.
+    """
+    import numpy as np
+    import scipy.spatial
+
+    px = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+    py = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+    triface_nodes = ds.triface_nodes.values
+    x = ds.lon.values.astype(np.float64)[triface_nodes]
+    y = ds.lat.values.astype(np.float64)[triface_nodes]
+    cx, cy = x.mean(axis=1), y.mean(axis=1)
+    tree = scipy.spatial.cKDTree(np.column_stack([cx, cy]))
+    # A triangle can only contain the points which are within this distance from its centroid
+    radius = float(np.hypot(x - cx[:, None], y - cy[:, None]).max()) if len(triface_nodes) else 0.0
+    triangles = np.full(len(px), -1, dtype=np.intp)
+    weights = np.full((len(px), 3), np.nan)
+    pending = np.arange(len(px))
+    k = min(k, len(triface_nodes))
+    while len(pending) and k:
+        distances, candidates = tree.query(np.column_stack([px[pending], py[pending]]), k=k)
+        distances = distances.reshape(len(pending), k)
+        candidates = candidates.reshape(len(pending), k)
+        found_triangles, found_weights = _get_barycentric_weights(
+            x, y, px[pending], py[pending], candidates
+        )
+        found = found_triangles >= 0
+        triangles[pending[found]] = found_triangles[found]
+        weights[pending[found]] = found_weights[found]
+        if k == len(triface_nodes):
+            break
+        pending = pending[~found & (distances[:, -1] <= radius)]
+        k = min(2 * k, len(triface_nodes))
+    return triangles, weights
+
+
+def get_decimated_indices(
+    x: npt.NDArray[T.Any],
+    y: npt.NDArray[T.Any],
+    no_bins: int,
+    x_range: tuple[T.Any, T.Any] | None = None,
+) -> npt.NDArray[numpy.intp]:
+    """
+    Return the indices of the points that preserve the shape of a curve when it is drawn `no_bins` pixels wide.
+
+    The points within `x_range` are split into `no_bins` bins with the same number of points
+    and the first, the last, the minimum and the maximum point of each bin are kept.
+    This way the peaks are never lost, no matter how long the curve is.
+    The points right before and right after `x_range` are kept too, so that the curve
+    reaches the edges of the plot.
+
+    Parameters:
+        x: The sorted x values of the curve, e.g. the timestamps.
+        y: The y values of the curve. ``NaN`` values are ignored when looking for the extrema.
+        no_bins: The number of bins, usually the width of the plot in pixels.
+        x_range: The visible range of `x`. Defaults to the whole curve.
+    """
+    import numpy as np
+
+    start, stop = 0, len(x)
+    if x_range is not None and None not in x_range:
+        lower, upper = np.asarray(x_range).astype(x.dtype)
+        start = max(int(np.searchsorted(x, lower, side="left")) - 1, 0)
+        stop = min(int(np.searchsorted(x, upper, side="right")) + 1, len(x))
+    count = stop - start
+    if count <= 4 * no_bins:
+        return np.arange(start, stop)
+    bin_size = -(-count // no_bins)
+    padded = np.full(-(-count // bin_size) * bin_size, np.nan)
+    padded[:count] = y[start:stop]
+    bins = padded.reshape(-1, bin_size)
+    is_nan = np.isnan(bins)
+    offsets = np.arange(len(bins)) * bin_size
+    indices = np.concatenate(
+        [
+            offsets,
+            np.minimum(offsets + bin_size, count) - 1,
+            offsets + np.where(is_nan, np.inf, bins).argmin(axis=1),
+            offsets + np.where(is_nan, -np.inf, bins).argmax(axis=1),
+        ],
+    )
+    return T.cast("npt.NDArray[numpy.intp]", np.unique(indices) + start)
+
+
+def _find_elements_crossing_idl(
+    triface_nodes: npt.NDArray[numpy.integer],
+    lon: npt.NDArray[numpy.floating],
+    max_lon: float,
+    out: npt.NDArray[numpy.bool_],
+) -> None:
+    # A single pass over the elements which allocates nothing.
+    # It gets compiled by numba (check `_get_idl_kernel()`)
+    for i in range(triface_nodes.shape[0]):
+        lon_a = lon[triface_nodes[i, 0]]
+        lon_b = lon[triface_nodes[i, 1]]
+        lon_c = lon[triface_nodes[i, 2]]
+        out[i] = (
+            (lon_a * lon_b < 0 and abs(lon_a - lon_b) >= max_lon)
+            or (lon_a * lon_c < 0 and abs(lon_a - lon_c) >= max_lon)
+            or (lon_b * lon_c < 0 and abs(lon_b - lon_c) >= max_lon)
+        )
+
+
+@functools.cache
+def _get_idl_kernel() -> T.Callable[..., None]:
+    import numba
+
+    return T.cast("T.Callable[..., None]", numba.njit(cache=True, nogil=True)(_find_elements_crossing_idl))
+
+
+def get_elements_crossing_idl(ds: xarray.Dataset, max_lon: float = 10) -> npt.NDArray[numpy.bool_]:
+    """
+    Return a boolean mask which is ``True`` for the triface elements that cross the International Date Line.
+
+    Check `drop_elements_crossing_idl()` for the rules that are being used.
+    """
+    import numpy as np
+
+    if max_lon <= 0:
+        raise ValueError(f'Maximum longitudinal "distance" must be positive: {max_lon}')
+    triface_nodes = ds.triface_nodes.values
+    mask = np.empty(len(triface_nodes), dtype=bool)
+    _get_idl_kernel()(triface_nodes, ds.lon.values, max_lon, mask)
+    return mask
+
+
+def _split_elements_crossing_idl(ds: xarray.Dataset, crossing: npt.NDArray[numpy.bool_]) -> xarray.Dataset:
+    """
+    Make the elements that cross the IDL use copies of their western nodes, shifted by 360 degrees.
+
+    Only the elements whose longitudes span more than 180 degrees are wrapped; the other ones
+    are false positives of the rules of `drop_elements_crossing_idl()` and they are left as they are.
+    The copies of the wrapped nodes are appended to the node variables. This is lazy for the
+    variables which are backed by ``dask``, while the rest of the node variables get copied.
+    """
+    import numpy as np
+    import xarray as xr
+
+    triface_nodes = ds.triface_nodes.values
+    lon = ds.lon.values
+    element_lons = lon[triface_nodes]
+    crossing = crossing & (element_lons.max(axis=1) - element_lons.min(axis=1) > 180)
+    if not crossing.any():
+        copied: xarray.Dataset = ds.copy()
+        return copied
+    crossing_nodes = triface_nodes[crossing]
+    western = lon[crossing_nodes] < 0
+    wrapped_nodes = np.unique(crossing_nodes[western])
+    no_nodes = ds.sizes["node"]
+    variables = {}
+    for name, var in ds.variables.items():
+        if name == "node":
+            var = xr.Variable("node", np.arange(no_nodes + len(wrapped_nodes)), var.attrs)
+        elif "node" in var.dims:
+            data = xr.DataArray(var)
+            appended = data.isel(node=wrapped_nodes)
+            if name == "lon":
+                appended = appended.copy(data=appended.data + 360)
+            var = xr.concat([data, appended], dim="node").variable
+        variables[name] = var
+    crossing_nodes[western] = no_nodes + np.searchsorted(wrapped_nodes, crossing_nodes[western])
+    triface_nodes = triface_nodes.copy()
+    triface_nodes[crossing] = crossing_nodes
+    variables["triface_nodes"] = ds.triface_nodes.variable.copy(data=triface_nodes)
+    return xr.Dataset(
+        data_vars={name: variables[name] for name in ds.data_vars},
+        coords={name: variables[name] for name in ds.coords},
+        attrs=ds.attrs,
+    )
+
+
 def drop_elements_crossing_idl(
     ds: xarray.Dataset,
     max_lon: float = 10,
+    split: bool = False,
 ) -> xarray.Dataset:
     """
     Drop triface elements crossing the International Date Line (IDL).
@@ -204,28 +507,25 @@ def drop_elements_crossing_idl(
     These rules can lead to false positives close to the poles (e.g. latitudes > 89) especially
     if a small value for `max_lon` is used. Nevertheless, the main purpose of this function is
     to visualize data, so some false positives are not the end of the wold.
+
+    If ``split`` is ``True``, then instead of being dropped, the elements that cross the IDL
+    use copies of their western nodes whose longitudes are shifted by 360 degrees (e.g. -179 becomes 181).
+    This way they are rendered correctly east of the IDL instead of disappearing. Since shifting is
+    only correct for the elements whose longitudes span more than 180 degrees, the false positives
+    are kept unchanged. The node variables get copied, unless they are backed by ``dask``.
+
+    A new dataset is always returned, even if no element crosses the IDL.
     """
     import numpy as np
 
-    if max_lon <= 0:
-        raise ValueError(f'Maximum longitudinal "distance" must be positive: {max_lon}')
-    a, b, c = ds.triface_nodes.data.T
-    lon = ds.lon.data
-    lon_a = lon[a]
-    lon_b = lon[b]
-    lon_c = lon[c]
-    # `np.asarray(condition).nonzero()` is equivalent to `np.where(condition)`
-    # For more info check the help of `np.where()`
-    condition = (
-        # fmt: off
-        ((lon_a * lon_b < 0) & (np.abs(lon_a - lon_b) >= max_lon))
-        | ((lon_a * lon_c < 0) & (np.abs(lon_a - lon_c) >= max_lon))
-        | ((lon_b * lon_c < 0) & (np.abs(lon_b - lon_c) >= max_lon))
-        # fmt: on
-    )
-    indices_of_triface_nodes_crossing_idl = np.asarray(condition).nonzero()[0]
-    ds = ds.drop_isel(triface=indices_of_triface_nodes_crossing_idl)
-    return ds
+    crossing = get_elements_crossing_idl(ds, max_lon=max_lon)
+    if split:
+        return _split_elements_crossing_idl(ds, crossing)
+    if not crossing.any():
+        copied: xarray.Dataset = ds.copy()
+        return copied
+    result: xarray.Dataset = ds.isel(triface=np.flatnonzero(~crossing))
+    return result
 
 
 def get_bbox_from_raster(raster: geoviews.DynamicMap) -> holoviews.core.boundingregion.BoundingBox:
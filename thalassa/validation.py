@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import typing as T
+
+from . import instrumentation
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import numpy
+    import numpy.typing as npt
+    import xarray
+
+
+logger = logging.getLogger(__name__)
+
+STATION_DIM = "station"
+
+# The names match the ones that are expected by `api.get_station_table()`
+SKILL_METRICS = [
+    "Mean Absolute Error",
+    "RMSE",
+    "Scatter Index",
+    "percentage RMSE",
+    "BIAS or mean error",
+    "Standard deviation of residuals",
+    "Correlation Coefficient",
+    "R^2",
+    "Nash-Sutcliffe Coefficient",
+    "lambda index",
+]
+
+
+def compute_metrics(
+    sim: npt.NDArray[numpy.floating],
+    obs: npt.NDArray[numpy.floating],
+) -> dict[str, npt.NDArray[numpy.float64]]:
+    """
+    Compute the skill metrics of many stations at once.
+
+    `sim` and `obs` are 2D arrays with shape `(station, time)` whose values are aligned in time.
+    Missing values (``NaN``) in any of the two arrays are ignored. All the metrics are
+    computed using vectorized operations over all the stations:
+
+    - Mean Absolute Error: $mean(|sim - obs|)$
+    - RMSE: $\\sqrt{mean((sim - obs)^2)}$
+    - Scatter Index: the RMSE of the anomalies (i.e. the unbiased RMSE) divided by $mean(|obs|)$
+    - percentage RMSE: $100 \\cdot RMSE / (max(obs) - min(obs))$
+    - BIAS or mean error: $mean(sim - obs)$
+    - Standard deviation of residuals: $std(sim - obs)$
+    - Correlation Coefficient: Pearson's $r$
+    - R^2: $r^2$
+    - Nash-Sutcliffe Coefficient: $1 - \\sum (sim - obs)^2 / \\sum (obs - mean(obs))^2$
+    - lambda index: The index of agreement of [Duveiller et al. (2016)](https://doi.org/10.1038/srep19401)
+
+    Parameters:
+        sim: The simulated values.
+        obs: The observed values.
+
+    Returns:
+        A dictionary with one 1D array per metric.
+    """
+    import numpy as np
+
+    sim = np.asarray(sim, dtype=np.float64)
+    obs = np.asarray(obs, dtype=np.float64)
+    valid = ~(np.isnan(sim) | np.isnan(obs))
+    count = valid.sum(axis=1)
+    n = np.where(count > 0, count, np.nan)
+    sim = np.where(valid, sim, 0)
+    obs = np.where(valid, obs, 0)
+    mean_sim = sim.sum(axis=1) / n
+    mean_obs = obs.sum(axis=1) / n
+    # The anomalies are zero where the values are invalid, so that they do not contribute to the sums
+    sim_anomaly = np.where(valid, sim - mean_sim[:, None], 0)
+    obs_anomaly = np.where(valid, obs - mean_obs[:, None], 0)
+    error = sim - obs
+    mse = (error**2).sum(axis=1) / n
+    rmse = np.sqrt(mse)
+    bias = mean_sim - mean_obs
+    var_sim = (sim_anomaly**2).sum(axis=1) / n
+    var_obs = (obs_anomaly**2).sum(axis=1) / n
+    covariance = (sim_anomaly * obs_anomaly).sum(axis=1) / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = covariance / np.sqrt(var_sim * var_obs)
+        unbiased_rmse = np.sqrt(((sim_anomaly - obs_anomaly) ** 2).sum(axis=1) / n)
+        mean_abs_obs = np.abs(obs).sum(axis=1) / n
+        obs_range = np.where(valid, obs, -np.inf).max(axis=1) - np.where(valid, obs, np.inf).min(axis=1)
+        kappa = np.where(correlation < 0, 2 * np.abs(covariance), 0)
+        metrics = {
+            "Mean Absolute Error": np.abs(error).sum(axis=1) / n,
+            "RMSE": rmse,
+            "Scatter Index": unbiased_rmse / mean_abs_obs,
+            "percentage RMSE": 100 * rmse / obs_range,
+            "BIAS or mean error": bias,
+            "Standard deviation of residuals": np.sqrt(np.maximum(mse - bias**2, 0)),
+            "Correlation Coefficient": correlation,
+            "R^2": correlation**2,
+            "Nash-Sutcliffe Coefficient": 1 - mse / var_obs,
+            "lambda index": 1 - mse / (var_sim + var_obs + bias**2 + kappa),
+        }
+    return metrics
+
+
+def get_nearest_nodes(
+    ds: xarray.Dataset,
+    lon: npt.ArrayLike,
+    lat: npt.ArrayLike,
+) -> tuple[npt.NDArray[numpy.intp], npt.NDArray[numpy.float64]]:
+    """
+    Return the indices of the nodes which are nearest to the provided points and their distances.
+
+    Contrary to `utils.get_index_of_nearest_node()` this uses a KD-tree, so it is suitable for
+    thousands of points. Distances are in degrees.
+    """
+    import numpy as np
+    import scipy.spatial
+
+    tree = scipy.spatial.cKDTree(np.c_[ds.lon.values, ds.lat.values])
+    distances, indices = tree.query(np.c_[np.asarray(lon), np.asarray(lat)])
+    return indices, distances
+
+
+def _interp_in_time(
+    values: npt.NDArray[numpy.floating],
+    source_times: npt.NDArray[numpy.datetime64],
+    target_times: npt.NDArray[numpy.datetime64],
+) -> npt.NDArray[numpy.float64]:
+    """Linearly interpolate the columns of `values` (`(station, time)`) to `target_times`."""
+    import numpy as np
+
+    source = source_times.astype("datetime64[ns]").astype(np.int64)
+    target = target_times.astype("datetime64[ns]").astype(np.int64)
+    if len(source) < 2:
+        # There is nothing to interpolate; only the exact matches have values
+        result = np.full((values.shape[0], len(target)), np.nan)
+        if len(source):
+            result[:, target == source[0]] = values[:, :1]
+        return result
+    # The weights are the same for all the stations, so we only need to compute them once.
+    right = np.clip(np.searchsorted(source, target), 1, len(source) - 1)
+    left = right - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = (target - source[left]) / (source[right] - source[left])
+    outside = (target < source[0]) | (target > source[-1])
+    result = values[:, left] * (1 - weight) + values[:, right] * weight
+    result[:, outside] = np.nan
+    return T.cast("npt.NDArray[numpy.float64]", result)
+
+
+def compute_skill(
+    ds: xarray.Dataset,
+    observations: xarray.Dataset,
+    variable: str = "zeta",
+    obs_variable: str = "elev_obs",
+    *,
+    batch_size: int = 500,
+    max_workers: int | None = None,
+) -> xarray.Dataset:
+    """
+    Validate the model output against observations and return a "stations" dataset.
+
+    The model timeseries are extracted at the nodes which are nearest to the stations.
+    Then they are interpolated to the times of the observations and the skill metrics are
+    computed (check `compute_metrics()` for the definitions). The stations are processed
+    in batches which are executed in parallel and only the model data of the nearest nodes are loaded.
+
+    The returned dataset can be passed directly to `api.get_station_pins()`,
+    `api.get_station_timeseries()` and `api.get_station_table()`.
+
+    Examples:
+        ``` python
+        import thalassa
+        import xarray as xr
+        from thalassa import validation
+
+        ds = thalassa.open_dataset("some_netcdf.nc")
+        observations = xr.open_dataset("observations.nc")
+        stations = validation.compute_skill(ds, observations, variable="zeta")
+        ```
+
+    Parameters:
+        ds: The model output. It must adhere to the "Thalassa Schema" and `variable` must have
+            dimensions ``("time", "node")``.
+        observations: A dataset with a ``station`` dimension and a ``time`` dimension. It must contain
+            ``lon``, ``lat`` and `obs_variable` ``(station, time)``. If they exist, ``location``
+            and ``ioc_code`` are copied to the output.
+        variable: The model variable which is validated.
+        obs_variable: The observed variable.
+        batch_size: The number of stations that are processed together.
+        max_workers: The maximum number of threads. Defaults to the ``concurrent.futures`` default.
+
+    Returns:
+        A dataset with a ``node`` dimension (one per station), which contains ``lon``, ``lat``,
+        ``location``, ``ioc_code``, ``elev_sim`` ``(node, stime)``, ``elev_obs`` ``(node, time)``,
+        the index of the model node and its distance to the station and one variable per metric.
+    """
+    import numpy as np
+    import xarray as xr
+
+    if ds[variable].dims != ("time", "node"):
+        raise ValueError(
+            f"The dimensions of '{variable}' must be ('time', 'node'), not: {ds[variable].dims}"
+        )
+    observations = observations.transpose(STATION_DIM, "time", ...)
+    no_stations = observations.sizes[STATION_DIM]
+    model_nodes, distances = get_nearest_nodes(ds, observations.lon.values, observations.lat.values)
+    model_times = ds.time.values
+    obs_times = observations.time.values
+    obs_values = observations[obs_variable].values
+
+    def process_batch(batch: slice) -> tuple[npt.NDArray[T.Any], dict[str, npt.NDArray[T.Any]]]:
+        with instrumentation.span("compute_skill.batch", stations=batch.stop - batch.start) as span:
+            # Only load the columns that we need. Sorting the indices makes reading the data more efficient.
+            unique_nodes, inverse = np.unique(model_nodes[batch], return_inverse=True)
+            sim = ds[variable].isel(node=unique_nodes).values.T[inverse]
+            span.record_bytes(sim.nbytes)
+            aligned = _interp_in_time(sim, model_times, obs_times)
+            metrics = compute_metrics(aligned, obs_values[batch])
+        return sim, metrics
+
+    batches = [slice(i, min(i + batch_size, no_stations)) for i in range(0, no_stations, batch_size)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(process_batch, batches))
+    sim = np.concatenate([result[0] for result in results]) if results else np.empty((0, len(model_times)))
+    metrics = {
+        name: np.concatenate([result[1][name] for result in results]) if results else np.empty(0)
+        for name in SKILL_METRICS
+    }
+    stations = xr.Dataset(
+        coords=dict(
+            stime=("stime", model_times),
+            time=("time", obs_times),
+        ),
+        data_vars=dict(
+            lon=("node", observations.lon.values),
+            lat=("node", observations.lat.values),
+            location=("node", _get_labels(observations, "location")),
+            ioc_code=("node", _get_labels(observations, "ioc_code")),
+            model_node=("node", model_nodes),
+            distance=("node", distances),
+            elev_sim=(("node", "stime"), sim),
+            elev_obs=(("node", "time"), obs_values),
+            **{name: ("node", values) for name, values in metrics.items()},
+        ),
+    )
+    return stations
+
+
+def _get_labels(observations: xarray.Dataset, name: str) -> npt.NDArray[numpy.str_]:
+    import numpy as np
+
+    if name in observations:
+        return observations[name].values.astype(str)
+    return np.array([str(i) for i in range(observations.sizes[STATION_DIM])])
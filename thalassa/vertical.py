@@ -0,0 +1,414 @@
+"""
+Vertical operations on 3D variables, i.e. variables with dimensions ``("time", "node", "layer")``.
+
+The layers are ordered from the bottom to the surface (like in SCHISM) and the layers that are
+below the bathymetry are either ``NaN`` or one of the fill values of the variable.
+The vertical coordinates of the layers are read from the ``zcor`` variable, which contains
+the elevation of each layer (i.e. negative below the datum).
+
+The reductions return a dataset without the ``layer`` dimension that can be passed directly to
+`thalassa.plot()`. The computations are lazy and they run chunk by chunk, so only the timesteps
+that get plotted are ever loaded. `get_transect()` returns vertical sections along a line.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import typing as T
+
+from . import analytics
+from . import instrumentation
+from . import masking
+from . import utils
+from .normalization import VERTICAL_DIM
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import numpy
+    import numpy.typing as npt
+    import xarray
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ZCOR = "zcor"
+# Each chunk contains a single timestep and all the layers of (at most) 100k nodes
+DEFAULT_CHUNKS = {"time": 1, "node": 100_000}
+
+
+def _check_variable(ds: xarray.Dataset, variable: str) -> None:
+    if VERTICAL_DIM not in ds[variable].dims or "node" not in ds[variable].dims:
+        raise ValueError(
+            f"The variable must have the '{VERTICAL_DIM}' and 'node' dimensions: {ds[variable].dims}"
+        )
+
+
+def _get_masked(
+    ds: xarray.Dataset,
+    variable: str,
+    chunks: dict[str, int] | None,
+) -> xarray.DataArray:
+    """Return `variable` with its inactive values replaced by ``NaN`` and chunked for streaming."""
+    data = ds[variable]
+    if data.chunks is None and chunks:
+        data = data.chunk({dim: size for dim, size in chunks.items() if dim in data.dims})
+    masked: xarray.DataArray = data.where(masking.get_active_nodes(ds.assign({variable: data}), variable))
+    return masked
+
+
+def _apply(
+    func: T.Callable[..., npt.NDArray[T.Any]],
+    *arrays: xarray.DataArray,
+    **kwargs: T.Any,
+) -> xarray.DataArray:
+    import numpy as np
+    import xarray as xr
+
+    return T.cast(
+        "xarray.DataArray",
+        xr.apply_ufunc(
+            func,
+            *arrays,
+            input_core_dims=[[VERTICAL_DIM]] * len(arrays),
+            kwargs=kwargs,
+            dask="parallelized",
+            output_dtypes=[np.result_type(*(array.dtype for array in arrays), np.float32)],
+        ),
+    )
+
+
+def _to_dataset(
+    ds: xarray.Dataset, variable: str, result: xarray.DataArray, **attrs: T.Any
+) -> xarray.Dataset:
+    out: xarray.Dataset = ds.drop_dims(VERTICAL_DIM).assign({variable: result})
+    out[variable].attrs = ds[variable].attrs | attrs
+    return out
+
+
+def _get_layer_indices(valid: npt.NDArray[numpy.bool_]) -> tuple[npt.NDArray[numpy.intp], ...]:
+    """Return the indices of the bottom and of the surface valid layer of each column."""
+    last = valid.shape[-1] - 1
+    return valid.argmax(axis=-1), last - valid[..., ::-1].argmax(axis=-1)
+
+
+def _take(values: npt.NDArray[T.Any], indices: npt.NDArray[numpy.intp]) -> npt.NDArray[T.Any]:
+    import numpy as np
+
+    return np.take_along_axis(values, indices[..., None], axis=-1)[..., 0]
+
+
+def _select_layer(values: npt.NDArray[numpy.floating], surface: bool) -> npt.NDArray[numpy.floating]:
+    import numpy as np
+
+    valid = ~np.isnan(values)
+    bottom, top = _get_layer_indices(valid)
+    result = _take(values, top if surface else bottom)
+    return T.cast("npt.NDArray[numpy.floating]", np.where(valid.any(axis=-1), result, np.nan))
+
+
+def _interpolate_to_depth(
+    values: npt.NDArray[numpy.floating],
+    zcor: npt.NDArray[numpy.floating],
+    depth: float,
+    from_surface: bool,
+) -> npt.NDArray[numpy.floating]:
+    import numpy as np
+
+    valid = ~(np.isnan(values) | np.isnan(zcor))
+    zcor = np.where(valid, zcor, np.nan)
+    if from_surface:
+        z = _select_layer(zcor, surface=True)[..., None] - depth
+    else:
+        z = np.full(zcor.shape[:-1] + (1,), -depth)
+    with np.errstate(invalid="ignore"):
+        below = valid & (zcor <= z)
+        above = valid & (zcor >= z)
+    # The highest layer below `z` and the lowest layer above it
+    _, lower = _get_layer_indices(below)
+    upper, _ = _get_layer_indices(above)
+    z0, z1 = _take(zcor, lower), _take(zcor, upper)
+    v0, v1 = _take(values, lower), _take(values, upper)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = np.where(z1 > z0, (z[..., 0] - z0) / (z1 - z0), 0.0)
+    result = v0 + weight * (v1 - v0)
+    return T.cast(
+        "npt.NDArray[numpy.floating]",
+        np.where(below.any(axis=-1) & above.any(axis=-1), result, np.nan),
+    )
+
+
+def _depth_average(
+    values: npt.NDArray[numpy.floating],
+    zcor: npt.NDArray[numpy.floating],
+) -> npt.NDArray[numpy.floating]:
+    import numpy as np
+
+    valid = ~(np.isnan(values) | np.isnan(zcor))
+    # Trapezoidal integration over the pairs of adjacent valid layers
+    pairs = valid[..., 1:] & valid[..., :-1]
+    thickness = np.where(pairs, np.diff(zcor, axis=-1), 0.0)
+    means = np.where(pairs, (values[..., 1:] + values[..., :-1]) / 2, 0.0)
+    total = thickness.sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        average = (means * thickness).sum(axis=-1) / total
+    # Columns with a single valid layer have no thickness; use the value of that layer
+    single = _select_layer(np.where(valid, values, np.nan), surface=True)
+    return T.cast("npt.NDArray[numpy.floating]", np.where(total > 0, average, single))
+
+
+def select_surface(
+    ds: xarray.Dataset,
+    variable: str,
+    *,
+    chunks: dict[str, int] | None = DEFAULT_CHUNKS,
+) -> xarray.Dataset:
+    """
+    Return a dataset where `variable` contains the values of the uppermost valid layer.
+
+    Examples:
+        ``` python
+        import thalassa
+        from thalassa import vertical
+
+        ds = thalassa.open_dataset("schism_3d.nc")
+        surface = vertical.select_surface(ds, "temp")
+        thalassa.plot(surface.isel(time=0), variable="temp")
+        ```
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema".
+        variable: A variable with a ``layer`` dimension.
+        chunks: The chunks that are used if `variable` is not already backed by ``dask``.
+            Use ``None`` to process the whole variable at once.
+    """
+    _check_variable(ds, variable)
+    data = _get_masked(ds, variable, chunks)
+    return _to_dataset(ds, variable, _apply(_select_layer, data, surface=True), layer="surface")
+
+
+def select_bottom(
+    ds: xarray.Dataset,
+    variable: str,
+    *,
+    chunks: dict[str, int] | None = DEFAULT_CHUNKS,
+) -> xarray.Dataset:
+    """
+    Return a dataset where `variable` contains the values of the lowest valid layer.
+
+    Check `select_surface()` for the parameters.
+    """
+    _check_variable(ds, variable)
+    data = _get_masked(ds, variable, chunks)
+    return _to_dataset(ds, variable, _apply(_select_layer, data, surface=False), layer="bottom")
+
+
+def interpolate_to_depth(
+    ds: xarray.Dataset,
+    variable: str,
+    depth: float,
+    *,
+    from_surface: bool = False,
+    zcor: str = DEFAULT_ZCOR,
+    chunks: dict[str, int] | None = DEFAULT_CHUNKS,
+) -> xarray.Dataset:
+    """
+    Return a dataset where `variable` is linearly interpolated at a fixed depth.
+
+    The nodes where the depth is outside the water column are ``NaN``.
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema".
+        variable: A variable with a ``layer`` dimension.
+        depth: The depth in meters. It is positive downwards.
+        from_surface: If `True`, then `depth` is measured from the free surface (i.e. the uppermost
+            valid value of `zcor`), otherwise it is measured from the datum of `zcor`.
+        zcor: The variable with the elevation of the layers. It must have the same dimensions as `variable`.
+        chunks: The chunks that are used if the variables are not already backed by ``dask``.
+            Use ``None`` to process the whole variables at once.
+    """
+    _check_variable(ds, variable)
+    if ds[zcor].dims != ds[variable].dims:
+        raise ValueError(f"The dimensions of '{zcor}' and '{variable}' differ: {ds[zcor].dims}")
+    data = _get_masked(ds, variable, chunks)
+    z = _get_masked(ds, zcor, chunks)
+    result = _apply(_interpolate_to_depth, data, z, depth=depth, from_surface=from_surface)
+    return _to_dataset(ds, variable, result, depth=depth)
+
+
+def depth_average(
+    ds: xarray.Dataset,
+    variable: str,
+    *,
+    zcor: str = DEFAULT_ZCOR,
+    chunks: dict[str, int] | None = DEFAULT_CHUNKS,
+) -> xarray.Dataset:
+    """
+    Return a dataset where `variable` is averaged over the water column.
+
+    The average is weighted by the thickness of the layers, i.e. it is the trapezoidal integral
+    of `variable` over `zcor` divided by the height of the water column.
+
+    Check `interpolate_to_depth()` for the parameters.
+    """
+    _check_variable(ds, variable)
+    if ds[zcor].dims != ds[variable].dims:
+        raise ValueError(f"The dimensions of '{zcor}' and '{variable}' differ: {ds[zcor].dims}")
+    data = _get_masked(ds, variable, chunks)
+    z = _get_masked(ds, zcor, chunks)
+    return _to_dataset(ds, variable, _apply(_depth_average, data, z), layer="depth average")
+
+
+def _get_transect_points(
+    lons: npt.NDArray[numpy.float64],
+    lats: npt.NDArray[numpy.float64],
+    no_points: int,
+) -> tuple[npt.NDArray[numpy.float64], ...]:
+    """Return the distance (in meters), the longitude and the latitude of equidistant points along a line."""
+    import numpy as np
+
+    lon, lat = np.radians(lons), np.radians(lats)
+    # Haversine
+    a = np.sin(np.diff(lat) / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2
+    cumulative = np.concatenate([[0.0], np.cumsum(2 * analytics.EARTH_RADIUS * np.arcsin(np.sqrt(a)))])
+    distance = np.linspace(0, cumulative[-1], no_points)
+    return distance, np.interp(distance, cumulative, lons), np.interp(distance, cumulative, lats)
+
+
+def _load_columns(
+    data: xarray.DataArray,
+    nodes: npt.NDArray[numpy.intp],
+    timestep: int | None,
+) -> npt.NDArray[numpy.float64]:
+    """Load the vertical columns of `nodes` with a single read and replace the fill values with ``NaN``."""
+    import numpy as np
+
+    indexers: dict[str, T.Any] = {"node": nodes}
+    if timestep is not None:
+        indexers["time"] = timestep
+    with instrumentation.span("transect.load", variable=data.name, timestep=timestep) as span:
+        values = data.isel(indexers).transpose("node", VERTICAL_DIM).values.astype(np.float64)
+        span.record_bytes(values.nbytes)
+    values[np.isin(values, masking.get_fill_values(data))] = np.nan
+    return T.cast("npt.NDArray[numpy.float64]", values)
+
+
+def _compute_section(
+    values: npt.NDArray[numpy.float64],
+    zcor: npt.NDArray[numpy.float64],
+    indices: npt.NDArray[numpy.intp],
+    weights: npt.NDArray[numpy.float64],
+    depths: npt.NDArray[numpy.float64],
+) -> npt.NDArray[numpy.float64]:
+    """Interpolate the columns horizontally to the transect points and vertically to `depths`."""
+    import numpy as np
+
+    # `indices` has shape `(point, 3)`, so the interpolated columns have shape `(point, layer)`
+    values = (weights[..., None] * values[indices]).sum(axis=1)
+    zcor = (weights[..., None] * zcor[indices]).sum(axis=1)
+    section = [_interpolate_to_depth(values, zcor, depth=depth, from_surface=False) for depth in depths]
+    return np.stack(section)
+
+
+def get_transect(
+    ds: xarray.Dataset,
+    variable: str,
+    lons: npt.ArrayLike,
+    lats: npt.ArrayLike,
+    *,
+    no_points: int = 200,
+    depths: npt.ArrayLike | None = None,
+    no_depths: int = 50,
+    zcor: str = DEFAULT_ZCOR,
+    max_workers: int | None = None,
+) -> xarray.DataArray:
+    """
+    Return the vertical section of `variable` along a transect.
+
+    The transect is sampled at `no_points` equidistant points which are located in the mesh.
+    Only the columns of the nodes of the triangles that contain the points are loaded, with a single
+    read per timestep. The columns are interpolated horizontally using barycentric weights
+    and vertically, using `zcor`, to a regular grid of depths.
+
+    If `variable` has a ``time`` dimension, then one section is computed per timestep,
+    in parallel. Select the timesteps of interest beforehand, e.g. with ``ds.isel(time=[0, 6, 12])``.
+
+    Examples:
+        ``` python
+        import holoviews as hv
+        import thalassa
+        from thalassa import vertical
+
+        ds = thalassa.open_dataset("schism_3d.nc")
+        section = vertical.get_transect(ds.isel(time=0), "salt", lons=[-76.3, -76.1], lats=[36.9, 37.2])
+        hv.QuadMesh(section, kdims=["distance", "depth"]).opts(invert_yaxis=True)
+        ```
+
+    Parameters:
+        ds: A dataset that adheres to the "Thalassa Schema".
+        variable: A variable with a ``layer`` dimension.
+        lons: The longitudes of the vertices of the transect.
+        lats: The latitudes of the vertices of the transect.
+        no_points: The number of points along the transect.
+        depths: The depths of the section in meters (positive downwards from the datum of `zcor`).
+            Defaults to `no_depths` depths between ``0`` and the deepest point of the transect.
+        no_depths: The number of the default depths.
+        zcor: The variable with the elevation of the layers.
+        max_workers: The maximum number of threads. Defaults to the ``concurrent.futures`` default.
+
+    Returns:
+        An array with dimensions ``("time", "depth", "distance")`` (or ``("depth", "distance")``)
+        where ``distance`` is the distance along the transect in meters. The points outside of the mesh
+        or below the bottom are ``NaN``.
+    """
+    import numpy as np
+    import xarray as xr
+
+    _check_variable(ds, variable)
+    if ds[zcor].dims != ds[variable].dims:
+        raise ValueError(f"The dimensions of '{zcor}' and '{variable}' differ: {ds[zcor].dims}")
+    distance, lon, lat = _get_transect_points(
+        np.asarray(lons, dtype=np.float64),
+        np.asarray(lats, dtype=np.float64),
+        no_points,
+    )
+    triangles, weights = utils.locate_points(ds, lon, lat)
+    if (triangles < 0).all():
+        raise ValueError("The transect does not intersect the mesh")
+    # The points outside of the mesh use the first triangle with NaN weights
+    vertices = ds.triface_nodes.values[np.where(triangles < 0, 0, triangles)]
+    nodes, indices = np.unique(vertices, return_inverse=True)
+    indices = indices.reshape(vertices.shape)
+    timesteps: list[int | None] = list(range(ds.sizes["time"])) if "time" in ds[variable].dims else [None]
+
+    def load(timestep: int | None) -> tuple[npt.NDArray[numpy.float64], npt.NDArray[numpy.float64]]:
+        return _load_columns(ds[variable], nodes, timestep), _load_columns(ds[zcor], nodes, timestep)
+
+    first = load(timestep=timesteps[0])
+    if depths is None:
+        bottom = -np.nanmin((weights[..., None] * first[1][indices]).sum(axis=1))
+        depths = np.linspace(0, bottom, no_depths)
+    depths = np.asarray(depths, dtype=np.float64)
+
+    def compute(
+        columns: tuple[npt.NDArray[numpy.float64], npt.NDArray[numpy.float64]],
+    ) -> npt.NDArray[numpy.float64]:
+        values, zcor_values = columns
+        return _compute_section(values, zcor_values, indices=indices, weights=weights, depths=depths)
+
+    sections = [compute(first)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        sections.extend(executor.map(lambda timestep: compute(load(timestep)), timesteps[1:]))
+    coords: dict[str, T.Any] = dict(
+        distance=("distance", distance, dict(units="m")),
+        depth=("depth", depths, dict(units="m", positive="down")),
+        lon=("distance", lon),
+        lat=("distance", lat),
+    )
+    attrs = ds[variable].attrs
+    if timesteps[0] is None:
+        return xr.DataArray(
+            sections[0], dims=("depth", "distance"), coords=coords, name=variable, attrs=attrs
+        )
+    coords["time"] = ds.time.values
+    dims = ("time", "depth", "distance")
+    return xr.DataArray(np.stack(sections), dims=dims, coords=coords, name=variable, attrs=attrs)